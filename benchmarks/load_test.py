@@ -0,0 +1,367 @@
+"""Load test: nhiều client giả lập chạy song song trên một ZEO server cục bộ.
+
+Tạo FileStorage tạm với N user × M project × K task (dùng User/Project/Task
+thật), chạy StorageServer trong process này như manual_start_server của
+start_zeo_server.py, rồi khởi động các client trong process riêng. Mỗi client
+làm giống MainWindow: đọc qua connection chính, ghi qua database.operations
+bằng run_in_transaction trên worker connection, và refresh bằng
+poll_invalidations. Các client được gán user theo vòng tròn, nên nhiều client
+cùng một user sẽ gây conflict như khi một người mở app trên nhiều máy.
+
+Báo cáo throughput, histogram latency theo flow (write = tới khi commit xong,
+gồm cả retry), tỉ lệ conflict và CPU của server (CPU của process này trong
+lúc chạy: process chỉ còn thread của server làm việc).
+
+Chạy: python benchmarks/load_test.py [--users 4] [--projects 10] [--tasks 100]
+                                     [--clients 8] [--duration 30] [--json out.json]
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+PASSWORD = 'load'
+SEED_CHUNK = 2000
+CONNECT_TIMEOUT = 120
+
+# Flow -> trọng số (tỉ lệ thao tác của một người dùng app)
+FLOWS = {'create': 3, 'edit': 4, 'delete': 1, 'refresh': 2}
+WRITE_FLOWS = ('create', 'edit', 'delete')
+# Cận trên (ms) của các bucket trong histogram latency
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, math.inf)
+
+WORDS = ('report', 'review', 'design', 'deploy', 'invoice', 'meeting', 'backup',
+         'release', 'budget', 'hiring', 'support', 'migration', 'security', 'docs')
+TAGS = ('urgent', 'backend', 'frontend', 'ops', 'client', 'later')
+STATUSES = ('To Do', 'Doing', 'Done')
+
+
+def username_for(number):
+    return f'load{number + 1}'
+
+
+def random_task_data(rng, title):
+    from datetime import date, timedelta
+    return {
+        'title': title,
+        'description': f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)}",
+        'deadline': date.today() + timedelta(days=rng.randint(-10, 60)) if rng.random() < 0.75 else None,
+        'status': rng.choice(STATUSES),
+        'tags': rng.sample(TAGS, rng.randint(0, 2)),
+    }
+
+
+def seed_database(path, users, projects, tasks):
+    """Tạo FileStorage với users × projects × tasks, commit theo từng SEED_CHUNK task"""
+    import ZODB
+    import transaction
+    from BTrees.OOBTree import OOBTree
+    from BTrees.Length import Length
+    from database.models import User, Project, Task
+    from database.schema import SCHEMA_VERSION, set_schema_version
+
+    rng = random.Random(0)
+    db = ZODB.DB(path)
+    connection = db.open()
+    root = connection.root()
+    root['users'] = OOBTree()
+    root['user_count'] = Length(users)
+    set_schema_version(root, SCHEMA_VERSION)
+
+    created = 0
+    for user_number in range(users):
+        user = root['users'][username_for(user_number)] = User(username_for(user_number), PASSWORD)
+        for project_number in range(projects):
+            project = Project(f"Project {project_number + 1}", "Synthetic load-test project")
+            user.add_project(project)
+            for task_number in range(tasks):
+                task_data = random_task_data(rng, f"Task {task_number + 1}")
+                user.add_task(project, Task(task_data['title'], task_data['description'],
+                                            task_data['deadline'], task_data['status'], task_data['tags']))
+                created += 1
+                if created % SEED_CHUNK == 0:
+                    transaction.commit()
+                    connection.cacheMinimize()
+    transaction.commit()
+    connection.close()
+    db.close()
+    return created
+
+
+def start_server(path):
+    """Chạy StorageServer trên thread riêng (như manual_start_server), trả về server"""
+    from ZODB.FileStorage import FileStorage
+    from ZEO.StorageServer import StorageServer
+
+    storage = FileStorage(path)
+    server = StorageServer(('127.0.0.1', 0), {'1': storage})
+    server.start_thread()
+    return server
+
+
+# ----------------------------------------------------------------------
+# Process client
+
+_start_barrier = None
+
+
+def _init_client(address, barrier):
+    global _start_barrier
+    _start_barrier = barrier
+    # Cấu hình phải có trước khi import config.settings
+    os.environ.update(ZEO_HOST=address[0], ZEO_PORT=str(address[1]),
+                      ZEO_CLIENT_NAME='', DEBUG='False')
+    sys.path.insert(0, SRC_DIR)
+
+
+class SimulatedClient:
+    """Một cửa sổ app: connection chính để đọc, worker connection để ghi"""
+
+    def __init__(self, client_id, username, seed):
+        from database.connection import db_connection
+
+        self.client_id = client_id
+        self.username = username
+        self.rng = random.Random(seed)
+        self.created = 0
+        self.missed = 0  # edit/delete task đã bị client khác xóa
+        self.db_connection = db_connection
+        if not db_connection.open_database():
+            raise RuntimeError(f"Client {client_id} cannot connect to the ZEO server")
+        db_connection.open_connection()
+        self.worker_connection = db_connection.open_worker_connection()
+        self.user = db_connection.root['users'][username]
+
+    def write(self, operation, *args):
+        return self.db_connection.run_in_transaction(
+            lambda root: operation(root, self.username, *args), connection=self.worker_connection)
+
+    def pick_project(self):
+        return self.user.projects[self.rng.randrange(len(self.user.projects))]
+
+    def pick_task(self):
+        project = self.pick_project()
+        tasks, _ = project.get_tasks_page(limit=50)
+        if not tasks:
+            return project, None
+        return project, self.rng.choice(tasks)
+
+    def create(self):
+        from database import operations
+        self.created += 1
+        task_data = random_task_data(self.rng, f"Load task {self.client_id}-{self.created}")
+        self.write(operations.create_task, operations.project_ref(self.pick_project()), task_data)
+
+    def edit(self):
+        from database import operations
+        project, task = self.pick_task()
+        if task is None:
+            return self.create()
+        task_data = random_task_data(self.rng, f"{task.title} *")
+        if not self.write(operations.update_task, operations.project_ref(project),
+                          operations.task_ref(task), task_data):
+            self.missed += 1
+
+    def delete(self):
+        from database import operations
+        project, task = self.pick_task()
+        if task is None:
+            return self.create()
+        if self.write(operations.delete_task, operations.project_ref(project),
+                      operations.task_ref(task)) is None:
+            self.missed += 1
+
+    def refresh(self):
+        """Như auto refresh: nhận invalidation rồi đọc các dòng cây đang hiển thị"""
+        self.db_connection.poll_invalidations()
+        for project in self.user.projects:
+            project.get_status_counts()
+        tasks, _ = self.pick_project().get_tasks_page(limit=50)
+        for task in tasks:
+            task.get_display_name()
+
+    def run(self, duration):
+        from ZODB.POSException import ConflictError
+
+        flows, weights = zip(*FLOWS.items())
+        latencies = {flow: [] for flow in flows}
+        failed = 0
+        _start_barrier.wait(CONNECT_TIMEOUT)
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            flow = self.rng.choices(flows, weights)[0]
+            started = time.perf_counter()
+            try:
+                getattr(self, flow)()
+            except ConflictError:
+                # Hết số lần retry
+                failed += 1
+                continue
+            latencies[flow].append((time.perf_counter() - started) * 1000)
+
+        stats = dict(self.db_connection.transaction_stats)
+        self.worker_connection.close()
+        self.db_connection.close()
+        return {'latencies': latencies, 'transaction_stats': stats,
+                'failed': failed, 'missed': self.missed}
+
+
+def run_client(client_id, username, duration, seed):
+    return SimulatedClient(client_id, username, seed).run(duration)
+
+
+# ----------------------------------------------------------------------
+# Báo cáo
+
+def percentile(values, percent):
+    """Percentile theo nearest-rank"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def histogram(values):
+    counts = [0] * len(BUCKETS_MS)
+    for value in values:
+        counts[next(i for i, bound in enumerate(BUCKETS_MS) if value <= bound)] += 1
+    return counts
+
+
+def latency_summary(values):
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'p50_ms': round(statistics.median(values), 2),
+        'p95_ms': round(percentile(values, 95), 2),
+        'p99_ms': round(percentile(values, 99), 2),
+        'max_ms': round(max(values), 2),
+        'histogram': histogram(values),
+    }
+
+
+def build_report(results, wall_seconds, server_cpu_seconds, config):
+    latencies = {flow: [] for flow in FLOWS}
+    totals = {'commits': 0, 'conflicts': 0, 'retries': 0, 'failures': 0}
+    failed = missed = 0
+    for result in results:
+        for flow, values in result['latencies'].items():
+            latencies[flow].extend(values)
+        for key in totals:
+            totals[key] += result['transaction_stats'].get(key, 0)
+        failed += result['failed']
+        missed += result['missed']
+
+    writes = [value for flow in WRITE_FLOWS for value in latencies[flow]]
+    operations_count = sum(len(values) for values in latencies.values())
+    commit_attempts = totals['commits'] + totals['conflicts']
+    return {
+        'config': config,
+        'wall_seconds': round(wall_seconds, 2),
+        'operations': operations_count,
+        'throughput_ops': round(operations_count / wall_seconds, 1),
+        'commits_per_second': round(totals['commits'] / wall_seconds, 1),
+        'conflict_rate': round(totals['conflicts'] / commit_attempts, 4) if commit_attempts else 0.0,
+        'transactions': totals,
+        'failed_operations': failed,
+        'missed_targets': missed,
+        'server_cpu_seconds': round(server_cpu_seconds, 2),
+        'server_cpu_percent': round(server_cpu_seconds / wall_seconds * 100, 1),
+        'buckets_ms': [bound if bound != math.inf else None for bound in BUCKETS_MS],
+        'latency': dict({flow: latency_summary(values) for flow, values in latencies.items()},
+                        commit=latency_summary(writes)),
+    }
+
+
+def print_report(report):
+    transactions = report['transactions']
+    print(f"🚀 {report['operations']} operations in {report['wall_seconds']}s: "
+          f"{report['throughput_ops']} ops/s, {report['commits_per_second']} commits/s")
+    print(f"⚔️ Conflict rate {report['conflict_rate'] * 100:.2f}% ({transactions['conflicts']} conflicts, "
+          f"{transactions['retries']} retries, {report['failed_operations']} failed after retries, "
+          f"{report['missed_targets']} targets already deleted)")
+    print(f"🖥️ Server CPU {report['server_cpu_seconds']}s ({report['server_cpu_percent']}% of one core)")
+
+    print("Latency:")
+    for flow, summary in report['latency'].items():
+        if summary['count']:
+            print(f"  {flow:<8} {summary['count']:>7}  p50 {summary['p50_ms']:8.2f}ms  p95 {summary['p95_ms']:8.2f}ms  "
+                  f"p99 {summary['p99_ms']:8.2f}ms  max {summary['max_ms']:8.2f}ms")
+
+    commit = report['latency']['commit']
+    if commit['count']:
+        print("Commit latency histogram:")
+        widest = max(commit['histogram'])
+        for bound, count in zip(BUCKETS_MS, commit['histogram']):
+            label = f"<= {bound:g}ms" if bound != math.inf else f"> {BUCKETS_MS[-2]:g}ms"
+            print(f"  {label:>10} {count:>7}  {'#' * round(count / widest * 40)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent client load test against a local ZEO server")
+    parser.add_argument('--users', type=int, default=4, help="seeded users (N)")
+    parser.add_argument('--projects', type=int, default=10, help="projects per user (M)")
+    parser.add_argument('--tasks', type=int, default=100, help="tasks per project (K)")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent simulated clients")
+    parser.add_argument('--duration', type=float, default=30, help="seconds each client runs")
+    parser.add_argument('--seed', type=int, default=1, help="random seed of the clients")
+    parser.add_argument('--json', help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, SRC_DIR)
+    work_dir = tempfile.mkdtemp(prefix='load_test_')
+    storage_path = os.path.join(work_dir, 'Data.fs')
+    try:
+        started = time.perf_counter()
+        created = seed_database(storage_path, args.users, args.projects, args.tasks)
+        print(f"🌱 Seeded {args.users} users, {args.users * args.projects} projects, "
+              f"{created} tasks in {time.perf_counter() - started:.1f}s")
+        size_before = os.path.getsize(storage_path)
+
+        server = start_server(storage_path)
+        try:
+            # spawn: không fork process đang có thread của ZEO server
+            context = multiprocessing.get_context('spawn')
+            barrier = context.Barrier(args.clients + 1)
+            with context.Pool(args.clients, initializer=_init_client,
+                              initargs=(server.addr, barrier)) as pool:
+                pending = pool.starmap_async(
+                    run_client,
+                    [(number, username_for(number % args.users), args.duration, args.seed + number)
+                     for number in range(args.clients)],
+                    chunksize=1)
+                # Bắt đầu đo khi mọi client đã kết nối
+                barrier.wait(CONNECT_TIMEOUT)
+                wall_started = time.perf_counter()
+                cpu_started = time.process_time()
+                results = pending.get()
+                wall_seconds = time.perf_counter() - wall_started
+                server_cpu_seconds = time.process_time() - cpu_started
+        finally:
+            server.close()
+
+        config = dict(vars(args), seeded_tasks=created)
+        report = build_report(results, wall_seconds, server_cpu_seconds, config)
+        report['storage_growth_bytes'] = os.path.getsize(storage_path) - size_before
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(report)
+    print(f"💾 Data.fs grew by {report['storage_growth_bytes'] / 1024:.0f}KB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+        print(f"📝 Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""Micro-benchmark các hot path của database/models.py.
+
+Mỗi benchmark được đo ở nhiều kích thước (số project của user / số task của
+project, mặc định 10 -> 100k), tự chọn số vòng lặp như timeit.autorange và lấy
+trung vị, min và độ phân tán (spread) của nhiều lần lặp. Model nằm trong một FileStorage tạm như khi chạy
+thật; pickle/unpickle dùng đúng serializer của ZODB (một record mỗi object,
+object con chỉ là reference).
+
+Lưu baseline rồi so sánh ở lần chạy sau, thoát với mã 1 nếu min của một
+benchmark chậm hơn baseline quá ngưỡng. Ngưỡng của mỗi benchmark là giá trị lớn
+hơn giữa --threshold và NOISE_FACTOR lần spread (của baseline đã lưu hoặc của
+lần chạy này, lấy giá trị lớn hơn), để benchmark nhiễu không báo regression giả:
+
+  python benchmarks/model_benchmarks.py --save baseline.json
+  python benchmarks/model_benchmarks.py --compare baseline.json [--threshold 25]
+  python benchmarks/model_benchmarks.py --sizes 10 1000 --filter pickle
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_THRESHOLD = float(os.getenv('MODEL_BENCH_THRESHOLD', 25))
+DEFAULT_REPEAT = 15
+NOISE_FACTOR = 3  # ngưỡng tối thiểu = NOISE_FACTOR * spread_pct
+SAMPLE_KEYS = 100  # số key lookup được xoay vòng trong mỗi benchmark
+BUILD_CHUNK = 2000
+
+STATUSES = ('To Do', 'Doing', 'Done')
+
+BENCHMARKS = []
+
+
+def benchmark(sized=True):
+    """Đăng ký benchmark: hàm nhận (fixtures, size) và trả về callable cần đo"""
+    def register(function):
+        BENCHMARKS.append((function.__name__, function, sized))
+        return function
+    return register
+
+
+class Fixtures:
+    """User/Project ở mỗi kích thước, tạo một lần trong FileStorage tạm"""
+
+    def __init__(self):
+        import ZODB
+        from ZODB.serialize import ObjectReader
+
+        self.work_dir = tempfile.mkdtemp(prefix='model_benchmarks_')
+        self.db = ZODB.DB(os.path.join(self.work_dir, 'Data.fs'), cache_size=50000)
+        self.connection = self.db.open()
+        self.root = self.connection.root()
+        self.reader = ObjectReader(self.connection, self.connection._cache, self.db.classFactory)
+        self._users = {}
+        self._projects = {}
+
+    def close(self):
+        self.connection.close()
+        self.db.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _commit(self):
+        import transaction
+        transaction.commit()
+        self.connection.cacheMinimize()
+
+    def user(self, size):
+        """User có size project"""
+        from database.models import User, Project
+        if size not in self._users:
+            user = self.root[f'user-{size}'] = User(f'bench-{size}', 'bench')
+            for number in range(size):
+                user.add_project(Project(f"Project {number}", "Benchmark project"))
+                if (number + 1) % BUILD_CHUNK == 0:
+                    self._commit()
+            self._commit()
+            self._users[size] = user
+        return self._users[size]
+
+    def project(self, size):
+        """Project có size task, một phần ba mỗi status"""
+        from database.models import User, Project, Task
+        if size not in self._projects:
+            user = self.root[f'owner-{size}'] = User(f'owner-{size}', 'bench')
+            project = Project(f"Project {size}", "Benchmark project")
+            user.add_project(project)
+            for number in range(size):
+                user.add_task(project, Task(f"Task {number}", "Benchmark task", "2030-01-01",
+                                            STATUSES[number % len(STATUSES)], ('bench',)))
+                if (number + 1) % BUILD_CHUNK == 0:
+                    self._commit()
+            self._commit()
+            self._projects[size] = project
+        return self._projects[size]
+
+    def task(self):
+        project = self.project(10)
+        return project.tasks[0]
+
+    def sample(self, items, key):
+        """SAMPLE_KEYS key trải đều trên items (xoay vòng khi đo)"""
+        items = list(items)
+        step = max(len(items) // SAMPLE_KEYS, 1)
+        return itertools.cycle([key(item) for item in items[::step][:SAMPLE_KEYS]])
+
+    def serialize(self, obj):
+        from ZODB.serialize import ObjectWriter
+        return ObjectWriter(obj).serialize(obj)
+
+    def deserialize(self, cls, data):
+        """Như khi ZODB load một ghost: đọc state rồi __setstate__ vào instance mới"""
+        obj = cls.__new__(cls)
+        obj.__setstate__(self.reader.getState(data))
+        return obj
+
+
+# ----------------------------------------------------------------------
+# User
+
+@benchmark()
+def user_get_project_by_id(fixtures, size):
+    user = fixtures.user(size)
+    ids = fixtures.sample(user.projects, lambda project: project.id)
+    return lambda: user.get_project_by_id(next(ids))
+
+
+@benchmark()
+def user_get_project_by_name(fixtures, size):
+    user = fixtures.user(size)
+    names = fixtures.sample(user.projects, lambda project: project.name)
+    return lambda: user.get_project_by_name(next(names))
+
+
+@benchmark()
+def user_validate_project_name(fixtures, size):
+    user = fixtures.user(size)
+    names = fixtures.sample(user.projects, lambda project: project.name)
+    return lambda: user.validate_project_name(next(names))
+
+
+# ----------------------------------------------------------------------
+# Project
+
+@benchmark()
+def project_get_task_by_id(fixtures, size):
+    project = fixtures.project(size)
+    ids = fixtures.sample(project.tasks, lambda task: task.id)
+    return lambda: project.get_task_by_id(next(ids))
+
+
+@benchmark()
+def project_validate_task_title(fixtures, size):
+    project = fixtures.project(size)
+    titles = fixtures.sample(project.tasks, lambda task: task.title)
+    return lambda: project.validate_task_title(next(titles))
+
+
+@benchmark()
+def project_get_completion_percentage(fixtures, size):
+    return fixtures.project(size).get_completion_percentage
+
+
+@benchmark()
+def project_get_display_name(fixtures, size):
+    return fixtures.project(size).get_display_name
+
+
+# ----------------------------------------------------------------------
+# Task
+
+@benchmark(sized=False)
+def task_get_display_name(fixtures, size):
+    return fixtures.task().get_display_name
+
+
+# ----------------------------------------------------------------------
+# Pickle / unpickle (record của chính object, object con là reference)
+
+@benchmark()
+def pickle_user(fixtures, size):
+    user = fixtures.user(size)
+    return lambda: fixtures.serialize(user)
+
+
+@benchmark()
+def unpickle_user(fixtures, size):
+    from database.models import User
+    data = fixtures.serialize(fixtures.user(size))
+    return lambda: fixtures.deserialize(User, data)
+
+
+@benchmark()
+def pickle_project(fixtures, size):
+    project = fixtures.project(size)
+    return lambda: fixtures.serialize(project)
+
+
+@benchmark()
+def unpickle_project(fixtures, size):
+    from database.models import Project
+    data = fixtures.serialize(fixtures.project(size))
+    return lambda: fixtures.deserialize(Project, data)
+
+
+@benchmark(sized=False)
+def pickle_task(fixtures, size):
+    task = fixtures.task()
+    return lambda: fixtures.serialize(task)
+
+
+@benchmark(sized=False)
+def unpickle_task(fixtures, size):
+    from database.models import Task
+    data = fixtures.serialize(fixtures.task())
+    return lambda: fixtures.deserialize(Task, data)
+
+
+# ----------------------------------------------------------------------
+
+RECORD_SIZES = {
+    'pickle_user': lambda fixtures, size: fixtures.user(size),
+    'pickle_project': lambda fixtures, size: fixtures.project(size),
+    'pickle_task': lambda fixtures, size: fixtures.task(),
+}
+
+
+def measure(function, repeat):
+    """Thời gian mỗi lần gọi (µs): trung vị và min của repeat lần đo.
+
+    spread_pct là độ lệch chuẩn của các lần đo tính theo % của min (0 nếu chỉ đo một lần).
+    """
+    function()  # làm ấm cache
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timings = [total / number * 1e6 for total in timer.repeat(repeat, number)]
+    best = min(timings)
+    spread = statistics.stdev(timings) / best * 100 if len(timings) > 1 and best else 0.0
+    return {'median_us': round(statistics.median(timings), 3), 'min_us': round(best, 3),
+            'spread_pct': round(spread, 1), 'loops': number, 'repeat': repeat}
+
+
+def run_benchmarks(sizes, repeat, pattern=None):
+    results = {}
+    fixtures = Fixtures()
+    try:
+        for name, function, sized in BENCHMARKS:
+            if pattern and pattern not in name:
+                continue
+            for size in (sizes if sized else (None,)):
+                key = f"{name}[{size}]" if sized else name
+                result = measure(function(fixtures, size), repeat)
+                if name in RECORD_SIZES:
+                    result['record_bytes'] = len(fixtures.serialize(RECORD_SIZES[name](fixtures, size)))
+                results[key] = result
+                extra = f"  {result['record_bytes']:>7} bytes" if 'record_bytes' in result else ""
+                print(f"  {key:<42} {result['median_us']:>11.3f}µs  (min {result['min_us']:.3f}µs, "
+                      f"±{result['spread_pct']:.1f}%){extra}")
+    finally:
+        fixtures.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """In thay đổi so với baseline, trả về danh sách benchmark bị chậm hơn ngưỡng.
+
+    So sánh thời gian min (ít nhiễu hơn trung vị khi máy đang bận). Ngưỡng của
+    mỗi benchmark không nhỏ hơn NOISE_FACTOR lần spread của baseline hoặc lần
+    chạy hiện tại.
+    """
+    regressions = []
+    print(f"Compared with baseline ({baseline['meta']['created_at']}):")
+    for key, result in results.items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            continue
+        change = (result['min_us'] / previous['min_us'] - 1) * 100
+        spread = max(previous.get('spread_pct', 0), result['spread_pct'])
+        allowed = max(threshold, NOISE_FACTOR * spread)
+        marker = "❌" if change > allowed else "  "
+        print(f"{marker} {key:<42} {previous['min_us']:>11.3f}µs -> {result['min_us']:>11.3f}µs  "
+              f"{change:+7.1f}% (limit {allowed:.0f}%)")
+        if change > allowed:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the model hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="projects per user / tasks per project (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="measurements per benchmark (default: %(default)s)")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--save', help="write the results as a baseline JSON file")
+    parser.add_argument('--compare', help="compare with a baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="minimum allowed slowdown of the min time in percent, raised to "
+                             f"{NOISE_FACTOR}x the measured spread (default: %(default)s, env MODEL_BENCH_THRESHOLD)")
+    args = parser.parse_args(argv)
+
+    print("⏱️ Model benchmarks (median time per call):")
+    results = run_benchmarks(args.sizes, max(args.repeat, 1), args.filter)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as output:
+            json.dump({'meta': {'created_at': datetime.now().isoformat(timespec='seconds'),
+                                'python': platform.python_version(), 'platform': platform.platform()},
+                       'results': results}, output, indent=2)
+        print(f"📝 Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmarks are slower than the baseline beyond their limit")
+            return 1
+        print("✅ No benchmark is slower than the baseline beyond its limit")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Benchmark thời gian import lúc khởi động client (python -X importtime).
+
+Đo các module mà client cần để dựng MainWindow (mặc định gui.main_window)
+trong một interpreter mới, lấy trung vị của nhiều lần chạy, và thoát với mã 1
+nếu vượt budget hoặc nếu một module nặng (ZODB, ZEO, SQLAlchemy...) bị import
+ngay lúc khởi động thay vì khi dùng lần đầu.
+
+Chạy: python benchmarks/startup_imports.py [--budget-ms 150] [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+DEFAULT_MODULE = 'gui.main_window'
+DEFAULT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', 150))
+
+# Các package chỉ được import khi dùng lần đầu (kết nối, đăng nhập, ghi dữ liệu)
+LAZY_MODULES = ('sqlalchemy', 'ZODB', 'ZEO', 'BTrees', 'persistent', 'transaction', 'flask')
+
+
+def measure(module):
+    """Chạy import trong interpreter mới, trả về list (module, self µs, cumulative µs)"""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.getenv('QT_QPA_PLATFORM', 'offscreen'))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Client startup import-time benchmark")
+    parser.add_argument('--module', default=DEFAULT_MODULE, help="module imported at startup")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum median import time (default: %(default)s, env STARTUP_IMPORT_BUDGET_MS)")
+    parser.add_argument('--runs', type=int, default=5, help="number of fresh interpreters")
+    parser.add_argument('--top', type=int, default=15, help="show the N slowest modules")
+    args = parser.parse_args(argv)
+
+    totals = []
+    entries = []
+    for _ in range(max(args.runs, 1)):
+        entries = measure(args.module)
+        totals.append(next(cumulative for name, _, cumulative in reversed(entries) if name == args.module))
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"📦 import {args.module}: median {median_ms:.1f}ms "
+          f"(min {min(totals) / 1000:.1f}ms, max {max(totals) / 1000:.1f}ms, {len(totals)} runs)")
+
+    print("Slowest modules (self time, last run):")
+    for name, self_us, cumulative_us in sorted(entries, key=lambda entry: -entry[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f}ms  {cumulative_us / 1000:8.1f}ms cumulative  {name}")
+
+    failures = []
+    imported = {name.split('.')[0] for name, _, _ in entries}
+    eager = sorted(package for package in LAZY_MODULES if package in imported)
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+    if median_ms > args.budget_ms:
+        failures.append(f"median {median_ms:.1f}ms is over the {args.budget_ms:.0f}ms budget")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print(f"✅ Within the {args.budget_ms:.0f}ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
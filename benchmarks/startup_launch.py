@@ -0,0 +1,219 @@
+"""Benchmark thời gian khởi động client: từ lúc chạy process tới khi tree dùng được.
+
+Với mỗi kích thước (số task), tạo một FileStorage tạm với user "bench", chạy
+ZEO server trong process này, rồi khởi động client nhiều lần trong process mới
+(Qt offscreen). Client đăng nhập tự động sau show_login_at_startup và thoát
+ngay khi startup_timer.finish() ghi log. Launch-to-interactive được tính từ
+lúc tạo process tới interactive_at trong log, gồm cả khởi động interpreter
+và 100ms chờ của login dialog (các phase khác có trong phase medians).
+
+  cold: mỗi lần chạy dùng một ZEO cache dir mới (client cache trống)
+  warm: mọi lần chạy dùng chung một cache dir đã được nạp trước
+
+Chạy: python benchmarks/startup_launch.py [--sizes 1000 10000 100000] [--runs 10] [--json out.json]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+BENCH_USER = 'bench'
+BENCH_PASSWORD = 'bench'
+TASKS_PER_PROJECT = 100
+SEED_CHUNK = 2000
+CLIENT_TIMEOUT = 600
+
+WORDS = ('report', 'review', 'design', 'deploy', 'invoice', 'meeting', 'backup',
+         'release', 'budget', 'hiring', 'support', 'migration', 'security', 'docs')
+TAGS = ('urgent', 'backend', 'frontend', 'ops', 'client', 'later')
+STATUSES = ('To Do', 'Doing', 'Done')
+
+
+def seed_database(path, task_count):
+    """Tạo FileStorage với user bench và task_count task (TASKS_PER_PROJECT task mỗi project)"""
+    from datetime import date, timedelta
+    import ZODB
+    import transaction
+    from BTrees.OOBTree import OOBTree
+    from BTrees.Length import Length
+    from database.models import User, Project, Task
+    from database.schema import SCHEMA_VERSION, set_schema_version
+
+    db = ZODB.DB(path)
+    connection = db.open()
+    root = connection.root()
+    root['users'] = OOBTree()
+    root['user_count'] = Length(1)
+    set_schema_version(root, SCHEMA_VERSION)
+    user = root['users'][BENCH_USER] = User(BENCH_USER, BENCH_PASSWORD)
+
+    today = date.today()
+    project = None
+    for i in range(task_count):
+        if i % TASKS_PER_PROJECT == 0:
+            project = Project(f"Project {i // TASKS_PER_PROJECT + 1}", "Synthetic benchmark project")
+            user.add_project(project)
+        task = Task(f"{WORDS[i % len(WORDS)]} {WORDS[(i // 7) % len(WORDS)]} #{i}",
+                    description=f"Synthetic task {i} for {WORDS[(i // 3) % len(WORDS)]}",
+                    deadline=today + timedelta(days=i % 60 - 10) if i % 4 else None,
+                    status=STATUSES[i % len(STATUSES)],
+                    tags=(TAGS[i % len(TAGS)],) if i % 2 else ())
+        user.add_task(project, task)
+        if (i + 1) % SEED_CHUNK == 0:
+            transaction.commit()
+            connection.cacheMinimize()
+    transaction.commit()
+    connection.close()
+    db.close()
+
+
+def run_client(address, cache_dir, log_path):
+    """Khởi động một client, trả về (launch-to-interactive ms, record trong startup log)"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', DEBUG='False',
+               ZEO_HOST=address[0], ZEO_PORT=str(address[1]),
+               ZEO_CACHE_DIR=cache_dir, STARTUP_LOG=log_path)
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    launched_at = time.time()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--client'],
+                            cwd=SRC_DIR, env=env, capture_output=True, text=True,
+                            timeout=CLIENT_TIMEOUT)
+    if result.returncode != 0 or not os.path.exists(log_path):
+        raise RuntimeError(f"Client failed (exit code {result.returncode}):\n{result.stdout}{result.stderr}")
+    with open(log_path, encoding='utf-8') as log_file:
+        record = json.loads(log_file.readline())
+    return (record['interactive_at'] - launched_at) * 1000, record
+
+
+def client_main():
+    """Chạy trong process client: giống main.py nhưng tự đăng nhập và thoát"""
+    sys.path.insert(0, SRC_DIR)
+    from utils.startup_timing import startup_timer
+
+    startup_timer.begin('qt_init')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    startup_timer.end('qt_init')
+
+    startup_timer.begin('import_main_window')
+    from gui.main_window import MainWindow
+    startup_timer.end('import_main_window')
+
+    from PyQt5.QtCore import QTimer
+
+    def auto_login(window):
+        if not window.login(BENCH_USER, BENCH_PASSWORD):
+            app.exit(1)
+            return
+        # Để tree vẽ xong trước khi đóng database
+        QTimer.singleShot(0, app.quit)
+
+    # show_login_at_startup gọi show_auth_flow sau 100ms (phase login)
+    MainWindow.show_auth_flow = auto_login
+    MainWindow.on_database_connection_failed = lambda window: app.exit(1)
+
+    startup_timer.begin('window_init')
+    window = MainWindow()
+    window.show()
+    startup_timer.end('window_init')
+    exit_code = app.exec_()
+    window.close()
+    return exit_code
+
+
+def percentile(values, percent):
+    """Percentile theo nearest-rank"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(launch_times, records):
+    phases = {}
+    for record in records:
+        for name, phase in record['phases'].items():
+            phases.setdefault(name, []).append(phase['duration_ms'])
+    return {
+        'runs': len(launch_times),
+        'p50_ms': round(statistics.median(launch_times), 1),
+        'p95_ms': round(percentile(launch_times, 95), 1),
+        'active_p50_ms': round(statistics.median(record['active_ms'] for record in records), 1),
+        'phases_p50_ms': {name: round(statistics.median(values), 1) for name, values in phases.items()},
+    }
+
+
+def benchmark_size(task_count, runs, work_dir):
+    import ZEO
+
+    storage_path = os.path.join(work_dir, f'Data-{task_count}.fs')
+    started = time.perf_counter()
+    seed_database(storage_path, task_count)
+    print(f"🌱 Seeded {task_count} tasks in {time.perf_counter() - started:.1f}s")
+
+    address, stop = ZEO.server(path=storage_path)
+    log_path = os.path.join(work_dir, 'startup.jsonl')
+    results = {}
+    try:
+        cold = []
+        for run in range(runs):
+            cache_dir = os.path.join(work_dir, f'cache-cold-{task_count}-{run}')
+            cold.append(run_client(address, cache_dir, log_path))
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        results['cold'] = summarize(*zip(*cold))
+
+        warm_cache_dir = os.path.join(work_dir, f'cache-warm-{task_count}')
+        run_client(address, warm_cache_dir, log_path)  # nạp cache
+        warm = [run_client(address, warm_cache_dir, log_path) for _ in range(runs)]
+        results['warm'] = summarize(*zip(*warm))
+    finally:
+        stop()
+    return results
+
+
+def print_results(task_count, results):
+    for mode, summary in results.items():
+        print(f"⏱️ {task_count:>7} tasks {mode}: p50 {summary['p50_ms']:.0f}ms, p95 {summary['p95_ms']:.0f}ms "
+              f"(active p50 {summary['active_p50_ms']:.0f}ms, {summary['runs']} runs)")
+        print("   " + ", ".join(f"{name} {duration:.0f}ms"
+                                for name, duration in summary['phases_p50_ms'].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Client launch-to-interactive benchmark")
+    parser.add_argument('--client', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="task counts of the synthetic databases (default: %(default)s)")
+    parser.add_argument('--runs', type=int, default=10, help="launches per size and mode")
+    parser.add_argument('--json', help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.client:
+        return client_main()
+
+    sys.path.insert(0, SRC_DIR)
+    work_dir = tempfile.mkdtemp(prefix='startup_launch_')
+    results = {}
+    try:
+        for task_count in args.sizes:
+            results[task_count] = benchmark_size(task_count, max(args.runs, 1), work_dir)
+            print_results(task_count, results[task_count])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+        print(f"📝 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,8 @@ setup(
     package_dir={'': 'src'},
     install_requires=[
         'PyQt5',  # GUI framework
-        'SQLAlchemy',  # Database ORM
+        'ZODB',  # Object database
+        'ZEO',  # ZODB client/server
         # Add other dependencies as needed
     ],
     entry_points={
@@ -0,0 +1,290 @@
+"""REST gateway cho users/projects/tasks.
+
+Mỗi request mượn một connection từ pool của ZODB.DB (ZODB_POOL_SIZE) với
+transaction manager riêng: đọc trong transaction của request, ghi qua
+database.operations bằng run_in_transaction (retry khi conflict), và
+transaction luôn được abort + trả connection về pool khi request kết thúc.
+
+Chạy: python -m api.app (từ thư mục src)
+"""
+import transaction
+from flask import Flask, g, jsonify, request
+from ZODB.POSException import ConflictError
+from database.connection import db_connection
+from database.models import TASK_STATUSES
+from database import operations
+from config.settings import API_CONFIG, DEBUG
+from utils.helpers import date_to_str, format_date, parse_tags
+
+TASK_FIELDS = ('title', 'description', 'deadline', 'status', 'tags')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def project_to_dict(project):
+    counts = project.get_status_counts()
+    return {
+        'id': project.id,
+        'name': project.name,
+        'description': project.description,
+        'created_at': project.created_at.isoformat(),
+        'task_count': project.get_task_count(),
+        'status_counts': counts,
+    }
+
+
+def task_to_dict(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'deadline': date_to_str(task.deadline),
+        'status': task.status,
+        'tags': list(task.tags),
+        'created_at': task.created_at.isoformat(),
+    }
+
+
+def create_app(db=None):
+    """Tạo Flask app dùng db (mặc định: database của db_connection đã kết nối)"""
+    app = Flask(__name__)
+    database = db or db_connection.db
+
+    @app.before_request
+    def open_connection():
+        g.transaction_manager = transaction.TransactionManager()
+        g.connection = database.open(transaction_manager=g.transaction_manager)
+        g.transaction_manager.begin()
+
+    @app.teardown_request
+    def close_connection(exc):
+        connection = g.pop('connection', None)
+        if connection is not None:
+            # Ghi đã được commit trong run_in_transaction, phần còn lại chỉ là đọc
+            g.transaction_manager.abort()
+            connection.close()
+
+    @app.errorhandler(ApiError)
+    def handle_api_error(error):
+        return jsonify({'error': error.message}), error.status
+
+    @app.errorhandler(ConflictError)
+    def handle_conflict(error):
+        return jsonify({'error': 'Conflicting update, please retry'}), 409
+
+    def get_root():
+        return g.connection.root()
+
+    def write(operation, *args):
+        """Chạy một thao tác ghi trên connection của request, retry khi conflict"""
+        return db_connection.run_in_transaction(
+            lambda root: operation(root, *args), connection=g.connection)
+
+    def current_user():
+        auth = request.authorization
+        user = get_root()['users'].get(auth.username) if auth else None
+        if user is None or not user.check_password(auth.password or ''):
+            raise ApiError(401, 'Invalid username or password')
+        return user
+
+    def get_project(user, project_id):
+        project = user.get_project_by_id(project_id)
+        if project is None:
+            raise ApiError(404, 'Project not found')
+        return project
+
+    def get_task(project, task_id):
+        task = project.get_task_by_id(task_id)
+        if task is None:
+            raise ApiError(404, 'Task not found')
+        return task
+
+    def require_string(value, message):
+        """Giá trị phải là chuỗi không rỗng (số/list... sẽ lỗi khi so với key str trong BTree)"""
+        if not isinstance(value, str) or not value.strip():
+            raise ApiError(400, message)
+        return value
+
+    def read_task_data(defaults):
+        data = request.get_json(silent=True) or {}
+        task_data = {field: data.get(field, defaults[field]) for field in TASK_FIELDS}
+        require_string(task_data['title'], 'Task title is required and must be a string')
+        if task_data['description'] is not None and not isinstance(task_data['description'], str):
+            raise ApiError(400, 'Task description must be a string')
+        # Chỉ null/"" mới xóa deadline; chuỗi sai định dạng không được âm thầm thành None
+        deadline = task_data['deadline']
+        if deadline not in (None, '') and format_date(deadline) is None:
+            raise ApiError(400, 'Deadline must be a date in YYYY-MM-DD format')
+        if task_data['status'] not in TASK_STATUSES:
+            raise ApiError(400, f"Status must be one of {', '.join(TASK_STATUSES)}")
+        if not isinstance(task_data['tags'], list) or not all(isinstance(tag, str) for tag in task_data['tags']):
+            raise ApiError(400, 'Tags must be a list of strings')
+        task_data['tags'] = parse_tags(','.join(task_data['tags']))
+        return task_data
+
+    @app.route('/api/users', methods=['POST'])
+    def register():
+        data = request.get_json(silent=True) or {}
+        message = 'Username and password are required and must be strings'
+        username = require_string(data.get('username'), message)
+        password = require_string(data.get('password'), message)
+        if not write(operations.register_user, username, password):
+            raise ApiError(409, f"Username '{username}' already exists")
+        return jsonify({'username': username}), 201
+
+    @app.route('/api/users/me')
+    def me():
+        user = current_user()
+        return jsonify({
+            'username': user.username,
+            'created_at': user.created_at.isoformat(),
+            'project_count': len(user.projects),
+        })
+
+    @app.route('/api/projects')
+    def list_projects():
+        user = current_user()
+        return jsonify([project_to_dict(project) for project in user.projects])
+
+    @app.route('/api/projects', methods=['POST'])
+    def create_project():
+        user = current_user()
+        data = request.get_json(silent=True) or {}
+        name = require_string(data.get('name'), 'Project name is required and must be a string')
+        description = data.get('description', '')
+        if not isinstance(description, str):
+            raise ApiError(400, 'Project description must be a string')
+        project_id = write(operations.create_project, user.username, name, description)
+        return jsonify({'id': project_id}), 201
+
+    @app.route('/api/projects/<project_id>')
+    def show_project(project_id):
+        return jsonify(project_to_dict(get_project(current_user(), project_id)))
+
+    @app.route('/api/projects/<project_id>', methods=['DELETE'])
+    def delete_project(project_id):
+        user = current_user()
+        project = get_project(user, project_id)
+        if write(operations.delete_project, user.username, operations.project_ref(project)) is None:
+            raise ApiError(404, 'Project not found')
+        return '', 204
+
+    def tasks_page(source):
+        """Một trang task theo query ?status=&order_by=&limit=&cursor="""
+        try:
+            limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            tasks, next_cursor = source.get_tasks_page(
+                status=request.args.get('status'),
+                order_by=request.args.get('order_by', 'created_at'),
+                limit=max(limit, 1),
+                cursor=request.args.get('cursor') or None)
+        except ValueError as e:
+            raise ApiError(400, str(e))
+        return jsonify({'tasks': [task_to_dict(task) for task in tasks], 'next_cursor': next_cursor})
+
+    @app.route('/api/tasks')
+    def list_user_tasks():
+        return tasks_page(current_user())
+
+    @app.route('/api/tasks/due')
+    def list_due_tasks():
+        """Task chưa Done theo deadline: ?range=overdue|today|soon&days=7"""
+        user = current_user()
+        due_range = request.args.get('range', 'soon')
+        if due_range == 'overdue':
+            entries = user.get_overdue_tasks()
+        elif due_range == 'today':
+            entries = user.get_tasks_due_today()
+        elif due_range == 'soon':
+            entries = user.get_tasks_due_soon(request.args.get('days', 7, type=int))
+        else:
+            raise ApiError(400, 'Range must be one of overdue, today, soon')
+        return jsonify([dict(task_to_dict(task), project_id=project.id) for _, project, task in entries])
+
+    @app.route('/api/tasks/search')
+    def search_tasks():
+        """Tìm task theo title/description/tags: ?q=&limit="""
+        user = current_user()
+        query = request.args.get('q', '').strip()
+        if not query:
+            raise ApiError(400, 'Query parameter q is required')
+        limit = max(min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE), 1)
+        return jsonify([dict(task_to_dict(task), project_id=project.id, score=score)
+                        for score, project, task in user.search_tasks(query, limit)])
+
+    @app.route('/api/tags')
+    def list_tags():
+        return jsonify([{'tag': tag, 'task_count': count} for tag, count in current_user().get_tags()])
+
+    @app.route('/api/tags/<tag>/tasks')
+    def list_tagged_tasks(tag):
+        user = current_user()
+        return jsonify([dict(task_to_dict(task), project_id=project.id)
+                        for project, task in user.iter_tagged_tasks(tag)])
+
+    @app.route('/api/projects/<project_id>/tasks')
+    def list_tasks(project_id):
+        return tasks_page(get_project(current_user(), project_id))
+
+    @app.route('/api/projects/<project_id>/tasks', methods=['POST'])
+    def create_task(project_id):
+        user = current_user()
+        project = get_project(user, project_id)
+        task_data = read_task_data({'title': '', 'description': '', 'deadline': '',
+                                    'status': 'To Do', 'tags': []})
+        task_id = write(operations.create_task, user.username, operations.project_ref(project), task_data)
+        if task_id is None:
+            raise ApiError(404, 'Project not found')
+        return jsonify({'id': task_id}), 201
+
+    @app.route('/api/projects/<project_id>/tasks/<task_id>')
+    def show_task(project_id, task_id):
+        project = get_project(current_user(), project_id)
+        return jsonify(task_to_dict(get_task(project, task_id)))
+
+    @app.route('/api/projects/<project_id>/tasks/<task_id>', methods=['PATCH'])
+    def update_task(project_id, task_id):
+        user = current_user()
+        project = get_project(user, project_id)
+        task = get_task(project, task_id)
+        task_data = read_task_data(dict({field: getattr(task, field) for field in TASK_FIELDS},
+                                        tags=list(task.tags)))
+        if not write(operations.update_task, user.username, operations.project_ref(project),
+                     operations.task_ref(task), task_data):
+            raise ApiError(404, 'Task not found')
+        return jsonify(task_to_dict(task))
+
+    @app.route('/api/projects/<project_id>/tasks/<task_id>', methods=['DELETE'])
+    def delete_task(project_id, task_id):
+        user = current_user()
+        project = get_project(user, project_id)
+        task = get_task(project, task_id)
+        if write(operations.delete_task, user.username, operations.project_ref(project),
+                 operations.task_ref(task)) is None:
+            raise ApiError(404, 'Task not found')
+        return '', 204
+
+    return app
+
+
+def main():
+    if not db_connection.open_database():
+        raise SystemExit("Cannot connect to ZEO server")
+    app = create_app()
+    if DEBUG:
+        print(f"🌐 REST gateway listening on {API_CONFIG['host']}:{API_CONFIG['port']}")
+    try:
+        app.run(host=API_CONFIG['host'], port=API_CONFIG['port'], threaded=True)
+    finally:
+        db_connection.close()
+
+
+if __name__ == "__main__":
+    main()
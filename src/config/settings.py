@@ -6,15 +6,55 @@ load_dotenv()
 DATABASE_CONFIG = {
     'host': os.getenv('ZEO_HOST', '127.0.0.1'),
     'port': int(os.getenv('ZEO_PORT', 8090)),
-    'timeout': int(os.getenv('CONNECTION_TIMEOUT', 30))
+    'timeout': int(os.getenv('CONNECTION_TIMEOUT', 30)),
+    # Persistent ZEO client cache trên đĩa (để trống ZEO_CLIENT_NAME để chỉ dùng cache trong RAM)
+    'client_name': os.getenv('ZEO_CLIENT_NAME', 'task_manager'),
+    'cache_dir': os.getenv('ZEO_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.task_manager', 'zeo_cache')),
+    'client_cache_size': int(os.getenv('ZEO_CLIENT_CACHE_SIZE', 100 * 1024 * 1024)),
+    # Object cache của mỗi connection (số object / bytes, 0 = không giới hạn bytes) và số connection trong pool
+    'cache_size': int(os.getenv('ZODB_CACHE_SIZE', 400)),
+    'cache_size_bytes': int(os.getenv('ZODB_CACHE_SIZE_BYTES', 0)),
+    'pool_size': int(os.getenv('ZODB_POOL_SIZE', 7))
 }
 
 NETWORK_CONFIG = {
     'listen_host': os.getenv('LISTEN_HOST', '0.0.0.0'),
     'listen_port': int(os.getenv('LISTEN_PORT', 8090)),
     'auto_refresh_interval': int(os.getenv('AUTO_REFRESH_INTERVAL', 3000)),
+    # 'invalidation': chỉ refresh project bị đổi, 'poll': xóa cache và reload toàn bộ
+    'refresh_mode': os.getenv('REFRESH_MODE', 'invalidation'),
     'retry_attempts': int(os.getenv('RETRY_ATTEMPTS', 3)),
-    'retry_delay': int(os.getenv('RETRY_DELAY', 5))
+    'retry_delay': int(os.getenv('RETRY_DELAY', 5)),
+    # Retry commit khi gặp ConflictError (backoff tính bằng giây, có jitter)
+    'commit_attempts': int(os.getenv('COMMIT_ATTEMPTS', 5)),
+    'commit_backoff': float(os.getenv('COMMIT_BACKOFF', 0.05)),
+    'commit_backoff_max': float(os.getenv('COMMIT_BACKOFF_MAX', 1.0))
+}
+
+# REST gateway (src/api): mỗi request mượn một connection từ pool của ZODB.DB
+API_CONFIG = {
+    'host': os.getenv('API_HOST', '127.0.0.1'),
+    'port': int(os.getenv('API_PORT', 5000))
+}
+
+MIGRATION_CONFIG = {
+    # Số object được migrate trong mỗi transaction
+    'batch_size': int(os.getenv('MIGRATION_BATCH_SIZE', 500)),
+    # Khoảng thời gian (giây) giữa các dòng báo cáo tiến độ
+    'report_interval': float(os.getenv('MIGRATION_REPORT_INTERVAL', 5)),
+    # Số process kiểm tra integrity (0 = số CPU) và số user mỗi lần giao cho worker
+    'validate_workers': int(os.getenv('VALIDATE_WORKERS', 0)),
+    'validate_chunk_size': int(os.getenv('VALIDATE_CHUNK_SIZE', 20))
+}
+
+PROFILING_CONFIG = {
+    # File JSON lines ghi thời gian các phase khởi động mỗi lần mở app (mặc định tắt)
+    'startup_log': os.getenv('STARTUP_LOG', '')
+}
+
+UI_CONFIG = {
+    # Số ngày tới được coi là "sắp đến hạn" trong view Due Soon
+    'due_soon_days': int(os.getenv('DUE_SOON_DAYS', 7))
 }
 
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
@@ -33,7 +73,12 @@ def print_config():
         print("=== CONFIGURATION ===")
         print(f"ZEO Host: {DATABASE_CONFIG['host']}")
         print(f"ZEO Port: {DATABASE_CONFIG['port']}")
+        print(f"ZEO Client Cache: {DATABASE_CONFIG['client_name'] or 'in-memory'} ({DATABASE_CONFIG['cache_dir']})")
+        print(f"Object Cache: {DATABASE_CONFIG['cache_size']} objects, {DATABASE_CONFIG['cache_size_bytes']} bytes, pool {DATABASE_CONFIG['pool_size']}")
         print(f"Listen Host: {NETWORK_CONFIG['listen_host']}")
         print(f"Listen Port: {NETWORK_CONFIG['listen_port']}")
         print(f"Auto Refresh: {NETWORK_CONFIG['auto_refresh_interval']}ms")
+        print(f"Refresh Mode: {NETWORK_CONFIG['refresh_mode']}")
+        print(f"Commit Attempts: {NETWORK_CONFIG['commit_attempts']}")
+        print(f"Migration Batch Size: {MIGRATION_CONFIG['batch_size']}")
         print("====================")
\ No newline at end of file
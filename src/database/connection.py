@@ -1,32 +1,35 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import ZODB
-import ZODB.config
-from persistent import Persistent
-from persistent.mapping import PersistentMapping
-import transaction
+import os
 import time
+import random
+from database.schema import SCHEMA_VERSION, set_schema_version
 from config.settings import DATABASE_CONFIG, NETWORK_CONFIG, DEBUG
 
-DATABASE_URL = "sqlite:///tasks.db" 
-
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-
-def get_session():
-    return Session()
-
-def close_session(session):
-    session.close()
+# ZODB/ZEO/BTrees được import khi dùng lần đầu (thường trên worker thread khi
+# kết nối), để import module này không làm chậm lúc khởi động client
 
 class DatabaseConnection:
     def __init__(self):
         self.db = None
         self.connection = None
         self.root = None
+        self._pending_invalidations = set()
+        self.transaction_stats = {'commits': 0, 'retries': 0, 'conflicts': 0, 'failures': 0}
         
     def connect(self, server_host=None, server_port=None):
-        """Kết nối tới ZEO server với retry logic"""
+        """Kết nối tới ZEO server và mở connection chính trên thread hiện tại"""
+        if not self.open_database(server_host, server_port):
+            return False
+        self.open_connection()
+        return True
+    
+    def open_database(self, server_host=None, server_port=None):
+        """Tạo ZEO client với retry logic và khởi tạo cấu trúc database.
+        
+        Đây là bước chờ mạng (có thể sleep RETRY_DELAY giữa các lần thử) và không
+        đụng tới connection chính, nên có thể chạy trên worker thread.
+        """
+        import ZODB
+        
         host = server_host or DATABASE_CONFIG['host']
         port = server_port or DATABASE_CONFIG['port']
         
@@ -38,16 +41,17 @@ class DatabaseConnection:
                 if DEBUG:
                     print(f"Attempt {attempt + 1}/{retry_attempts}: Connecting to ZEO server at {host}:{port}")
                 
-                import ZEO
-                self.db = ZEO.DB((host, port))
-                self.connection = self.db.open()
-                self.root = self.connection.root()
-            
-                if 'users' not in self.root:
-                    self.root['users'] = PersistentMapping()
-                    transaction.commit()
-                    if DEBUG:
-                        print("Initialized database structure")
+                self.db = ZODB.DB(self._open_client_storage(host, port),
+                                  pool_size=DATABASE_CONFIG['pool_size'],
+                                  cache_size=DATABASE_CONFIG['cache_size'],
+                                  cache_size_bytes=DATABASE_CONFIG['cache_size_bytes'])
+                self._report_client_cache()
+                
+                connection = self.open_worker_connection()
+                try:
+                    self.run_in_transaction(self._init_structure, connection=connection)
+                finally:
+                    connection.close()
                 
                 if DEBUG:
                     print(f"✅ Successfully connected to ZEO server at {host}:{port}")
@@ -66,6 +70,67 @@ class DatabaseConnection:
                     
         return False
     
+    def _open_client_storage(self, host, port):
+        """Tạo ZEO ClientStorage, dùng persistent cache trên đĩa nếu có client name.
+        
+        Khi kết nối, ZEO so sánh last TID của cache với server: chỉ các object bị
+        đổi trong lúc offline bị invalidate, phần còn lại được đọc từ đĩa.
+        """
+        from ZEO.ClientStorage import ClientStorage
+        import zc.lockfile
+        
+        client_name = DATABASE_CONFIG['client_name']
+        cache_size = DATABASE_CONFIG['client_cache_size']
+        
+        if client_name:
+            cache_dir = DATABASE_CONFIG['cache_dir']
+            os.makedirs(cache_dir, exist_ok=True)
+            try:
+                return ClientStorage((host, port), cache_size=cache_size,
+                                     client=client_name, var=cache_dir)
+            except zc.lockfile.LockError:
+                # Cache file đang được process khác (vd. một cửa sổ app khác) dùng
+                if DEBUG:
+                    print(f"⚠️ ZEO cache '{client_name}' is locked, falling back to in-memory cache")
+        
+        return ClientStorage((host, port), cache_size=cache_size)
+    
+    def _report_client_cache(self):
+        """In trạng thái client cache sau khi đã được validate với server"""
+        if not DEBUG:
+            return
+        storage = self.db.storage
+        cache = storage._cache
+        cache_tid = cache.getLastTid()
+        server_tid = storage.lastTransaction()
+        status = "up to date" if cache_tid == server_tid else "stale"
+        print(f"💾 ZEO client cache: {cache.path or 'in-memory'}, {len(cache)} objects, "
+              f"last TID {cache_tid.hex() if cache_tid else None} ({status}, server {server_tid.hex()})")
+    
+    def _init_structure(self, root):
+        from BTrees.OOBTree import OOBTree
+        from BTrees.Length import Length
+        
+        if 'users' not in root:
+            # username -> User; BTree để mỗi lần đăng ký chỉ ghi lại một bucket
+            root['users'] = OOBTree()
+            root['user_count'] = Length()
+            # Database mới đã ở schema hiện tại, không cần migration
+            set_schema_version(root, SCHEMA_VERSION)
+            if DEBUG:
+                print("Initialized database structure")
+    
+    def open_connection(self):
+        """Mở connection chính (dùng bởi GUI thread) từ database đã kết nối"""
+        self.connection = self.db.open()
+        self._install_invalidation_watcher()
+        self.root = self.connection.root()
+    
+    def open_worker_connection(self):
+        """Mở connection riêng với transaction manager riêng, dùng cho một thread khác"""
+        import transaction
+        return self.db.open(transaction_manager=transaction.TransactionManager())
+    
     def reload_connection(self):
         """Reload connection để sync với ZEO server"""
         try:
@@ -80,6 +145,86 @@ class DatabaseConnection:
                 print(f"❌ Reload connection error: {e}")
             return False
     
+    def _install_invalidation_watcher(self):
+        """Ghi lại các OID bị invalidate mỗi khi connection nhận invalidation từ ZEO"""
+        self._pending_invalidations = set()
+        storage = self.connection._storage
+        poll = storage.poll_invalidations
+        
+        def poll_invalidations():
+            invalidated = poll()
+            if invalidated is None:
+                # ZODB không biết object nào đổi (vd. sau reconnect) -> refresh toàn bộ
+                self._pending_invalidations = None
+            elif self._pending_invalidations is not None:
+                self._pending_invalidations.update(invalidated)
+            return invalidated
+        
+        storage.poll_invalidations = poll_invalidations
+    
+    def poll_invalidations(self):
+        """Sync với server và trả về các OID đã thay đổi kể từ lần poll trước.
+        
+        Trả về set rỗng nếu không có gì thay đổi, None nếu cần refresh toàn bộ.
+        Cache của connection được giữ nguyên, chỉ các object bị invalidate bị ghost hóa.
+        """
+        if not self.connection:
+            return None
+        self.connection.sync()
+        changed_oids = self._pending_invalidations
+        self._pending_invalidations = set()
+        if DEBUG and changed_oids:
+            print(f"📨 {len(changed_oids)} objects invalidated by other clients")
+        return changed_oids
+    
+    def run_in_transaction(self, operation, attempts=None, connection=None):
+        """Unit of work: chạy operation(root) rồi commit, retry khi gặp ConflictError.
+        
+        Dựa trên transaction_manager.attempts(): mỗi lần thử bắt đầu transaction
+        mới (sync invalidation, cache vẫn giữ nguyên), lỗi transient thì abort và
+        chạy lại sau một khoảng backoff có jitter. Lần thử cuối ném lỗi ra ngoài.
+        Mặc định dùng connection chính; worker thread truyền connection của nó.
+        """
+        from ZODB.POSException import ConflictError
+        
+        attempts = attempts or NETWORK_CONFIG['commit_attempts']
+        connection = connection or self.connection
+        manager = connection.transaction_manager
+        result = None
+        
+        for number, attempt in enumerate(manager.attempts(attempts)):
+            if number:
+                self.transaction_stats['retries'] += 1
+                self.transaction_stats['conflicts'] += 1
+                delay = self._commit_backoff(number)
+                if DEBUG:
+                    print(f"⚠️ Conflict on attempt {number}/{attempts}, retrying in {delay * 1000:.0f}ms")
+                time.sleep(delay)
+            try:
+                with attempt:
+                    result = operation(connection.root())
+            except ConflictError:
+                # Hết số lần thử
+                self.transaction_stats['conflicts'] += 1
+                self.transaction_stats['failures'] += 1
+                raise
+            except Exception:
+                self.transaction_stats['failures'] += 1
+                raise
+        
+        self.transaction_stats['commits'] += 1
+        return result
+    
+    def _commit_backoff(self, number):
+        """Exponential backoff với full jitter để các client không retry cùng lúc"""
+        base = NETWORK_CONFIG['commit_backoff']
+        limit = NETWORK_CONFIG['commit_backoff_max']
+        return random.uniform(0, min(limit, base * (2 ** (number - 1))))
+    
+    def get_transaction_stats(self):
+        """Số commit/retry/conflict/failure của các unit of work từ lúc connect"""
+        return dict(self.transaction_stats)
+    
     def invalidate_cache(self):
         """Invalidate cache để force reload từ server"""
         try:
@@ -112,13 +257,69 @@ class DatabaseConnection:
         self.reload_connection()
         return self.root
     
+    def get_cache_stats(self):
+        """Thống kê object cache của các connection và ZEO client cache.
+        
+        Object cache miss là số lần load state từ storage (ghost -> object);
+        trong đó hit của client cache được đọc từ đĩa, phần còn lại phải hỏi server.
+        """
+        if not self.db:
+            return {}
+        
+        connections = []
+        
+        def collect(connection):
+            cache = connection._cache
+            loads, stores = connection.getTransferCounts()
+            connections.append({
+                'connection': repr(connection),
+                'non_ghosts': cache.cache_non_ghost_count,
+                'ghosts': len(cache) - cache.cache_non_ghost_count,
+                'estimated_bytes': cache.total_estimated_size,
+                'loads': loads,
+                'stores': stores,
+            })
+        
+        self.db._connectionMap(collect)
+        
+        total_loads = sum(c['loads'] for c in connections)
+        client_cache = self.db.storage._cache
+        adds, added_bytes, evicts, evicted_bytes, hits = client_cache.getStats()
+        
+        return {
+            'pool_size': self.db.getPoolSize(),
+            'cache_size': self.db.getCacheSize(),
+            'cache_size_bytes': self.db.getCacheSizeBytes(),
+            'object_cache': {
+                'non_ghosts': sum(c['non_ghosts'] for c in connections),
+                'ghosts': sum(c['ghosts'] for c in connections),
+                'estimated_bytes': sum(c['estimated_bytes'] for c in connections),
+                'misses': total_loads,
+                'connections': connections,
+            },
+            'client_cache': {
+                'path': client_cache.path,
+                'objects': len(client_cache),
+                'hits': hits,
+                'misses': max(total_loads - hits, 0),
+                'evictions': evicts,
+            },
+        }
+    
     def test_connection(self):
         """Test kết nối và in thông tin debug"""
         if DEBUG:
             try:
                 root = self.get_root()
-                user_count = len(root.get('users', {}))
+                if 'user_count' in root:
+                    user_count = root['user_count']()
+                else:
+                    user_count = len(root.get('users', {}))
                 print(f"📊 Connection test: {user_count} users in database")
+                stats = self.get_cache_stats()
+                print(f"📊 Object cache: {stats['object_cache']['non_ghosts']} loaded, "
+                      f"{stats['object_cache']['ghosts']} ghosts, ~{stats['object_cache']['estimated_bytes']} bytes; "
+                      f"client cache hits/misses: {stats['client_cache']['hits']}/{stats['client_cache']['misses']}")
                 return True
             except Exception as e:
                 print(f"❌ Connection test failed: {e}")
@@ -1,14 +1,355 @@
 from persistent import Persistent
-from persistent.list import PersistentList
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree, OOTreeSet
+from heapq import merge
+from itertools import islice
 import hashlib
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from utils.helpers import format_date, tokenize
+
+TASK_STATUSES = ("To Do", "Doing", "Done")
+TASK_PRIORITIES = ("Low", "Medium", "High")
+TASK_ORDERS = ("created_at", "deadline")
+# Các index task của User (theo tên thuộc tính)
+TASK_INDEXES = ("deadline_index", "text_index", "tag_index")
+# Các index task của Project (theo tên thuộc tính)
+PROJECT_TASK_INDEXES = ("tasks_by_title", "tasks_by_status", "tasks_by_deadline")
+
+# Task không có deadline được xếp sau mọi ngày
+NO_DEADLINE_KEY = "~"
+
+# Index tên là một OOTreeSet phẳng các key (name, id): thêm một tên mới chỉ
+# chèn một key, nên hai client tạo cùng tên mới vẫn được BTree tự resolve
+
+def _add_to_name_index(index, name, object_id):
+    index.add((name, object_id))
+
+def _remove_from_name_index(index, name, object_id):
+    index.discard((name, object_id))
+
+def _name_index_ids(index, name):
+    """Các id có tên name (range scan trên các key (name, id))"""
+    return [object_id for _, object_id in index.keys(min=(name, ''), max=(name, '\uffff'))]
+
+def _deadline_key(deadline):
+    deadline = format_date(deadline)
+    return deadline.isoformat() if deadline else NO_DEADLINE_KEY
+
+def _check_listing_args(status, order_by):
+    if status is not None and status not in TASK_STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    if order_by not in TASK_ORDERS:
+        raise ValueError(f"Unknown order: {order_by}")
+
+def _check_order_key(order_key):
+    timestamp, separator, suffix = order_key.partition(':')
+    if len(timestamp) != 20 or not timestamp.isdigit() or not separator or not suffix:
+        raise ValueError(f"Invalid cursor: {order_key}")
+
+def _decode_cursor(cursor, order_by):
+    """Resume token -> key trong index (order key, hoặc (deadline, order key)).
+    
+    ValueError nếu cursor sai định dạng, để không âm thầm bắt đầu lại từ đầu.
+    """
+    if cursor is None:
+        return None
+    if not isinstance(cursor, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if order_by != 'deadline':
+        _check_order_key(cursor)
+        return cursor
+    deadline, separator, order_key = cursor.partition('|')
+    if not separator or (deadline != NO_DEADLINE_KEY and format_date(deadline) is None):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    _check_order_key(order_key)
+    return deadline, order_key
+
+def _encode_cursor(key):
+    return '|'.join(key) if isinstance(key, tuple) else key
+
+def _after(tree, key):
+    """Các key của BTree/TreeSet lớn hơn key (toàn bộ nếu key là None)"""
+    return tree.keys() if key is None else tree.keys(min=key, excludemin=True)
+
+# ----------------------------------------------------------------------
+# State gọn của Task/Project trên đĩa: tuple theo vị trí thay cho dict, id là
+# 16 byte, status/priority là mã số, thời gian là số micro giây từ _EPOCH.
+# State dict cũ vẫn load được, và được ghi lại dạng gọn ở lần sửa tiếp theo.
+
+COMPACT_STATE_VERSION = 1
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+class _NotCompact(Exception):
+    """Giá trị không biểu diễn được ở dạng gọn (dữ liệu cũ), giữ state dict"""
+
+def _pack_id(object_id, optional=False):
+    if object_id is None and optional:
+        return None
+    if type(object_id) is not str or len(object_id) != 36:
+        raise _NotCompact(object_id)
+    try:
+        packed = bytes.fromhex(object_id.replace('-', ''))
+    except ValueError:
+        raise _NotCompact(object_id)
+    if len(packed) != 16 or _unpack_id(packed) != object_id:
+        raise _NotCompact(object_id)
+    return packed
+
+def _unpack_id(packed):
+    if packed is None:
+        return None
+    digits = packed.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+def _pack_datetime(value, optional=False):
+    if value is None and optional:
+        return None
+    if type(value) is not datetime or value.tzinfo is not None:
+        raise _NotCompact(value)
+    return (value - _EPOCH) // _MICROSECOND
+
+def _unpack_datetime(value):
+    return None if value is None else _EPOCH + value * _MICROSECOND
+
+def _pack_date(value):
+    if value is None:
+        return None
+    if type(value) is not date:
+        raise _NotCompact(value)
+    return value.toordinal()
+
+def _unpack_date(value):
+    return None if value is None else date.fromordinal(value)
+
+def _pack_code(value, choices):
+    if value not in choices:
+        raise _NotCompact(value)
+    return choices.index(value)
+
+def _pack_status_map(mapping):
+    """{status: object} -> tuple theo thứ tự TASK_STATUSES"""
+    if type(mapping) is not dict or len(mapping) != len(TASK_STATUSES):
+        raise _NotCompact(mapping)
+    try:
+        return tuple(mapping[status] for status in TASK_STATUSES)
+    except KeyError:
+        raise _NotCompact(mapping)
+
+def _unpack_status_map(values):
+    return dict(zip(TASK_STATUSES, values))
+
+def _is_compact_state(state):
+    return type(state) is tuple and state[0] == COMPACT_STATE_VERSION
+
+def _page(entries, limit):
+    """Cắt một trang từ iterator (cursor, item): trả về (items, next_cursor)"""
+    # limit 0 sẽ trả về cursor của item đầu tiên mà item đó không nằm trong trang nào
+    if limit < 1:
+        raise ValueError(f"Page limit must be at least 1: {limit}")
+    entries = list(islice(entries, limit + 1))
+    items = [item for _, item in entries[:limit]]
+    next_cursor = entries[limit - 1][0] if len(entries) > limit else None
+    return items, next_cursor
+
+class OrderedCollection(Persistent):
+    """Danh sách object có thứ tự chèn, lưu trong BTree thay cho PersistentList.
+    
+    Mỗi object được lưu dưới một order key tăng dần (thời điểm thêm + id), nên
+    append/remove chỉ ghi lại bucket chứa key đó, và các client thêm object
+    đồng thời được BTree/Length tự resolve conflict trên server.
+    Object phải có thuộc tính `id`.
+    """
+    
+    def __init__(self, items=()):
+        self._items = OOBTree()   # order key -> object
+        self._keys = OOBTree()    # object id -> order key
+        self._length = Length()
+        for item in items:
+            self.append(item)
+    
+    def _next_order_key(self, object_id):
+        timestamp = time.time_ns()
+        if self._items:
+            # Giữ thứ tự tăng dần kể cả khi đồng hồ của client bị lệch
+            last_timestamp = int(self._items.maxKey().split(':', 1)[0])
+            timestamp = max(timestamp, last_timestamp + 1)
+        return f"{timestamp:020d}:{object_id}"
+    
+    def append(self, item):
+        if item.id in self._keys:
+            raise ValueError(f"Object {item.id} already in collection")
+        order_key = self._next_order_key(item.id)
+        self._items[order_key] = item
+        self._keys[item.id] = order_key
+        self._length.change(1)
+    
+    def remove(self, item):
+        order_key = self._keys.get(item.id)
+        if order_key is None or self._items[order_key] is not item:
+            raise ValueError("Object not in collection")
+        del self._keys[item.id]
+        del self._items[order_key]
+        self._length.change(-1)
+    
+    def get(self, object_id, default=None):
+        order_key = self._keys.get(object_id)
+        return self._items[order_key] if order_key is not None else default
+    
+    def get_first(self, object_ids):
+        """Object được thêm sớm nhất trong các id (None nếu không có id nào)"""
+        order_keys = [self._keys[object_id] for object_id in object_ids if object_id in self._keys]
+        return self._items[min(order_keys)] if order_keys else None
+    
+    def sort_ids(self, object_ids):
+        """Các id theo thứ tự thêm vào collection (bỏ qua id không có)"""
+        return sorted((object_id for object_id in object_ids if object_id in self._keys), key=self._keys.get)
+    
+    def check_length(self):
+        """Kiểm tra counter độ dài có khớp với các entry không (dùng cho integrity check)"""
+        return self._length() == len(self._items) == len(self._keys)
+    
+    def get_order_key(self, item):
+        return self._keys.get(item.id)
+    
+    def get_by_order_key(self, order_key):
+        return self._items[order_key]
+    
+    def iter_items(self, after=None):
+        """Các cặp (order key, object) theo thứ tự, bắt đầu sau order key `after`"""
+        if after is None:
+            return iter(self._items.items())
+        return iter(self._items.items(min=after, excludemin=True))
+    
+    def get_change_oids(self):
+        """OID của các object luôn bị ghi lại khi thêm/xóa phần tử"""
+        return (self._p_oid, self._length._p_oid)
+    
+    def index(self, item):
+        for position, candidate in enumerate(self):
+            if candidate is item:
+                return position
+        raise ValueError("Object not in collection")
+    
+    def __len__(self):
+        return self._length()
+    
+    def __iter__(self):
+        return iter(self._items.values())
+    
+    def __contains__(self, item):
+        order_key = self._keys.get(getattr(item, 'id', None))
+        return order_key is not None and self._items[order_key] is item
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return list(islice(self, position.start, position.stop, position.step))
+        if position < 0:
+            position += len(self)
+        for item in islice(self, position, None):
+            return item
+        raise IndexError("collection index out of range")
+
+class TaskTextIndex(Persistent):
+    """Inverted index full-text cho task: (token, task id) -> weight.
+    
+    Mỗi task lưu lại các token đã index, nên khi sửa task chỉ các posting của
+    token thực sự thêm/bớt bị ghi lại; search chỉ đọc posting, không load Task.
+    Posting nằm trong một OOBTree phẳng (không có bucket riêng cho mỗi token),
+    nên hai client cùng thêm một token mới chỉ chèn hai key khác nhau.
+    """
+    
+    # Trọng số theo field chứa token
+    FIELD_WEIGHTS = (("title", 3), ("tags", 2), ("description", 1))
+    
+    def __init__(self):
+        self._postings = OOBTree()   # (token, task id) -> weight
+        self._documents = OOBTree()  # task id -> (project id, ((token, weight), ...))
+    
+    def _task_tokens(self, task):
+        weights = {}
+        for field, weight in self.FIELD_WEIGHTS:
+            value = getattr(task, field, None) or ""
+            text = " ".join(value) if field == "tags" else value
+            for token in set(tokenize(text)):
+                weights[token] = weights.get(token, 0) + weight
+        return weights
+    
+    def index_task(self, project_id, task):
+        """Index (hoặc index lại) task, chỉ ghi các token thay đổi"""
+        new_tokens = self._task_tokens(task)
+        document = self._documents.get(task.id)
+        old_tokens = dict(document[1]) if document else {}
+        
+        for token in old_tokens.keys() - new_tokens.keys():
+            self._remove_posting(token, task.id)
+        for token, weight in new_tokens.items():
+            if old_tokens.get(token) != weight:
+                self._postings[(token, task.id)] = weight
+        
+        new_document = (project_id, tuple(sorted(new_tokens.items())))
+        if document != new_document:
+            self._documents[task.id] = new_document
+    
+    def unindex_task(self, task_id):
+        document = self._documents.get(task_id)
+        if document is None:
+            return
+        for token, _ in document[1]:
+            self._remove_posting(token, task_id)
+        del self._documents[task_id]
+    
+    def _remove_posting(self, token, task_id):
+        self._postings.pop((token, task_id), None)
+    
+    def _match(self, query_token):
+        """{task id: điểm} của các task có token bắt đầu bằng query_token (khớp hẳn được x2)"""
+        scores = {}
+        prefix_range = {'min': (query_token, ""), 'max': (query_token + "\uffff", "")}
+        for (token, task_id), weight in self._postings.items(**prefix_range):
+            score = weight * (2 if token == query_token else 1)
+            if score > scores.get(task_id, 0):
+                scores[task_id] = score
+        return scores
+    
+    def search(self, query, limit=50):
+        """Các (điểm, task id, project id) chứa mọi token của query (theo prefix), điểm giảm dần"""
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+        
+        scores = None
+        for query_token in query_tokens:
+            matches = self._match(query_token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {task_id: score + matches[task_id]
+                          for task_id, score in scores.items() if task_id in matches}
+            if not scores:
+                return []
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, task_id, self._documents[task_id][0]) for task_id, score in ranked]
+    
+    def __len__(self):
+        return len(self._documents)
+    
+    def __contains__(self, task_id):
+        return task_id in self._documents
 
 class User(Persistent):
     def __init__(self, username, password):
         self.username = username
         self.password_hash = self._hash_password(password)
-        self.projects = PersistentList()
+        self.projects = OrderedCollection()
+        self.projects_by_name = OOTreeSet()  # (project name, project id)
+        self.deadline_index = OOBTree()  # (deadline, task id) -> project id, chỉ task chưa Done
+        self.text_index = TaskTextIndex()
+        self.tag_index = OOBTree()  # tag -> OOBTree(task id -> project id)
+        self.tag_counts = OOBTree()  # tag -> Length (số task có tag)
         self.created_at = datetime.now()
     
     def _hash_password(self, password):
@@ -17,19 +358,335 @@ class User(Persistent):
     def check_password(self, password):
         return self.password_hash == self._hash_password(password)
     
+    def has_indexes(self):
+        return isinstance(self.projects, OrderedCollection) and getattr(self, 'projects_by_name', None) is not None
+    
+    def rebuild_project_indexes(self):
+        """Chuyển projects sang OrderedCollection và dựng lại index name (dùng cho dữ liệu cũ)"""
+        if not isinstance(self.projects, OrderedCollection):
+            self.projects = OrderedCollection(self.projects)
+        if hasattr(self, 'projects_by_id'):
+            del self.projects_by_id
+        self.projects_by_name = OOTreeSet()
+        for project in self.projects:
+            _add_to_name_index(self.projects_by_name, project.name, project.id)
+    
+    def add_project(self, project):
+        """Thêm project vào user và cập nhật index"""
+        project.owner_username = self.username
+        self.projects.append(project)
+        if self.has_indexes():
+            _add_to_name_index(self.projects_by_name, project.name, project.id)
+    
+    def remove_project(self, project):
+        if project in self.projects:
+            if self.has_deadline_index() or self.has_text_index() or self.has_tag_index():
+                for task in project.tasks:
+                    self._unindex_task(task)
+            self.projects.remove(project)
+            if self.has_indexes():
+                _remove_from_name_index(self.projects_by_name, project.name, project.id)
+    
+    # ------------------------------------------------------------------
+    # Deadline index: mọi thay đổi task có thể ảnh hưởng deadline đi qua User
+    
+    def has_deadline_index(self):
+        return getattr(self, 'deadline_index', None) is not None
+    
+    def _deadline_entry(self, task):
+        deadline = format_date(task.deadline)
+        if deadline is None or task.status == "Done":
+            return None
+        return (deadline, task.id)
+    
+    def _index_deadline(self, project, task, index=None):
+        entry = self._deadline_entry(task)
+        if entry is not None:
+            (self.deadline_index if index is None else index)[entry] = project.id
+    
+    def _unindex_deadline(self, task):
+        entry = self._deadline_entry(task)
+        if entry is not None and entry in self.deadline_index:
+            del self.deadline_index[entry]
+    
+    def rebuild_deadline_index(self):
+        """Chuyển deadline cũ (chuỗi) sang date và dựng lại deadline index"""
+        self._rebuild_indexes(['deadline_index'])
+    
+    def has_text_index(self):
+        return getattr(self, 'text_index', None) is not None
+    
+    def rebuild_text_index(self):
+        self._rebuild_indexes(['text_index'])
+    
+    # ------------------------------------------------------------------
+    # Tag index: mỗi tag một bucket riêng, sửa tag chỉ ghi bucket của tag đó
+    
+    def has_tag_index(self):
+        return getattr(self, 'tag_index', None) is not None
+    
+    def _add_tag(self, project, task, tag, tag_index=None, tag_counts=None):
+        tag_index = self.tag_index if tag_index is None else tag_index
+        tag_counts = self.tag_counts if tag_counts is None else tag_counts
+        tasks = tag_index.get(tag)
+        if tasks is None:
+            tasks = tag_index[tag] = OOBTree()
+            tag_counts[tag] = Length()
+        if task.id not in tasks:
+            tasks[task.id] = project.id
+            tag_counts[tag].change(1)
+    
+    def _remove_tag(self, task, tag):
+        tasks = self.tag_index.get(tag)
+        if tasks is None or task.id not in tasks:
+            return
+        del tasks[task.id]
+        self.tag_counts[tag].change(-1)
+        if not tasks:
+            del self.tag_index[tag]
+            del self.tag_counts[tag]
+    
+    def rebuild_tag_index(self):
+        """Chuyển tags cũ (list) sang OOTreeSet và dựng lại tag index"""
+        self._rebuild_indexes(['tag_index'])
+    
+    # ------------------------------------------------------------------
+    # Dựng index theo batch (migration): index mới được điền dần qua nhiều
+    # transaction và chỉ gắn vào user khi đã đầy đủ
+    
+    def get_missing_indexes(self):
+        return [name for name in TASK_INDEXES if getattr(self, name, None) is None]
+    
+    @staticmethod
+    def create_indexes(names):
+        """Các index rỗng theo tên (tag_index đi kèm tag_counts)"""
+        indexes = {}
+        for name in names:
+            if name == 'text_index':
+                indexes[name] = TaskTextIndex()
+            else:
+                indexes[name] = OOBTree()
+            if name == 'tag_index':
+                indexes['tag_counts'] = OOBTree()
+        return indexes
+    
+    def index_tasks(self, project, tasks, indexes):
+        """Chuyển dữ liệu cũ của tasks (deadline chuỗi, tags list) rồi thêm vào indexes"""
+        for task in tasks:
+            if task.deadline is not None and not isinstance(task.deadline, date):
+                project.set_task_deadline(task, task.deadline)
+            if not isinstance(getattr(task, 'tags', None), OOTreeSet):
+                task.tags = OOTreeSet(getattr(task, 'tags', None) or ())
+            if 'deadline_index' in indexes:
+                self._index_deadline(project, task, indexes['deadline_index'])
+            if 'text_index' in indexes:
+                indexes['text_index'].index_task(project.id, task)
+            if 'tag_index' in indexes:
+                for tag in task.tags:
+                    self._add_tag(project, task, tag, indexes['tag_index'], indexes['tag_counts'])
+    
+    def install_indexes(self, indexes):
+        for name, index in indexes.items():
+            setattr(self, name, index)
+    
+    def _rebuild_indexes(self, names):
+        indexes = self.create_indexes(names)
+        for project in self.projects:
+            self.index_tasks(project, project.tasks, indexes)
+        self.install_indexes(indexes)
+    
+    def set_task_tags(self, project, task, tags):
+        """Đặt tags cho task, chỉ thêm/xóa các tag thực sự thay đổi"""
+        new_tags = {tag for tag in tags if tag}
+        if not isinstance(getattr(task, 'tags', None), OOTreeSet):
+            task.tags = OOTreeSet(getattr(task, 'tags', None) or ())
+        old_tags = set(task.tags)
+        if new_tags == old_tags:
+            return
+        
+        for tag in old_tags - new_tags:
+            task.tags.remove(tag)
+            if self.has_tag_index():
+                self._remove_tag(task, tag)
+        for tag in new_tags - old_tags:
+            task.tags.add(tag)
+            if self.has_tag_index():
+                self._add_tag(project, task, tag)
+        if self.has_text_index():
+            self.text_index.index_task(project.id, task)
+    
+    def get_tags(self):
+        """Các (tag, số task) theo thứ tự tag, không load Task nào"""
+        if not self.has_tag_index():
+            return []
+        return [(tag, counter()) for tag, counter in self.tag_counts.items()]
+    
+    def get_tag_count(self, tag):
+        counter = self.tag_counts.get(tag) if self.has_tag_index() else None
+        return counter() if counter is not None else 0
+    
+    def iter_tagged_tasks(self, tag):
+        """Các (project, task) có tag, chỉ load các task đó"""
+        if not self.has_tag_index():
+            return
+        for task_id, project_id in self.tag_index.get(tag, {}).items():
+            project = self.get_project_by_id(project_id)
+            task = project.get_task_by_id(task_id) if project else None
+            if task is not None:
+                yield project, task
+    
+    def get_tag_change_oids(self, tag):
+        """OID bị ghi lại khi task được thêm/bớt tag (dùng cho invalidation refresh)"""
+        oids = [self.tag_counts._p_oid]
+        counter = self.tag_counts.get(tag)
+        if counter is not None:
+            oids.append(counter._p_oid)
+        return oids
+    
+    def _unindex_task(self, task):
+        if self.has_deadline_index():
+            self._unindex_deadline(task)
+        if self.has_text_index():
+            self.text_index.unindex_task(task.id)
+        if self.has_tag_index():
+            for tag in getattr(task, 'tags', None) or ():
+                self._remove_tag(task, tag)
+    
+    def add_task(self, project, task):
+        project.add_task(task)
+        if self.has_deadline_index():
+            self._index_deadline(project, task)
+        if self.has_text_index():
+            self.text_index.index_task(project.id, task)
+        if self.has_tag_index():
+            for tag in task.tags:
+                self._add_tag(project, task, tag)
+    
+    def remove_task(self, project, task):
+        self._unindex_task(task)
+        project.remove_task(task)
+    
+    def set_task_title(self, project, task, title):
+        project.set_task_title(task, title)
+        if self.has_text_index():
+            self.text_index.index_task(project.id, task)
+    
+    def set_task_description(self, project, task, description):
+        if task.description != description:
+            task.description = description
+            if self.has_text_index():
+                self.text_index.index_task(project.id, task)
+    
+    def set_task_status(self, project, task, status):
+        if self.has_deadline_index():
+            self._unindex_deadline(task)
+        project.set_task_status(task, status)
+        if self.has_deadline_index():
+            self._index_deadline(project, task)
+    
+    def set_task_deadline(self, project, task, deadline):
+        if self.has_deadline_index():
+            self._unindex_deadline(task)
+        project.set_task_deadline(task, deadline)
+        if self.has_deadline_index():
+            self._index_deadline(project, task)
+    
+    def iter_tasks_due(self, start=None, end=None):
+        """Các (deadline, project, task) chưa Done có start <= deadline < end, theo deadline.
+        
+        Chỉ đọc phần index trong khoảng (O(log n) để định vị), task ngoài khoảng không bị load.
+        """
+        if not self.has_deadline_index():
+            # User cũ chưa có index -> duyệt toàn bộ task (load mọi task)
+            entries = sorted((self._deadline_entry(task), project, task)
+                             for project in self.projects for task in project.tasks
+                             if self._deadline_entry(task) is not None)
+            for (deadline, _), project, task in entries:
+                if (start is None or deadline >= start) and (end is None or deadline < end):
+                    yield deadline, project, task
+            return
+        
+        bounds = {}
+        if start is not None:
+            bounds['min'] = (start,)
+        if end is not None:
+            bounds.update(max=(end,), excludemax=True)
+        for (deadline, task_id), project_id in self.deadline_index.items(**bounds):
+            project = self.get_project_by_id(project_id)
+            task = project.get_task_by_id(task_id) if project else None
+            if task is not None:
+                yield deadline, project, task
+    
+    def get_overdue_tasks(self, today=None):
+        return list(self.iter_tasks_due(end=today or date.today()))
+    
+    def get_tasks_due_today(self, today=None):
+        today = today or date.today()
+        return list(self.iter_tasks_due(today, today + timedelta(days=1)))
+    
+    def search_tasks(self, query, limit=50):
+        """Tìm task theo title/description/tags (prefix-aware, xếp hạng theo điểm).
+        
+        Trả về list (điểm, project, task); chỉ các task trong kết quả bị load.
+        """
+        if not self.has_text_index():
+            return []
+        results = []
+        for score, task_id, project_id in self.text_index.search(query, limit):
+            project = self.get_project_by_id(project_id)
+            task = project.get_task_by_id(task_id) if project else None
+            if task is not None:
+                results.append((score, project, task))
+        return results
+    
+    def get_tasks_due_soon(self, days=7, today=None):
+        """Task đến hạn từ ngày mai tới hết `days` ngày tới"""
+        today = today or date.today()
+        return list(self.iter_tasks_due(today + timedelta(days=1), today + timedelta(days=days + 1)))
+    
     def get_project_by_id(self, project_id):
+        if self.has_indexes():
+            if not isinstance(project_id, str):
+                return None
+            return self.projects.get(project_id)
         for project in self.projects:
             if hasattr(project, 'id') and project.id == project_id:
                 return project
         return None
     
     def get_project_by_name(self, name):
+        if self.has_indexes():
+            ids = _name_index_ids(self.projects_by_name, name)
+            # Trùng tên: lấy project được tạo trước, như khi duyệt danh sách
+            return self.projects.get_first(ids) if ids else None
         for project in self.projects:
             if project.name == name:
                 return project
         return None
     
+    def iter_task_entries(self, status=None, order_by="created_at", cursor=None):
+        """Các cặp (cursor, task) của mọi project, gộp theo thứ tự của từng project.
+        
+        Mỗi project được duyệt lazy từ index của nó nên bộ nhớ không phụ thuộc
+        số task; cursor có thể dùng lại để tiếp tục từ sau task đó.
+        """
+        _check_listing_args(status, order_by)
+        _decode_cursor(cursor, order_by)
+        return merge(*(project.iter_task_entries(status, order_by, cursor) for project in self.projects),
+                     key=lambda entry: _decode_cursor(entry[0], order_by))
+    
+    def iter_tasks(self, status=None, order_by="created_at", cursor=None):
+        for _, task in self.iter_task_entries(status, order_by, cursor):
+            yield task
+    
+    def get_tasks_page(self, status=None, order_by="created_at", limit=50, cursor=None):
+        """Một trang task của mọi project: (tasks, next_cursor), next_cursor là None khi hết"""
+        return _page(self.iter_task_entries(status, order_by, cursor), limit)
+    
     def validate_project_name(self, name, exclude_id=None):
+        if self.has_indexes():
+            ids = _name_index_ids(self.projects_by_name, name)
+            return all(project_id == exclude_id for project_id in ids) if exclude_id is not None else not ids
         for project in self.projects:
             if project.name == name:
                 if exclude_id is None or (hasattr(project, 'id') and project.id != exclude_id):
@@ -42,59 +699,329 @@ class Project(Persistent):
             self.id = str(uuid.uuid4())
         self.name = name
         self.description = description
-        self.tasks = PersistentList()
+        self.tasks = OrderedCollection()
+        self.tasks_by_title = OOTreeSet()  # (task title, task id)
+        self.tasks_by_status = OOTreeSet()  # (status, order key)
+        self.tasks_by_deadline = OOTreeSet()  # (deadline, order key)
+        self.status_counts = self._new_status_counts()
         self.created_at = datetime.now()
         
         self.owner_username = None
         self.is_archived = False
         self.color = "#3498db"  
+    
+    def __getstate__(self):
+        state = super().__getstate__()
+        try:
+            return (COMPACT_STATE_VERSION,
+                    _pack_id(state.pop('id')),
+                    state.pop('name'),
+                    state.pop('description'),
+                    _pack_datetime(state.pop('created_at')),
+                    state.pop('owner_username'),
+                    state.pop('is_archived'),
+                    state.pop('color'),
+                    state.pop('tasks'),
+                    state.pop('tasks_by_title'),
+                    state.pop('tasks_by_status'),
+                    state.pop('tasks_by_deadline'),
+                    _pack_status_map(state.pop('status_counts')),
+                    state or None)
+        except (KeyError, _NotCompact):
+            # Project cũ (thiếu ID/index...): giữ nguyên dạng dict
+            return super().__getstate__()
+    
+    def __setstate__(self, state):
+        if _is_compact_state(state):
+            (_, project_id, name, description, created_at, owner_username, is_archived, color,
+             tasks, tasks_by_title, tasks_by_status, tasks_by_deadline, status_counts, extra) = state
+            state = dict(extra or (),
+                         id=_unpack_id(project_id),
+                         name=name,
+                         description=description,
+                         created_at=_unpack_datetime(created_at),
+                         owner_username=owner_username,
+                         is_archived=is_archived,
+                         color=color,
+                         tasks=tasks,
+                         tasks_by_title=tasks_by_title,
+                         tasks_by_status=tasks_by_status,
+                         tasks_by_deadline=tasks_by_deadline,
+                         status_counts=_unpack_status_map(status_counts))
+        super().__setstate__(state)
+    
+    def _new_status_counts(self):
+        # Mỗi status một Length riêng: đổi counter không ghi lại Project và tự resolve conflict
+        return {status: Length() for status in TASK_STATUSES}
+    
+    def _index_task_listing(self, task):
+        self._add_listing_keys(self.tasks.get_order_key(task), task,
+                               self.tasks_by_status, self.tasks_by_deadline)
+    
+    @staticmethod
+    def _add_listing_keys(order_key, task, tasks_by_status, tasks_by_deadline):
+        # Một set phẳng cho mọi status: đổi status của các task khác nhau chỉ
+        # thêm/xóa các key khác nhau, nên hai client không conflict
+        if task.status in TASK_STATUSES:
+            tasks_by_status.add((task.status, order_key))
+        tasks_by_deadline.add((_deadline_key(task.deadline), order_key))
+    
+    def _unindex_task_listing(self, task):
+        order_key = self.tasks.get_order_key(task)
+        if task.status in TASK_STATUSES:
+            self.tasks_by_status.discard((task.status, order_key))
+        self.tasks_by_deadline.discard((_deadline_key(task.deadline), order_key))
+    
+    def iter_status_order_keys(self, status, after=None):
+        """Order key của các task có status (đọc từ index), bắt đầu sau order key `after`"""
+        bounds = {'min': (status, ''), 'max': (status, '\uffff')}
+        if after is not None:
+            bounds.update(min=(status, after), excludemin=True)
+        for _, order_key in self.tasks_by_status.keys(**bounds):
+            yield order_key
+    
+    def _change_status_count(self, status, delta):
+        counts = getattr(self, 'status_counts', None)
+        if counts is not None and status in counts:
+            counts[status].change(delta)
+        
+    def has_indexes(self):
+        return (isinstance(self.tasks, OrderedCollection)
+                and getattr(self, 'tasks_by_title', None) is not None
+                and getattr(self, 'tasks_by_deadline', None) is not None)
+    
+    def rebuild_task_indexes(self):
+        """Chuyển tasks sang OrderedCollection và dựng lại các index (dùng cho dữ liệu cũ)"""
+        tasks = self.tasks if isinstance(self.tasks, OrderedCollection) else OrderedCollection(self.tasks)
+        indexes = self.create_task_indexes(PROJECT_TASK_INDEXES)
+        self.index_tasks(tasks.iter_items(), indexes)
+        self.install_task_indexes(indexes, tasks)
+    
+    # ------------------------------------------------------------------
+    # Dựng index theo batch (migration): như User, index mới được điền dần
+    # qua nhiều transaction và chỉ gắn vào project khi đã đầy đủ
+    
+    def get_missing_indexes(self):
+        missing = [] if self.has_indexes() else list(PROJECT_TASK_INDEXES)
+        if getattr(self, 'status_counts', None) is None:
+            missing.append('status_counts')
+        return missing
+    
+    def create_task_indexes(self, names):
+        """Các index rỗng theo tên (status_counts là các counter mới)"""
+        return {name: self._new_status_counts() if name == 'status_counts' else OOTreeSet()
+                for name in names}
+    
+    def index_tasks(self, entries, indexes):
+        """Thêm các cặp (order key, task) vào indexes"""
+        for order_key, task in entries:
+            if 'tasks_by_title' in indexes:
+                _add_to_name_index(indexes['tasks_by_title'], task.title, task.id)
+            if 'tasks_by_status' in indexes:
+                self._add_listing_keys(order_key, task, indexes['tasks_by_status'], indexes['tasks_by_deadline'])
+            if 'status_counts' in indexes and task.status in indexes['status_counts']:
+                indexes['status_counts'][task.status].change(1)
+    
+    def install_task_indexes(self, indexes, tasks=None):
+        """Gắn các index đã dựng xong (và collection mới khi chuyển từ PersistentList)"""
+        if tasks is not None and tasks is not self.tasks:
+            self.tasks = tasks
+        if hasattr(self, 'tasks_by_id'):
+            del self.tasks_by_id
+        for name, index in indexes.items():
+            setattr(self, name, index)
+        
+    def add_task(self, task):
+        """Thêm task vào project và cập nhật counter, index"""
+        task.project_id = getattr(self, 'id', None)
+        self.tasks.append(task)
+        self._change_status_count(task.status, 1)
+        if self.has_indexes():
+            _add_to_name_index(self.tasks_by_title, task.title, task.id)
+            self._index_task_listing(task)
         
     def get_task_by_id(self, task_id):
+        if self.has_indexes():
+            if not isinstance(task_id, str):
+                return None
+            return self.tasks.get(task_id)
         for task in self.tasks:
             if hasattr(task, 'id') and task.id == task_id:
                 return task
         return None
         
     def get_task_by_title(self, title):
+        if self.has_indexes():
+            ids = _name_index_ids(self.tasks_by_title, title)
+            # Trùng title: lấy task được thêm trước, như khi duyệt danh sách
+            return self.tasks.get_first(ids) if ids else None
         for task in self.tasks:
             if task.title == title:
                 return task
         return None
     
     def get_all_tasks_by_title(self, title):
+        if self.has_indexes():
+            return [self.tasks.get(task_id) for task_id in self.tasks.sort_ids(_name_index_ids(self.tasks_by_title, title))]
         return [task for task in self.tasks if task.title == title]
         
     def remove_task(self, task):
         if task in self.tasks:
+            if self.has_indexes():
+                _remove_from_name_index(self.tasks_by_title, task.title, task.id)
+                self._unindex_task_listing(task)
             self.tasks.remove(task)
+            self._change_status_count(task.status, -1)
+    
+    def set_task_title(self, task, title):
+        """Đổi title của task và cập nhật index"""
+        if task.title != title:
+            if self.has_indexes():
+                _remove_from_name_index(self.tasks_by_title, task.title, task.id)
+                _add_to_name_index(self.tasks_by_title, title, task.id)
+            task.title = title
+    
+    def set_task_status(self, task, status):
+        """Đổi status của task và cập nhật counter"""
+        if task.status != status:
+            self._change_status_count(task.status, -1)
+            self._change_status_count(status, 1)
+            if self.has_indexes():
+                self._unindex_task_listing(task)
+                task.status = status
+                self._index_task_listing(task)
+            else:
+                task.status = status
+    
+    def set_task_deadline(self, task, deadline):
+        """Đổi deadline của task (lưu dạng date) và cập nhật index"""
+        deadline = format_date(deadline)
+        if task.deadline != deadline:
+            if self.has_indexes():
+                self._unindex_task_listing(task)
+                task.deadline = deadline
+                self._index_task_listing(task)
+            else:
+                task.deadline = deadline
     
     def validate_task_title(self, title, exclude_id=None):
+        if self.has_indexes():
+            ids = _name_index_ids(self.tasks_by_title, title)
+            return all(task_id == exclude_id for task_id in ids) if exclude_id is not None else not ids
         for task in self.tasks:
             if task.title == title:
                 if exclude_id is None or (hasattr(task, 'id') and task.id != exclude_id):
                     return False
         return True
     
+    def get_task_count(self):
+        return len(self.tasks)
+    
+    def _task_order_key(self, task):
+        if isinstance(self.tasks, OrderedCollection):
+            return self.tasks.get_order_key(task)
+        # PersistentList cũ: dựng key cùng định dạng từ created_at. Task chưa
+        # migrate có thể chưa có id -> dùng OID (duy nhất và không đổi), rồi title
+        created_at = getattr(task, 'created_at', None)
+        timestamp = int(created_at.timestamp() * 1e9) if created_at else 0
+        suffix = getattr(task, 'id', None) or (task._p_oid.hex() if task._p_oid else task.title)
+        return f"{timestamp:020d}:{suffix}"
+    
+    def iter_task_entries(self, status=None, order_by="created_at", cursor=None):
+        """Các cặp (cursor, task) theo created_at hoặc deadline, lọc theo status.
+        
+        Đọc từ index nên chỉ các task thực sự được yield mới bị load; cursor là
+        resume token (str) để tiếp tục ngay sau task tương ứng.
+        """
+        _check_listing_args(status, order_by)
+        after = _decode_cursor(cursor, order_by)
+        
+        if not self.has_indexes():
+            # Project cũ chưa có index -> lọc và sắp xếp trực tiếp (load toàn bộ task)
+            entries = []
+            for task in self.tasks:
+                if status is None or task.status == status:
+                    order_key = self._task_order_key(task)
+                    key = (_deadline_key(task.deadline), order_key) if order_by == "deadline" else order_key
+                    if after is None or key > after:
+                        entries.append((key, task))
+            entries.sort(key=lambda entry: entry[0])
+            for key, task in entries:
+                yield _encode_cursor(key), task
+            return
+        
+        if order_by == "created_at":
+            if status is None:
+                yield from self.tasks.iter_items(after)
+            else:
+                for order_key in self.iter_status_order_keys(status, after):
+                    yield order_key, self.tasks.get_by_order_key(order_key)
+            return
+        
+        for key in _after(self.tasks_by_deadline, after):
+            if status is None or (status, key[1]) in self.tasks_by_status:
+                yield _encode_cursor(key), self.tasks.get_by_order_key(key[1])
+    
+    def iter_tasks(self, status=None, order_by="created_at", cursor=None):
+        """Duyệt task lazy (generator), xem iter_task_entries"""
+        for _, task in self.iter_task_entries(status, order_by, cursor):
+            yield task
+    
+    def get_tasks_page(self, status=None, order_by="created_at", limit=50, cursor=None):
+        """Một trang task: (tasks, next_cursor), next_cursor là None khi hết"""
+        return _page(self.iter_task_entries(status, order_by, cursor), limit)
+    
+    def _scan_status_counts(self):
+        counts = dict.fromkeys(TASK_STATUSES, 0)
+        for task in self.tasks:
+            if task.status in counts:
+                counts[task.status] += 1
+        return counts
+    
+    def get_status_counts(self):
+        """Số task theo status, đọc từ counter (không load Task nào)"""
+        counts = getattr(self, 'status_counts', None)
+        if counts is None:
+            # Project cũ chưa có counter -> đếm trực tiếp
+            return self._scan_status_counts()
+        return {status: counts[status]() for status in TASK_STATUSES}
+    
+    def check_status_counts(self):
+        """Kiểm tra counter có khớp với danh sách task không"""
+        if getattr(self, 'status_counts', None) is None:
+            return False
+        return self.get_status_counts() == self._scan_status_counts()
+    
+    def rebuild_status_counts(self):
+        """Đếm lại toàn bộ task và ghi đè counter"""
+        counts = self._scan_status_counts()
+        if getattr(self, 'status_counts', None) is None:
+            self.status_counts = self._new_status_counts()
+        for status, count in counts.items():
+            if self.status_counts[status]() != count:
+                self.status_counts[status].set(count)
+    
     def is_fully_completed(self):
-        if not self.tasks:
+        total_tasks = self.get_task_count()
+        if not total_tasks:
             return False 
         
-        return all(task.status == "Done" for task in self.tasks)
+        return self.get_status_counts()["Done"] == total_tasks
     
     def get_completion_percentage(self):
         """Lấy phần trăm hoàn thành"""
-        if not self.tasks:
+        total_tasks = self.get_task_count()
+        if not total_tasks:
             return 0
         
-        completed_count = sum(1 for task in self.tasks if task.status == "Done")
-        return (completed_count / len(self.tasks)) * 100
+        return (self.get_status_counts()["Done"] / total_tasks) * 100
     
     def get_display_name(self):
         """Lấy tên hiển thị với thống kê"""
-        total_tasks = len(self.tasks)
-        completed_tasks = sum(1 for task in self.tasks if task.status == "Done")
+        total_tasks = self.get_task_count()
+        completed_tasks = self.get_status_counts()["Done"]
         
-        if self.is_fully_completed():
+        if total_tasks > 0 and completed_tasks == total_tasks:
             return f"✅ {self.name} ({completed_tasks}/{total_tasks})"
         else:
             return f"{self.name} ({completed_tasks}/{total_tasks})"
@@ -105,19 +1032,57 @@ class Project(Persistent):
         return f"{self.name} [{short_id}]"
 
 class Task(Persistent):
-    def __init__(self, title, description="", deadline="", status="To Do"):
+    def __init__(self, title, description="", deadline="", status="To Do", tags=()):
         if not hasattr(self, 'id'):
             self.id = str(uuid.uuid4())
             
         self.title = title
         self.description = description
-        self.deadline = deadline
+        self.deadline = format_date(deadline)  # date hoặc None
         self.status = status
         self.created_at = datetime.now()
         self.completed_at = None
         self.project_id = None
         self.priority = "Medium"
-        self.tags = []
+        self.tags = OOTreeSet(tags)
+    
+    def __getstate__(self):
+        state = super().__getstate__()
+        try:
+            return (COMPACT_STATE_VERSION,
+                    _pack_id(state.pop('id')),
+                    state.pop('title'),
+                    state.pop('description'),
+                    _pack_date(state.pop('deadline')),
+                    _pack_code(state.pop('status'), TASK_STATUSES),
+                    _pack_datetime(state.pop('created_at')),
+                    _pack_datetime(state.pop('completed_at'), optional=True),
+                    # Task không có tham chiếu tới project, nên vẫn phải lưu project_id
+                    _pack_id(state.pop('project_id'), optional=True),
+                    _pack_code(state.pop('priority'), TASK_PRIORITIES),
+                    state.pop('tags'),
+                    state or None)
+        except (KeyError, _NotCompact):
+            # Task cũ (thiếu ID, deadline dạng string...): giữ nguyên dạng dict
+            return super().__getstate__()
+    
+    def __setstate__(self, state):
+        if _is_compact_state(state):
+            (_, task_id, title, description, deadline, status, created_at, completed_at,
+             project_id, priority, tags, extra) = state
+            # Status/priority lấy từ tuple hằng: mọi task dùng chung một string
+            state = dict(extra or (),
+                         id=_unpack_id(task_id),
+                         title=title,
+                         description=description,
+                         deadline=_unpack_date(deadline),
+                         status=TASK_STATUSES[status],
+                         created_at=_unpack_datetime(created_at),
+                         completed_at=_unpack_datetime(completed_at),
+                         project_id=_unpack_id(project_id),
+                         priority=TASK_PRIORITIES[priority],
+                         tags=tags)
+        super().__setstate__(state)
         
     def mark_completed(self):
         self.status = "Done"
@@ -0,0 +1,102 @@
+"""Các thao tác ghi, mỗi hàm chạy trong một unit of work: operation(root, ...).
+
+Chỉ nhận và trả về giá trị thuần (str, dict, datetime...) để có thể chạy trên
+connection của DatabaseWorker mà không có persistent object nào đi qua lại
+giữa các thread.
+"""
+from database.models import User, Project, Task
+
+
+def project_ref(project):
+    """Thông tin nhận diện project (ID, hoặc name với dữ liệu legacy)"""
+    return {'id': getattr(project, 'id', None), 'name': project.name}
+
+
+def task_ref(task):
+    """Thông tin nhận diện task (ID, hoặc title + created_at với dữ liệu legacy)"""
+    return {'id': getattr(task, 'id', None), 'title': task.title, 'created_at': task.created_at}
+
+
+def _find_project(user, ref):
+    if ref['id'] is not None:
+        return user.get_project_by_id(ref['id'])
+    return user.get_project_by_name(ref['name'])
+
+
+def _find_task(project, ref):
+    if ref['id'] is not None:
+        return project.get_task_by_id(ref['id'])
+    for task in project.get_all_tasks_by_title(ref['title']):
+        if ref['created_at'] is None or task.created_at == ref['created_at']:
+            return task
+    return None
+
+
+def _apply_task_data(user, project, task, task_data):
+    user.set_task_title(project, task, task_data['title'])
+    user.set_task_description(project, task, task_data['description'])
+    user.set_task_status(project, task, task_data['status'])
+    user.set_task_deadline(project, task, task_data['deadline'])
+    if 'tags' in task_data:
+        user.set_task_tags(project, task, task_data['tags'])
+
+
+def register_user(root, username, password):
+    """Tạo user mới, trả về False nếu username đã tồn tại"""
+    if username in root['users']:
+        return False
+    root['users'][username] = User(username, password)
+    if 'user_count' in root:
+        root['user_count'].change(1)
+    return True
+
+
+def create_project(root, username, name, description):
+    """Tạo project, trả về ID của project mới"""
+    project = Project(name, description)
+    root['users'][username].add_project(project)
+    return project.id
+
+
+def create_task(root, username, project, task_data):
+    """Thêm task vào project, trả về ID task mới (None nếu project không còn)"""
+    user = root['users'][username]
+    current_project = _find_project(user, project)
+    if current_project is None:
+        return None
+    task = Task(task_data['title'], task_data['description'],
+                task_data['deadline'], task_data['status'], task_data.get('tags', ()))
+    user.add_task(current_project, task)
+    return task.id
+
+
+def update_task(root, username, project, task, task_data):
+    """Cập nhật task, trả về False nếu project/task không còn"""
+    user = root['users'][username]
+    current_project = _find_project(user, project)
+    current_task = _find_task(current_project, task) if current_project else None
+    if current_task is None:
+        return False
+    _apply_task_data(user, current_project, current_task, task_data)
+    return True
+
+
+def delete_task(root, username, project, task):
+    """Xóa task, trả về title của task đã xóa (None nếu không tìm thấy)"""
+    user = root['users'][username]
+    current_project = _find_project(user, project)
+    current_task = _find_task(current_project, task) if current_project else None
+    if current_task is None:
+        return None
+    user.remove_task(current_project, current_task)
+    return current_task.title
+
+
+def delete_project(root, username, project):
+    """Xóa project, trả về name của project đã xóa (None nếu không tìm thấy)"""
+    user = root['users'][username]
+    current_project = _find_project(user, project)
+    if current_project is None:
+        return None
+    user.remove_project(current_project)
+    return current_project.name
@@ -0,0 +1,19 @@
+"""Phiên bản schema của database, lưu ở root['schema_version'].
+
+Database mới được tạo ở SCHEMA_VERSION. Database cũ (chưa có key) là version 0
+và được nâng lên bằng các generation trong utils.migration (chạy bằng CLI), nên
+client chỉ cần đọc một key khi khởi động thay vì duyệt toàn bộ dữ liệu.
+"""
+
+SCHEMA_VERSION_KEY = 'schema_version'
+
+# Tăng cùng lúc với việc thêm generation mới vào utils.migration
+SCHEMA_VERSION = 3
+
+
+def get_schema_version(root):
+    return root.get(SCHEMA_VERSION_KEY, 0)
+
+
+def set_schema_version(root, version):
+    root[SCHEMA_VERSION_KEY] = version
@@ -0,0 +1,399 @@
+from itertools import islice
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+from utils.helpers import date_to_str, tags_to_str
+
+# Số task được nạp mỗi lần view cần thêm dòng (fetchMore)
+FETCH_BATCH_SIZE = 200
+
+HEADERS = ["Name", "Status", "Deadline"]
+
+STATUS_ICONS = {"To Do": "📋", "Doing": "⚡", "Done": "✅"}
+
+STATUS_COLORS = {
+    "Done": QColor(200, 255, 200),    # Green for completed tasks
+    "Doing": QColor(255, 255, 200),   # Yellow for in-progress
+    "To Do": QColor(255, 230, 230),   # Light red for pending
+}
+
+PROJECT_COMPLETED_COLOR = QColor(144, 238, 144)  # Light green
+PROJECT_ACTIVE_COLOR = QColor(245, 245, 245)     # Light gray
+PLACEHOLDER_COLOR = QColor(240, 240, 240)
+
+
+def get_collection_oids(collection):
+    """OID bị invalidate khi collection (OrderedCollection hoặc PersistentList cũ) thêm/xóa phần tử"""
+    if hasattr(collection, 'get_change_oids'):
+        return collection.get_change_oids()
+    return (collection._p_oid,)
+
+
+class _ProjectNode:
+    """Một dòng project; chỉ giữ các task đã được fetch và cursor của task cuối"""
+    __slots__ = ('project', 'children', 'summary', 'cursor')
+
+    def __init__(self, project):
+        self.project = project
+        self.children = []
+        self.summary = None
+        self.cursor = None
+
+
+class _TaskNode:
+    """Một dòng task; task có thể vẫn là ghost cho tới khi được hiển thị"""
+    __slots__ = ('task', 'parent')
+
+    def __init__(self, task, parent):
+        self.task = task
+        self.parent = parent
+
+
+class ProjectTreeModel(QAbstractItemModel):
+    """Model project/task đọc trực tiếp từ persistent objects.
+
+    Task con được tạo theo từng batch qua canFetchMore/fetchMore, và task
+    chỉ bị unghostify khi view thực sự cần dữ liệu của dòng đó. Dòng được
+    nhận diện bằng chính persistent object (hash theo identity, không load
+    object), nên refresh chỉ phát ra các signal insert/remove/dataChanged cần thiết.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._user = None
+        self._projects = []
+        self._project_rows = {}
+        self._show_placeholder = False
+        self._tag = None  # tag đang lọc (None: hiển thị mọi task)
+        self._tagged = {}  # project -> các task có tag đang lọc
+        self.project_oids = {}  # OID -> project identifier, dùng cho invalidation refresh
+
+    # ------------------------------------------------------------------
+    # Cập nhật dữ liệu
+
+    def clear(self):
+        """Xóa toàn bộ dòng"""
+        self.beginResetModel()
+        self._user = None
+        self._projects = []
+        self._project_rows = {}
+        self._show_placeholder = False
+        self._tag = None
+        self._tagged = {}
+        self.project_oids = {}
+        self.endResetModel()
+
+    def set_tag_filter(self, tag):
+        """Chỉ hiển thị các task có tag (đọc từ tag index của user); None để bỏ lọc"""
+        if tag == self._tag:
+            return
+        self.beginResetModel()
+        self._tag = tag
+        self._tagged = {}
+        self._projects = []
+        self._project_rows = {}
+        self._show_placeholder = False
+        self.project_oids = {}
+        self.endResetModel()
+        if self._user is not None:
+            self.refresh(self._user)
+
+    def get_tag_filter(self):
+        return self._tag
+
+    def refresh(self, user):
+        """Đồng bộ model với danh sách project của user, chỉ áp dụng phần thay đổi"""
+        self._user = user
+        projects = list(user.projects) if user else []
+        if user and self._tag is not None:
+            # Chỉ load các task có tag, không duyệt task của project
+            self._tagged = {}
+            for project, task in user.iter_tagged_tasks(self._tag):
+                self._tagged.setdefault(project, []).append(task)
+            for tasks in self._tagged.values():
+                tasks.sort(key=lambda task: task.created_at)
+            projects = [project for project in projects if project in self._tagged]
+
+        if not projects:
+            if not self._show_placeholder:
+                self.beginResetModel()
+                self._projects = []
+                self._project_rows = {}
+                self._show_placeholder = True
+                self.project_oids = {}
+                self.endResetModel()
+            return
+
+        if self._show_placeholder:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self._show_placeholder = False
+            self.endRemoveRows()
+
+        self._reconcile(QModelIndex(), self._projects, projects, _ProjectNode)
+        self._reindex_projects()
+
+        self.project_oids = {}
+        for node in self._projects:
+            self._sync_project(node)
+        if self._tag is not None:
+            # Task khác được gắn/bỏ tag -> refresh lại toàn bộ kết quả lọc
+            for oid in user.get_tag_change_oids(self._tag):
+                self.project_oids[oid] = None
+
+    def refresh_projects(self, project_identifiers):
+        """Chỉ đồng bộ lại các project được chỉ định.
+
+        Trả về False nếu có project không còn tồn tại hoặc đang lọc theo tag
+        (cần refresh toàn bộ).
+        """
+        if self._tag is not None:
+            return False
+        for node in self._projects:
+            if self.get_project_identifier(node.project) in project_identifiers:
+                if node.project not in self._user.projects:
+                    return False
+                self._sync_project(node)
+        return True
+
+    def _sync_project(self, node):
+        """Đồng bộ các task đã fetch của project và báo view vẽ lại"""
+        project = node.project
+        project_index = self.createIndex(self._project_row(node), 0, node)
+        fetched = len(node.children)
+
+        if self._tag is not None:
+            self._reconcile(project_index, node.children, self._tagged.get(project, []),
+                            lambda task: _TaskNode(task, node))
+            if node.children:
+                self.dataChanged.emit(self.index(0, 0, project_index),
+                                      self.index(len(node.children) - 1, len(HEADERS) - 1, project_index))
+        elif fetched:
+            entries = list(islice(project.iter_task_entries(), fetched))
+            node.cursor = entries[-1][0] if entries else None
+            self._reconcile(project_index, node.children, [task for _, task in entries],
+                            lambda task: _TaskNode(task, node))
+            if node.children:
+                self.dataChanged.emit(self.index(0, 0, project_index),
+                                      self.index(len(node.children) - 1, len(HEADERS) - 1, project_index))
+
+        node.summary = None
+        self._register_oids(node)
+        self.dataChanged.emit(project_index, project_index.sibling(project_index.row(), len(HEADERS) - 1))
+
+    def _register_oids(self, node):
+        """Ghi nhớ OID thuộc project để biết cần refresh project nào khi có invalidation"""
+        project = node.project
+        project_identifier = self.get_project_identifier(project)
+        self.project_oids[project._p_oid] = project_identifier
+        for oid in get_collection_oids(project.tasks):
+            self.project_oids[oid] = project_identifier
+        # Counter đổi khi task (kể cả task chưa fetch) đổi status
+        for counter in getattr(project, 'status_counts', {}).values():
+            self.project_oids[counter._p_oid] = project_identifier
+        for task_node in node.children:
+            self.project_oids[task_node.task._p_oid] = project_identifier
+
+    def _reconcile(self, parent, nodes, objects, make_node):
+        """Biến đổi danh sách node hiện tại thành danh sách objects bằng remove/move/insert"""
+        wanted = set(objects)
+        for row in range(len(nodes) - 1, -1, -1):
+            if self._node_object(nodes[row]) not in wanted:
+                self.beginRemoveRows(parent, row, row)
+                del nodes[row]
+                self.endRemoveRows()
+
+        for row, obj in enumerate(objects):
+            if row < len(nodes) and self._node_object(nodes[row]) is obj:
+                continue
+            old_row = next((i for i in range(row + 1, len(nodes))
+                            if self._node_object(nodes[i]) is obj), None)
+            if old_row is not None:
+                self.beginMoveRows(parent, old_row, old_row, parent, row)
+                nodes.insert(row, nodes.pop(old_row))
+                self.endMoveRows()
+            else:
+                self.beginInsertRows(parent, row, row)
+                nodes.insert(row, make_node(obj))
+                self.endInsertRows()
+
+    def _node_object(self, node):
+        return node.project if isinstance(node, _ProjectNode) else node.task
+
+    def _project_row(self, node):
+        # Cache row có thể cũ khi đang giữa một lần reconcile
+        row = self._project_rows.get(node.project)
+        if row is not None and row < len(self._projects) and self._projects[row] is node:
+            return row
+        try:
+            return self._projects.index(node)
+        except ValueError:
+            return None
+
+    def _reindex_projects(self):
+        self._project_rows = {node.project: row for row, node in enumerate(self._projects)}
+
+    # ------------------------------------------------------------------
+    # Truy vấn từ MainWindow
+
+    def get_project_identifier(self, project):
+        """Identifier của project (ID, hoặc name với dữ liệu legacy)"""
+        return str(project.id) if hasattr(project, 'id') else str(project.name)
+
+    def is_placeholder(self, index):
+        return self._show_placeholder and index.isValid() and not index.parent().isValid()
+
+    # ------------------------------------------------------------------
+    # QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            node = self._projects[row] if not self._show_placeholder else None
+            return self.createIndex(row, column, node)
+        project_node = parent.internalPointer()
+        return self.createIndex(row, column, project_node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if isinstance(node, _TaskNode):
+            row = self._project_row(node.parent)
+            if row is not None:
+                return self.createIndex(row, 0, node.parent)
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        if not parent.isValid():
+            return 1 if self._show_placeholder else len(self._projects)
+        node = parent.internalPointer()
+        if isinstance(node, _ProjectNode):
+            return len(node.children)
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return self.rowCount(parent) > 0
+        node = parent.internalPointer()
+        if isinstance(node, _ProjectNode):
+            if self._tag is not None:
+                return len(node.children) > 0
+            return len(node.project.tasks) > 0
+        return False
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        node = parent.internalPointer()
+        return (self._tag is None and isinstance(node, _ProjectNode)
+                and len(node.children) < len(node.project.tasks))
+
+    def fetchMore(self, parent):
+        node = parent.internalPointer()
+        start = len(node.children)
+        # Tiếp tục từ cursor của task cuối thay vì đếm lại từ đầu collection
+        batch = list(islice(node.project.iter_task_entries(cursor=node.cursor if start else None),
+                            FETCH_BATCH_SIZE))
+        if not batch:
+            return
+        self.beginInsertRows(parent, start, start + len(batch) - 1)
+        node.children.extend(_TaskNode(task, node) for _, task in batch)
+        node.cursor = batch[-1][0]
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if self._show_placeholder:
+            return self._placeholder_data(index, role)
+        node = index.internalPointer()
+        if isinstance(node, _ProjectNode):
+            return self._project_data(node, index.column(), role)
+        return self._task_data(node.task, index.column(), role)
+
+    def _placeholder_data(self, index, role):
+        # Hiển thị thông báo nếu chưa có projects
+        if role == Qt.DisplayRole and self._tag is not None:
+            return [f"No tasks tagged '{self._tag}'", "", "Choose 'All tags' to show every task"][index.column()]
+        if role == Qt.DisplayRole:
+            return ["No projects yet. Create your first project!", "",
+                    "Use 'New Project' button to get started"][index.column()]
+        if role == Qt.BackgroundRole:
+            return PLACEHOLDER_COLOR
+        return None
+
+    def _project_summary(self, node):
+        """Tính (và cache) thống kê hiển thị của project"""
+        if node.summary is None:
+            project = node.project
+            # Đếm tasks theo status từ counter của project, không load Task nào
+            counts = project.get_status_counts()
+            node.summary = (project.get_task_count(), counts["To Do"], counts["Doing"], counts["Done"])
+        return node.summary
+
+    def _project_data(self, node, column, role):
+        project = node.project
+        total_tasks, todo_count, doing_count, done_count = self._project_summary(node)
+        # Check if project is fully completed
+        is_project_completed = total_tasks > 0 and done_count == total_tasks
+
+        if role == Qt.DisplayRole:
+            if column == 0:
+                # Hiển thị tên project với thống kê (có ✅ nếu fully completed)
+                if is_project_completed:
+                    return f"✅ {project.name} ({done_count}/{total_tasks})"
+                return f"{project.name} ({done_count}/{total_tasks})"
+            if column == 1:
+                return "Active"
+            return f"Tasks: {total_tasks} (Todo: {todo_count}, Doing: {doing_count}, Done: {done_count})"
+
+        if role == Qt.UserRole:
+            return project.id if hasattr(project, 'id') else project.name
+
+        if role == Qt.ToolTipRole and column == 0:
+            if hasattr(project, 'id'):
+                return f"Project: {project.name}\nID: {project.id}\nCreated: {project.created_at.strftime('%Y-%m-%d')}"
+            return f"Project: {project.name}\nCreated: {project.created_at.strftime('%Y-%m-%d')}"
+
+        if role == Qt.BackgroundRole:
+            # 🎨 PROJECT COLORING: hoàn thành - xanh, chưa hoàn thành - xám
+            return PROJECT_COMPLETED_COLOR if is_project_completed else PROJECT_ACTIVE_COLOR
+
+        return None
+
+    def _task_data(self, task, column, role):
+        if role == Qt.DisplayRole:
+            if column == 0:
+                # Hiển thị tên task với icon
+                if hasattr(task, 'get_display_name'):
+                    return task.get_display_name()
+                return f"{STATUS_ICONS.get(task.status, '📋')} {task.title}"
+            if column == 1:
+                return task.status
+            return date_to_str(task.deadline)
+
+        if role == Qt.UserRole:
+            return task.id if hasattr(task, 'id') else task.title
+
+        if role == Qt.ToolTipRole and column == 0:
+            tags = getattr(task, 'tags', None)
+            tags_line = f"\nTags: {tags_to_str(tags)}" if tags else ""
+            if hasattr(task, 'id'):
+                return f"Task: {task.title}\nID: {task.id}\nCreated: {task.created_at.strftime('%Y-%m-%d')}{tags_line}"
+            return f"Task: {task.title}\nCreated: {task.created_at.strftime('%Y-%m-%d')}{tags_line}"
+
+        if role == Qt.BackgroundRole:
+            # Màu sắc theo status
+            return STATUS_COLORS.get(task.status, STATUS_COLORS["To Do"])
+
+        return None
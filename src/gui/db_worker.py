@@ -0,0 +1,112 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from database.connection import db_connection
+from config.settings import DEBUG
+
+# Thời gian tối đa chờ worker dừng khi đóng ứng dụng (ms)
+STOP_TIMEOUT = 5000
+
+
+class DatabaseWorker(QObject):
+    """Chạy I/O tới ZEO (kết nối, commit) trên thread riêng với connection riêng.
+
+    Operation là các hàm trong database.operations: nhận root của connection
+    worker, trả về giá trị thuần, nên GUI thread không bao giờ chờ mạng khi ghi.
+    """
+    connected = pyqtSignal()
+    connection_failed = pyqtSignal()
+    operation_finished = pyqtSignal(int, object)
+    operation_failed = pyqtSignal(int, str)
+
+    def __init__(self):
+        super().__init__()
+        self.connection = None
+
+    @pyqtSlot()
+    def connect_database(self):
+        if not db_connection.open_database():
+            self.connection_failed.emit()
+            return
+        self.connection = db_connection.open_worker_connection()
+        self.connected.emit()
+
+    @pyqtSlot(int, object, object)
+    def run_operation(self, request_id, operation, args):
+        try:
+            result = db_connection.run_in_transaction(
+                lambda root: operation(root, *args), connection=self.connection)
+        except Exception as e:
+            if DEBUG:
+                print(f"❌ Operation {operation.__name__} failed: {e}")
+            self.operation_failed.emit(request_id, str(e))
+            return
+        self.operation_finished.emit(request_id, result)
+
+    @pyqtSlot()
+    def stop(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+        QThread.currentThread().quit()
+
+
+class DatabaseClient(QObject):
+    """Phía GUI của DatabaseWorker: gửi operation qua signal và gọi callback khi có kết quả"""
+    connected = pyqtSignal()
+    connection_failed = pyqtSignal()
+
+    _connect_requested = pyqtSignal()
+    _operation_requested = pyqtSignal(int, object, object)
+    _stop_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._callbacks = {}
+        self._next_request_id = 0
+
+        self.thread = QThread()
+        self.worker = DatabaseWorker()
+        self.worker.moveToThread(self.thread)
+
+        self._connect_requested.connect(self.worker.connect_database)
+        self._operation_requested.connect(self.worker.run_operation)
+        self._stop_requested.connect(self.worker.stop)
+        self.worker.connected.connect(self.connected)
+        self.worker.connection_failed.connect(self.connection_failed)
+        self.worker.operation_finished.connect(self._on_operation_finished)
+        self.worker.operation_failed.connect(self._on_operation_failed)
+
+        self.thread.start()
+
+    def connect_database(self):
+        """Kết nối tới ZEO server trên worker thread (kết quả qua connected/connection_failed)"""
+        self._connect_requested.emit()
+
+    def submit(self, operation, *args, on_success=None, on_error=None):
+        """Chạy operation(root, *args) trong một transaction trên worker thread"""
+        self._next_request_id += 1
+        self._callbacks[self._next_request_id] = (on_success, on_error)
+        self._operation_requested.emit(self._next_request_id, operation, args)
+
+    def has_pending_operations(self):
+        return bool(self._callbacks)
+
+    def stop(self):
+        """Đóng connection của worker và dừng thread"""
+        if self.thread.isRunning():
+            self._stop_requested.emit()
+            if not self.thread.wait(STOP_TIMEOUT):
+                # Worker vẫn đang chờ server (vd. trong retry loop) -> dừng cưỡng bức khi thoát
+                if DEBUG:
+                    print("⚠️ Database worker did not stop in time")
+                self.thread.terminate()
+                self.thread.wait()
+
+    def _on_operation_finished(self, request_id, result):
+        on_success, _ = self._callbacks.pop(request_id, (None, None))
+        if on_success:
+            on_success(result)
+
+    def _on_operation_failed(self, request_id, message):
+        _, on_error = self._callbacks.pop(request_id, (None, None))
+        if on_error:
+            on_error(message)
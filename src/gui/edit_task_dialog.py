@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout,
                            QLabel, QLineEdit, QPushButton, QTextEdit, 
                            QComboBox, QDateEdit, QMessageBox)
 from PyQt5.QtCore import QDate, Qt
+from utils.helpers import format_date, parse_tags, tags_to_str
 
 class EditTaskDialog(QDialog):
     def __init__(self, task, parent=None):
@@ -12,7 +13,7 @@ class EditTaskDialog(QDialog):
     def init_ui(self):
         self.setWindowTitle("Edit Task")
         self.setModal(True)
-        self.resize(400, 350)
+        self.resize(400, 400)
         
         layout = QVBoxLayout()
         
@@ -38,17 +39,20 @@ class EditTaskDialog(QDialog):
         # Deadline
         layout.addWidget(QLabel("Deadline:"))
         self.deadline_edit = QDateEdit()
-        if self.task.deadline:
-            try:
-                date = QDate.fromString(self.task.deadline, 'yyyy-MM-dd')
-                self.deadline_edit.setDate(date)
-            except:
-                self.deadline_edit.setDate(QDate.currentDate())
+        deadline = format_date(self.task.deadline)
+        if deadline:
+            self.deadline_edit.setDate(QDate(deadline.year, deadline.month, deadline.day))
         else:
             self.deadline_edit.setDate(QDate.currentDate())
         self.deadline_edit.setCalendarPopup(True)
         layout.addWidget(self.deadline_edit)
         
+        # Tags
+        layout.addWidget(QLabel("Tags (comma separated):"))
+        self.tags_edit = QLineEdit(tags_to_str(getattr(self.task, 'tags', None)))
+        self.tags_edit.setPlaceholderText("e.g. backend, urgent")
+        layout.addWidget(self.tags_edit)
+        
         # Buttons
         button_layout = QHBoxLayout()
         
@@ -90,5 +94,6 @@ class EditTaskDialog(QDialog):
             'title': self.title_edit.text().strip(),
             'description': self.description_edit.toPlainText().strip(),
             'status': self.status_combo.currentText(),
-            'deadline': self.deadline_edit.date().toString('yyyy-MM-dd')
+            'deadline': self.deadline_edit.date().toString('yyyy-MM-dd'),
+            'tags': parse_tags(self.tags_edit.text())
         }
\ No newline at end of file
@@ -1,20 +1,15 @@
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, 
                            QWidget, QPushButton, QLabel, QMenuBar, 
-                           QAction, QMessageBox, QTreeWidget, QTreeWidgetItem,
-                           QStackedWidget, QHeaderView, QMenu)
+                           QAction, QMessageBox, QTreeView,
+                           QStackedWidget, QHeaderView, QMenu, QLineEdit,
+                           QComboBox)
 from PyQt5.QtCore import Qt, QTimer
-from .login_dialog import LoginDialog
-from .register_dialog import RegisterDialog
-from .project_dialog import ProjectDialog
-from .task_dialog import TaskDialog
 from database.connection import db_connection
-from database.models import User, Project, Task
-import transaction
-from PyQt5.QtGui import QColor
-from persistent.list import PersistentList
-from .edit_task_dialog import EditTaskDialog
-from config.settings import DATABASE_CONFIG, NETWORK_CONFIG, DEBUG, print_config
-from utils.migration import DataMigration
+from .components.project_tree_model import ProjectTreeModel, get_collection_oids
+from .db_worker import DatabaseClient
+from config.settings import DATABASE_CONFIG, NETWORK_CONFIG, UI_CONFIG, DEBUG, print_config
+from database.schema import SCHEMA_VERSION, get_schema_version
+from utils.startup_timing import startup_timer
 
 class MainWindow(QMainWindow):
     
@@ -28,10 +23,46 @@ class MainWindow(QMainWindow):
             print_config()
             
         self.init_ui()
+        
+        # Kết nối và ghi dữ liệu chạy trên worker thread, window hiện ngay lập tức
+        self.db_client = DatabaseClient(self)
+        self.db_client.connected.connect(self.on_database_connected)
+        self.db_client.connection_failed.connect(self.on_database_connection_failed)
         self.connect_to_database()
+    
+    def connect_to_database(self):
+        """Kết nối tới database với config từ .env (không chặn GUI thread)"""
+        if DEBUG:
+            print("🔌 Attempting to connect to database...")
         
-        # Chạy migration nếu cần
-        self.run_migration_if_needed()
+        self.set_auth_buttons_enabled(False)
+        self.connection_status_label.setText(
+            f"🔌 Connecting to server {DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}...")
+        startup_timer.begin('connect')
+        self.db_client.connect_database()
+    
+    def on_database_connected(self):
+        """Worker đã kết nối xong: mở connection của GUI và tiếp tục khởi động"""
+        startup_timer.end('connect')
+        startup_timer.begin('open_connection')
+        db_connection.open_connection()
+        startup_timer.end('open_connection')
+        
+        # Test connection
+        startup_timer.begin('test_connection')
+        db_connection.test_connection()
+        startup_timer.end('test_connection')
+        
+        self.connection_status_label.setText("")
+        self.set_auth_buttons_enabled(True)
+        
+        # Database cũ phải được migrate bằng CLI trước
+        startup_timer.begin('migration_check')
+        ready = self.check_schema_version()
+        startup_timer.end('migration_check')
+        if not ready:
+            self.close()
+            return
         
         # Bắt đầu auto-refresh với interval từ config
         self.start_auto_refresh()
@@ -39,23 +70,32 @@ class MainWindow(QMainWindow):
         # Hiển thị login dialog ngay khi khởi động
         self.show_login_at_startup()
     
-    def connect_to_database(self):
-        """Kết nối tới database với config từ .env"""
-        if DEBUG:
-            print("🔌 Attempting to connect to database...")
-            
-        if not db_connection.connect():
-            QMessageBox.critical(self, "Database Error", 
-                               f"Cannot connect to ZEO server at {DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}\n\n"
-                               "Please check:\n"
-                               "1. ZEO server is running\n"
-                               "2. Server address is correct\n"
-                               "3. Firewall settings\n"
-                               "4. Network connectivity")
-            self.close()
-        else:
-            # Test connection
-            db_connection.test_connection()
+    def on_database_connection_failed(self):
+        self.connection_status_label.setText("❌ Cannot connect to server")
+        QMessageBox.critical(self, "Database Error", 
+                           f"Cannot connect to ZEO server at {DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}\n\n"
+                           "Please check:\n"
+                           "1. ZEO server is running\n"
+                           "2. Server address is correct\n"
+                           "3. Firewall settings\n"
+                           "4. Network connectivity")
+        self.close()
+    
+    def run_operation(self, operation, *args, on_success=None, error_message="Operation failed"):
+        """Gửi một thao tác ghi sang database worker.
+        
+        Khi commit xong, GUI nhận invalidation của chính thay đổi đó và chỉ
+        refresh phần cây bị ảnh hưởng trước khi gọi on_success(result).
+        """
+        def finished(result):
+            self.apply_remote_changes()
+            if on_success:
+                on_success(result)
+        
+        def failed(message):
+            QMessageBox.critical(self, "Error", f"{error_message}: {message}")
+        
+        self.db_client.submit(operation, *args, on_success=finished, on_error=failed)
     
     def start_auto_refresh(self):
         if self.refresh_timer:
@@ -73,20 +113,53 @@ class MainWindow(QMainWindow):
     def auto_refresh_data(self):
         if self.current_user:
             try:
-                # Invalidate cache và sync với server
-                db_connection.invalidate_cache()
-                
-                # Lấy lại user data mới nhất
-                root = db_connection.get_root()
-                if self.current_user.username in root['users']:
-                    # Cập nhật current_user với dữ liệu mới từ server
-                    self.current_user = root['users'][self.current_user.username]
+                if NETWORK_CONFIG['refresh_mode'] == 'poll':
+                    # Invalidate cache và sync với server
+                    db_connection.invalidate_cache()
                     
-                    # Refresh tree view
-                    self.refresh_tree()
+                    # Lấy lại user data mới nhất
+                    root = db_connection.get_root()
+                    if self.current_user.username in root['users']:
+                        # Cập nhật current_user với dữ liệu mới từ server
+                        self.current_user = root['users'][self.current_user.username]
+                        
+                        # Refresh tree view
+                        self.refresh_tree()
+                    return
+                
+                self.apply_remote_changes()
                     
             except Exception as e:
                 print(f"Auto refresh error: {e}")
+    
+    def apply_remote_changes(self):
+        """Nhận các thay đổi đã commit (từ worker hoặc client khác) và cập nhật cây"""
+        if not self.current_user:
+            return
+        # Chỉ lấy các OID bị thay đổi, cache vẫn giữ nguyên
+        changed_oids = db_connection.poll_invalidations()
+        if changed_oids is None:
+            self.refresh_tree()
+        elif changed_oids:
+            self.refresh_changed_objects(changed_oids)
+            self.update_tag_filter_options()
+    
+    def refresh_changed_objects(self, changed_oids):
+        """Chỉ refresh các project chứa object bị thay đổi"""
+        user = self.current_user
+        
+        # User hoặc danh sách projects thay đổi -> cấu trúc cây thay đổi
+        structure_oids = (user._p_oid,) + tuple(get_collection_oids(user.projects))
+        if any(oid in changed_oids for oid in structure_oids):
+            self.refresh_tree()
+            return
+        
+        project_oids = self.tree_model.project_oids
+        affected_projects = {project_oids[oid] for oid in changed_oids if oid in project_oids}
+        if affected_projects:
+            if DEBUG:
+                print(f"🔄 Refreshing {len(affected_projects)} changed projects")
+            self.refresh_projects(affected_projects)
         
     def init_ui(self):
         self.setWindowTitle("Task Manager")
@@ -123,30 +196,40 @@ class MainWindow(QMainWindow):
         layout.addWidget(subtitle_label)
         
         # Login button
-        login_btn = QPushButton("Login")
-        login_btn.setFixedSize(200, 50)
-        login_btn.clicked.connect(self.show_login_dialog)
-        login_btn.setStyleSheet("QPushButton { font-size: 14px; }")
+        self.login_btn = QPushButton("Login")
+        self.login_btn.setFixedSize(200, 50)
+        self.login_btn.clicked.connect(self.show_login_dialog)
+        self.login_btn.setStyleSheet("QPushButton { font-size: 14px; }")
         
         # Register button
-        register_btn = QPushButton("Create New Account")
-        register_btn.setFixedSize(200, 50)
-        register_btn.clicked.connect(self.show_register_dialog)
-        register_btn.setStyleSheet("QPushButton { font-size: 14px; background-color: #4CAF50; color: white; }")
+        self.register_btn = QPushButton("Create New Account")
+        self.register_btn.setFixedSize(200, 50)
+        self.register_btn.clicked.connect(self.show_register_dialog)
+        self.register_btn.setStyleSheet("QPushButton { font-size: 14px; background-color: #4CAF50; color: white; }")
         
         # Button layout
         button_layout = QVBoxLayout()
         button_layout.setAlignment(Qt.AlignCenter)
-        button_layout.addWidget(login_btn)
+        button_layout.addWidget(self.login_btn)
         button_layout.addSpacing(10)
-        button_layout.addWidget(register_btn)
+        button_layout.addWidget(self.register_btn)
         
         layout.addLayout(button_layout)
+        
+        # Trạng thái kết nối (đang kết nối tới server ở background)
+        self.connection_status_label = QLabel("")
+        self.connection_status_label.setAlignment(Qt.AlignCenter)
+        self.connection_status_label.setStyleSheet("font-size: 12px; color: gray; margin-top: 20px;")
+        layout.addWidget(self.connection_status_label)
         layout.addStretch()
         
         login_widget.setLayout(layout)
         self.stacked_widget.addWidget(login_widget)
         
+    def set_auth_buttons_enabled(self, enabled):
+        self.login_btn.setEnabled(enabled)
+        self.register_btn.setEnabled(enabled)
+        
     def create_main_interface(self):
         """Tạo giao diện chính"""
         main_widget = QWidget()
@@ -167,17 +250,22 @@ class MainWindow(QMainWindow):
         self.welcome_label.setStyleSheet("font-size: 16px; margin: 15px;")
         main_layout.addWidget(self.welcome_label)
         
-        # Tree widget để hiển thị projects và tasks
-        self.tree_widget = QTreeWidget()
-        self.tree_widget.setHeaderLabels(["Name", "Status", "Deadline"])
-        main_layout.addWidget(self.tree_widget)
+        # Tree view để hiển thị projects và tasks (task được nạp lazy khi cần)
+        self.tree_model = ProjectTreeModel(self)
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.tree_model)
+        self.tree_view.setUniformRowHeights(True)
+        main_layout.addWidget(self.tree_view)
+        
+        # Mặc định expand cho projects mới hoặc lần đầu
+        self.tree_model.rowsInserted.connect(self.expand_new_projects)
         
         # Kết nối signals
-        self.tree_widget.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.tree_view.doubleClicked.connect(self.on_item_double_clicked)
         
         # 🆕 THÊM CONTEXT MENU
-        self.tree_widget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.tree_widget.customContextMenuRequested.connect(self.show_context_menu)
+        self.tree_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tree_view.customContextMenuRequested.connect(self.show_context_menu)
         
         self.stacked_widget.addWidget(main_widget)
         
@@ -224,8 +312,8 @@ class MainWindow(QMainWindow):
         # Tạo list project names với thống kê
         project_options = []
         for p in self.current_user.projects:
-            task_count = len(p.tasks)
-            completed_count = sum(1 for task in p.tasks if task.status == "Done")
+            task_count = p.get_task_count()
+            completed_count = p.get_status_counts()["Done"]
             option = f"{p.name} ({completed_count}/{task_count} tasks)"
             project_options.append(option)
         
@@ -273,6 +361,26 @@ class MainWindow(QMainWindow):
         # Separator
         toolbar.addSeparator()
         
+        # Due Soon button
+        self.due_soon_btn = QPushButton("⏰ Due Soon")
+        self.due_soon_btn.clicked.connect(self.show_due_soon_dialog)
+        toolbar.addWidget(self.due_soon_btn)
+        
+        # Search box (tìm theo title/description/tags, Enter để tìm)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔍 Search tasks...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setMaximumWidth(250)
+        self.search_edit.returnPressed.connect(self.search_tasks)
+        toolbar.addWidget(self.search_edit)
+        
+        # Tag filter (lọc cây theo tag index)
+        self.tag_filter_combo = QComboBox()
+        self.tag_filter_combo.addItem("🏷️ All tags", None)
+        self.tag_filter_combo.setMinimumWidth(150)
+        self.tag_filter_combo.currentIndexChanged.connect(self.filter_by_tag)
+        toolbar.addWidget(self.tag_filter_combo)
+        
         # Separator
         toolbar.addSeparator()
         
@@ -281,8 +389,85 @@ class MainWindow(QMainWindow):
         logout_btn.clicked.connect(self.logout)
         toolbar.addWidget(logout_btn)
         
+    def show_due_soon_dialog(self):
+        """Hiển thị các task quá hạn, đến hạn hôm nay và trong vài ngày tới (đọc từ deadline index)"""
+        if not self.current_user:
+            QMessageBox.warning(self, "Warning", "Please login first!")
+            return
+        
+        user = self.current_user
+        
+        # Lấy thay đổi mới nhất trước khi đọc index
+        self.apply_remote_changes()
+        
+        days = UI_CONFIG['due_soon_days']
+        rows = ([("⚠️ Overdue", project, task) for _, project, task in user.get_overdue_tasks()]
+                + [("📅 Today", project, task) for _, project, task in user.get_tasks_due_today()]
+                + [(f"🔜 Next {days} days", project, task) for _, project, task in user.get_tasks_due_soon(days)])
+        
+        from .task_list_dialog import TaskListDialog
+        dialog = TaskListDialog("Due Soon", rows, self)
+        if dialog.exec_() == TaskListDialog.Accepted and dialog.selected_task:
+            project, task = dialog.selected_task
+            self.edit_task_by_ids(project.id, task.id)
+        
+    def search_tasks(self):
+        """Tìm task của user trong mọi project qua text index, hiển thị theo điểm"""
+        if not self.current_user:
+            QMessageBox.warning(self, "Warning", "Please login first!")
+            return
+        
+        query = self.search_edit.text().strip()
+        if not query:
+            return
+        
+        # Lấy thay đổi mới nhất trước khi đọc index
+        self.apply_remote_changes()
+        
+        results = self.current_user.search_tasks(query)
+        if DEBUG:
+            print(f"🔍 Search '{query}': {len(results)} tasks")
+        
+        rows = [(score, project, task) for score, project, task in results]
+        from .task_list_dialog import TaskListDialog
+        dialog = TaskListDialog(f"Search: {query}", rows, self, group_header="Score")
+        if dialog.exec_() == TaskListDialog.Accepted and dialog.selected_task:
+            project, task = dialog.selected_task
+            self.edit_task_by_ids(project.id, task.id)
+        
+    def update_tag_filter_options(self):
+        """Cập nhật danh sách tag trong tag filter (đọc từ counter, không load Task)"""
+        tags = self.current_user.get_tags() if self.current_user else []
+        items = [("🏷️ All tags", None)] + [(f"{tag} ({count})", tag) for tag, count in tags]
+        combo = self.tag_filter_combo
+        if items == [(combo.itemText(i), combo.itemData(i)) for i in range(combo.count())]:
+            return
+        
+        current_tag = self.tree_model.get_tag_filter()
+        combo.blockSignals(True)
+        combo.clear()
+        for text, tag in items:
+            combo.addItem(text, tag)
+        current_index = next((i for i, (_, tag) in enumerate(items) if tag == current_tag), 0)
+        combo.setCurrentIndex(current_index)
+        combo.blockSignals(False)
+        if current_index == 0 and current_tag is not None:
+            # Tag đang lọc không còn task nào
+            self.tree_model.set_tag_filter(None)
+        
+    def filter_by_tag(self, index):
+        """Chỉ hiển thị các task có tag được chọn"""
+        tag = self.tag_filter_combo.itemData(index)
+        if DEBUG and tag is not None:
+            print(f"🏷️ Filtering by tag '{tag}': {self.current_user.get_tag_count(tag)} tasks")
+        self.tree_model.set_tag_filter(tag)
+        if tag is not None:
+            self.tree_view.expandAll()
+        
     def show_login_at_startup(self):
         """Hiển thị login dialog khi khởi động"""
+        # Thời gian chờ người dùng đăng nhập không tính vào thời gian khởi động
+        startup_timer.begin('login')
         # Đợi một chút để UI load xong
         QTimer.singleShot(100, self.show_auth_flow)
         
@@ -291,18 +476,15 @@ class MainWindow(QMainWindow):
         self.show_login_dialog()
         
     def show_login_dialog(self):
+        from .login_dialog import LoginDialog
+        # Mỗi lần dialog hiện lại (vd. sau khi nhập sai) là thời gian chờ người dùng
+        startup_timer.begin('login')
         dialog = LoginDialog(self)
         result = dialog.exec_()
         
         if result == LoginDialog.Accepted:
             username, password = dialog.get_credentials()
-            if self.authenticate_user(username, password):
-                self.current_user = self.get_user(username)
-                self.welcome_label.setText(f"Welcome, {self.current_user.username}!")
-                self.stacked_widget.setCurrentIndex(1)  # Chuyển sang main interface
-                
-                self.refresh_tree()
-            else:
+            if not self.login(username, password):
                 QMessageBox.warning(self, "Login Failed", "Invalid username or password!")
                 # Hiển thị lại login dialog
                 self.show_login_dialog()
@@ -315,21 +497,26 @@ class MainWindow(QMainWindow):
                 self.close()
             
     def show_register_dialog(self):
+        from .register_dialog import RegisterDialog
         dialog = RegisterDialog(self)
         result = dialog.exec_()
         
         if result == RegisterDialog.Accepted:
             user_data = dialog.get_user_data()
-            if self.register_user(user_data['username'], user_data['password']):
-                QMessageBox.information(self, "Success", 
-                    "Account created successfully! Please login with your new account.")
-                # Sau khi register thành công, quay lại login
-                self.show_login_dialog()
-            else:
-                QMessageBox.warning(self, "Registration Failed", 
-                    f"Username '{user_data['username']}' already exists!")
-                # Hiển thị lại register dialog
-                self.show_register_dialog()
+            
+            def registered(success):
+                if success:
+                    QMessageBox.information(self, "Success", 
+                        "Account created successfully! Please login with your new account.")
+                    # Sau khi register thành công, quay lại login
+                    self.show_login_dialog()
+                else:
+                    QMessageBox.warning(self, "Registration Failed", 
+                        f"Username '{user_data['username']}' already exists!")
+                    # Hiển thị lại register dialog
+                    self.show_register_dialog()
+            
+            self.register_user(user_data['username'], user_data['password'], registered)
         elif dialog.should_show_login():
             # User muốn quay lại login
             self.show_login_dialog()
@@ -338,10 +525,29 @@ class MainWindow(QMainWindow):
             if self.current_user is None:
                 self.show_login_dialog()
     
+    def login(self, username, password):
+        """Đăng nhập và hiển thị cây project, trả về False nếu sai thông tin"""
+        startup_timer.end('login')
+        startup_timer.begin('authenticate')
+        if not self.authenticate_user(username, password):
+            startup_timer.end('authenticate')
+            return False
+        self.current_user = self.get_user(username)
+        startup_timer.end('authenticate')
+        
+        self.welcome_label.setText(f"Welcome, {self.current_user.username}!")
+        self.stacked_widget.setCurrentIndex(1)  # Chuyển sang main interface
+        
+        startup_timer.begin('refresh_tree')
+        self.refresh_tree()
+        startup_timer.end('refresh_tree')
+        # Cây đã dùng được: ghi thời gian khởi động (chỉ lần đăng nhập đầu tiên)
+        startup_timer.finish(projects=len(self.current_user.projects))
+        return True
+        
     def authenticate_user(self, username, password):
         """Xác thực người dùng"""
-        # Force reload để đảm bảo dữ liệu mới nhất
-        db_connection.invalidate_cache()
+        # Sync để đảm bảo dữ liệu mới nhất (không xóa cache)
         root = db_connection.get_root()
         if username in root['users']:
             user = root['users'][username]
@@ -353,56 +559,54 @@ class MainWindow(QMainWindow):
         root = db_connection.get_root()
         return root['users'].get(username)
         
-    def register_user(self, username, password):
-        """Đăng ký user mới"""
-        root = db_connection.get_root()
-        if username in root['users']:
-            return False
-            
-        new_user = User(username, password)
-        root['users'][username] = new_user
-        transaction.commit()
-        return True
+    def register_user(self, username, password, on_done=None):
+        """Đăng ký user mới (trên worker thread), on_done(success) được gọi khi xong"""
+        from database import operations
+        self.run_operation(operations.register_user, username, password,
+                           on_success=on_done, error_message="Failed to create account")
         
     def logout(self):
         """Đăng xuất"""
         self.current_user = None
         self.welcome_label.setText("")
-        self.tree_widget.clear()
+        self.tree_model.clear()
+        self.update_tag_filter_options()
         self.stacked_widget.setCurrentIndex(0)  # Chuyển về login screen
         
-    def run_migration_if_needed(self):
-        """Chạy migration cho dữ liệu cũ"""
+    def check_schema_version(self):
+        """Kiểm tra schema của database (chỉ đọc một key trong root).
+        
+        Migration chỉ chạy bằng CLI, không bao giờ từ GUI: database cũ không
+        được mở. Trả về False nếu không thể tiếp tục với database này.
+        """
         try:
-            if DEBUG:
-                print("🔍 Checking for migration needs...")
-            
-            # Kiểm tra xem có dữ liệu cũ không
-            root = db_connection.get_root()
-            users = root.get('users', {})
-            
-            needs_migration = False
-            for user in users.values():
-                for project in user.projects:
-                    if not hasattr(project, 'id'):
-                        needs_migration = True
-                        break
-                if needs_migration:
-                    break
-            
-            if needs_migration:
-                print("📦 Running data migration...")
-                DataMigration.migrate_to_uuid()
-                DataMigration.validate_data_integrity()
-            
+            version = get_schema_version(db_connection.get_root())
         except Exception as e:
-            print(f"❌ Migration error: {e}")
+            print(f"❌ Schema check error: {e}")
+            return True
+        if DEBUG:
+            print(f"🔍 Database schema version {version} (app {SCHEMA_VERSION})")
+        
+        if version > SCHEMA_VERSION:
+            QMessageBox.warning(self, "Newer Database",
+                                "The database was upgraded by a newer version of Task Manager.\n\n"
+                                "Please update this application.")
+        elif version < SCHEMA_VERSION:
+            print("📦 Data migration needed: run 'python -m utils.migration'")
+            QMessageBox.critical(self, "Migration Needed",
+                                 "The database contains data from an older version and cannot be "
+                                 "opened until it is migrated.\n\n"
+                                 "Please ask the administrator to run (from the src directory):\n"
+                                 "    python -m utils.migration")
+            return False
+        return True
 
     def create_new_project(self):
         if not self.current_user:
             QMessageBox.warning(self, "Warning", "Please login first!")
             return
             
+        from .project_dialog import ProjectDialog
         dialog = ProjectDialog(self)
         if dialog.exec_() == ProjectDialog.Accepted:
             project_name = dialog.get_project_name()
@@ -416,25 +620,15 @@ class MainWindow(QMainWindow):
                 if reply == QMessageBox.No:
                     return
             
-            # Invalidate cache trước khi thêm
-            db_connection.invalidate_cache()
-            
-            # Lấy lại user mới nhất từ server
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Tạo project mới với UUID
-            new_project = Project(project_name, project_description)
-            new_project.owner_username = current_user.username
-            current_user.projects.append(new_project)
-            transaction.commit()
-            
-            # Cập nhật current_user
-            self.current_user = current_user
+            def created(project_id):
+                QMessageBox.information(self, "Success", 
+                    f"Project '{project_name}' created!\nProject ID: {project_id[:8]}...")
             
-            self.refresh_tree()
-            QMessageBox.information(self, "Success", 
-                f"Project '{project_name}' created!\nProject ID: {new_project.id[:8]}...")
+            from database import operations
+            # Tạo project mới với UUID trên worker thread
+            self.run_operation(operations.create_project, self.current_user.username,
+                               project_name, project_description,
+                               on_success=created, error_message="Failed to create project")
 
     def create_new_task(self):
         if not self.current_user:
@@ -445,6 +639,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please create a project first!")
             return
             
+        from .task_dialog import TaskDialog
         dialog = TaskDialog(self, self.current_user.projects)
         if dialog.exec_() == TaskDialog.Accepted:
             task_data = dialog.get_task_data()
@@ -461,40 +656,28 @@ class MainWindow(QMainWindow):
                 if reply == QMessageBox.No:
                     return
             
-            # Invalidate cache trước khi thêm
-            db_connection.invalidate_cache()
-            
-            # Lấy lại user mới nhất từ server
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Tạo task mới với UUID
-            new_task = Task(
-                task_data['title'],
-                task_data['description'],
-                task_data['deadline'],
-                task_data['status']
-            )
-            new_task.project_id = current_user.projects[project_index].id
-            
-            current_user.projects[project_index].tasks.append(new_task)
-            transaction.commit()
-            
-            # Cập nhật current_user
-            self.current_user = current_user
+            def created(task_id):
+                if task_id is None:
+                    QMessageBox.warning(self, "Error", "Project not found in database!")
+                    return
+                QMessageBox.information(self, "Success", 
+                    f"Task '{task_data['title']}' created!\nTask ID: {task_id[:8]}...")
             
-            self.refresh_tree()
-            QMessageBox.information(self, "Success", 
-                f"Task '{task_data['title']}' created!\nTask ID: {new_task.id[:8]}...")
+            from database import operations
+            # Tạo task mới với UUID trên worker thread
+            self.run_operation(operations.create_task, self.current_user.username,
+                               operations.project_ref(selected_project), task_data,
+                               on_success=created, error_message="Failed to create task")
 
-    def on_item_double_clicked(self, item, column):
+    def on_item_double_clicked(self, index):
         """Xử lý khi double click trên item"""
-        if item.parent() is None:  # Project item
+        index = index.sibling(index.row(), 0)
+        if not index.parent().isValid():  # Project item
             # Lấy project identifier từ data hoặc text
-            project_identifier = item.data(0, Qt.UserRole)
+            project_identifier = index.data(Qt.UserRole)
             if not project_identifier:
                 # Fallback: extract từ display text
-                project_text = item.text(0)
+                project_text = index.data()
                 project_identifier = project_text.split(' (')[0] if ' (' in project_text else project_text
         
             if project_identifier and self.current_user:
@@ -515,16 +698,16 @@ class MainWindow(QMainWindow):
                         print(f"Double clicked on project: {project.name}")
         else:  # Task item
             # Lấy identifiers từ data hoặc text
-            project_item = item.parent()
-            project_identifier = project_item.data(0, Qt.UserRole)
-            task_identifier = item.data(0, Qt.UserRole)
+            project_index = index.parent()
+            project_identifier = project_index.data(Qt.UserRole)
+            task_identifier = index.data(Qt.UserRole)
         
             if not project_identifier:
-                project_text = project_item.text(0)
+                project_text = project_index.data()
                 project_identifier = project_text.split(' (')[0] if ' (' in project_text else project_text
         
             if not task_identifier:
-                task_text = item.text(0)
+                task_text = index.data()
                 task_identifier = task_text.split(' ', 1)[1] if task_text.startswith(('📋', '⚡', '✅')) else task_text
         
             if project_identifier and task_identifier:
@@ -586,6 +769,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Task not found!")
             return
         
+        from .edit_task_dialog import EditTaskDialog
         # Hiển thị edit dialog
         dialog = EditTaskDialog(task, self)
         result = dialog.exec_()
@@ -594,37 +778,28 @@ class MainWindow(QMainWindow):
             # Update task
             task_data = dialog.get_task_data()
             
-            # Invalidate cache trước khi update
-            db_connection.invalidate_cache()
-            
-            # Lấy lại user mới nhất từ server
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Tìm lại project và task bằng ID
-            current_project = current_user.get_project_by_id(project_id)
-            current_task = current_project.get_task_by_id(task_id) if current_project else None
-            
-            if current_task:
-                current_task.title = task_data['title']
-                current_task.description = task_data['description']
-                current_task.status = task_data['status']
-                current_task.deadline = task_data['deadline']
-                
-                # BỎ LOGIC MOVE TO COMPLETED - Task Done vẫn ở trong project
-                # if old_status != "Done" and task_data['status'] == "Done":
-                #     self.move_task_to_completed(current_project, current_task, current_user)
-            
-            transaction.commit()
-            self.current_user = current_user
-            self.refresh_tree()
-            QMessageBox.information(self, "Success", "Task updated successfully!")
+            self.save_task(project, task, task_data)
             
         elif result == 2:  # Delete task
             self.delete_task_by_id(project_id, task_id)
     
+    def save_task(self, project, task, task_data):
+        """Lưu thay đổi của task trên worker thread (tìm lại bằng ID, hoặc title với dữ liệu legacy)"""
+        def saved(found):
+            if found:
+                QMessageBox.information(self, "Success", "Task updated successfully!")
+            else:
+                QMessageBox.warning(self, "Error", "Task not found in database!")
+        
+        from database import operations
+        # BỎ LOGIC MOVE TO COMPLETED - Task Done vẫn ở trong project
+        self.run_operation(operations.update_task, self.current_user.username,
+                           operations.project_ref(project), operations.task_ref(task), task_data,
+                           on_success=saved, error_message="Failed to update task")
+    
     def edit_task_legacy(self, project, task):
         """Edit task cho dữ liệu legacy không có ID - BỎ COMPLETED LOGIC"""
+        from .edit_task_dialog import EditTaskDialog
         # Hiển thị edit dialog
         dialog = EditTaskDialog(task, self)
         result = dialog.exec_()
@@ -633,177 +808,47 @@ class MainWindow(QMainWindow):
             # Update task
             task_data = dialog.get_task_data()
             
-            # Invalidate cache trước khi update
-            db_connection.invalidate_cache()
-            
-            # Lấy lại user mới nhất từ server
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Tìm lại project và task bằng name
-            current_project = None
-            for p in current_user.projects:
-                if p.name == project.name:
-                    current_project = p
-                    break
-            
-            if current_project:
-                current_task = None
-                for t in current_project.tasks:
-                    if t.title == task.title and t.created_at == task.created_at:
-                        current_task = t
-                        break
-                
-                if current_task:
-                    current_task.title = task_data['title']
-                    current_task.description = task_data['description']
-                    current_task.status = task_data['status']
-                    current_task.deadline = task_data['deadline']
-                    
-                    # BỎ LOGIC MOVE TO COMPLETED
-                    # if old_status != "Done" and task_data['status'] == "Done":
-                    #     self.move_task_to_completed(current_project, current_task, current_user)
-            
-            transaction.commit()
-            self.current_user = current_user
-            self.refresh_tree()
-            QMessageBox.information(self, "Success", "Task updated successfully!")
+            self.save_task(project, task, task_data)
             
         elif result == 2:  # Delete task
             self.delete_task_legacy(project, task)
     
     def refresh_tree(self):
-        """Refresh tree widget với preserve expand/collapse state"""
-        
-        # 🔄 LƯU TRẠNG THÁI EXPAND/COLLAPSE TRƯỚC KHI REFRESH
-        expanded_projects = {}
-        
-        # Lưu trạng thái của tất cả project items
-        for i in range(self.tree_widget.topLevelItemCount()):
-            project_item = self.tree_widget.topLevelItem(i)
-            if project_item:
-                # Lấy project identifier từ data hoặc text
-                project_id = project_item.data(0, Qt.UserRole)
-                if not project_id:
-                    project_text = project_item.text(0)
-                    project_id = project_text.split(' (')[0] if ' (' in project_text else project_text
-                    # Remove emoji if present
-                    if project_id.startswith('✅ '):
-                        project_id = project_id[2:]
-                
-                # Lưu trạng thái expanded
-                expanded_projects[str(project_id)] = project_item.isExpanded()
-        
-        # Clear tree như bình thường
-        self.tree_widget.clear()
-        
-        if self.current_user and self.current_user.projects:
-            for project in self.current_user.projects:
-                project_item = QTreeWidgetItem(self.tree_widget)
-                
-                # Hiển thị tên project với thống kê (có ✅ nếu fully completed)
-                total_tasks = len(project.tasks)
-                completed_tasks = sum(1 for task in project.tasks if task.status == "Done")
-                
-                # Check if project is fully completed
-                is_project_completed = total_tasks > 0 and completed_tasks == total_tasks
-                
-                if is_project_completed:
-                    display_name = f"✅ {project.name} ({completed_tasks}/{total_tasks})"
-                else:
-                    display_name = f"{project.name} ({completed_tasks}/{total_tasks})"
-                
-                project_item.setText(0, display_name)
-                project_item.setText(1, "Active")
-                
-                # LƯU PROJECT ID VÀO DATA của item
-                if hasattr(project, 'id'):
-                    project_item.setData(0, Qt.UserRole, project.id)
-                    project_item.setToolTip(0, f"Project: {project.name}\nID: {project.id}\nCreated: {project.created_at.strftime('%Y-%m-%d')}")
-                    project_identifier = str(project.id)
-                else:
-                    project_item.setData(0, Qt.UserRole, project.name)
-                    project_item.setToolTip(0, f"Project: {project.name}\nCreated: {project.created_at.strftime('%Y-%m-%d')}")
-                    project_identifier = str(project.name)
-                
-                # 🎨 PROJECT COLORING
-                if is_project_completed:
-                    # Project hoàn thành - màu xanh
-                    for col in range(3):
-                        project_item.setBackground(col, QColor(144, 238, 144))  # Light green
-                else:
-                    # Project chưa hoàn thành - màu mặc định
-                    for col in range(3):
-                        project_item.setBackground(col, QColor(245, 245, 245))  # Light gray
-                
-                # Đếm tasks theo status
-                todo_count = sum(1 for task in project.tasks if task.status == "To Do")
-                doing_count = sum(1 for task in project.tasks if task.status == "Doing") 
-                done_count = sum(1 for task in project.tasks if task.status == "Done")
-                
-                project_item.setText(2, f"Tasks: {len(project.tasks)} (Todo: {todo_count}, Doing: {doing_count}, Done: {done_count})")
-                
-                # HIỂN THỊ TẤT CẢ TASKS (bao gồm Done)
-                for task in project.tasks:
-                    task_item = QTreeWidgetItem(project_item)
-                    
-                    # Hiển thị tên task với icon
-                    if hasattr(task, 'get_display_name'):
-                        display_name = task.get_display_name()
-                    else:
-                        status_icon = {"To Do": "📋", "Doing": "⚡", "Done": "✅"}
-                        icon = status_icon.get(task.status, "📋")
-                        display_name = f"{icon} {task.title}"
-                    
-                    task_item.setText(0, display_name)
-                    task_item.setText(1, task.status)
-                    task_item.setText(2, task.deadline)
-                    
-                    # LƯU TASK ID VÀO DATA của item
-                    if hasattr(task, 'id'):
-                        task_item.setData(0, Qt.UserRole, task.id)
-                        task_item.setToolTip(0, f"Task: {task.title}\nID: {task.id}\nCreated: {task.created_at.strftime('%Y-%m-%d')}")
-                    else:
-                        task_item.setData(0, Qt.UserRole, task.title)
-                        task_item.setToolTip(0, f"Task: {task.title}\nCreated: {task.created_at.strftime('%Y-%m-%d')}")
-                    
-                    # Màu sắc theo status
-                    if task.status == "Done":
-                        for col in range(3):
-                            task_item.setBackground(col, QColor(200, 255, 200))  # Green for completed tasks
-                    elif task.status == "Doing":
-                        for col in range(3):
-                            task_item.setBackground(col, QColor(255, 255, 200))  # Yellow for in-progress
-                    else:  # To Do
-                        for col in range(3):
-                            task_item.setBackground(col, QColor(255, 230, 230))  # Light red for pending
-            
-            # 🔄 KHÔI PHỤC TRẠNG THÁI EXPAND/COLLAPSE
-            if project_identifier in expanded_projects:
-                was_expanded = expanded_projects[project_identifier]
-                project_item.setExpanded(was_expanded)
-            else:
-                # Mặc định expand cho projects mới hoặc lần đầu
-                project_item.setExpanded(True)
+        """Đồng bộ tree view với dữ liệu hiện tại, chỉ áp dụng phần thay đổi.
         
-        else:
-            # Hiển thị thông báo nếu chưa có projects
-            info_item = QTreeWidgetItem(self.tree_widget)
-            info_item.setText(0, "No projects yet. Create your first project!")
-            info_item.setText(1, "")
-            info_item.setText(2, "Use 'New Project' button to get started")
-            for col in range(3):
-                info_item.setBackground(col, QColor(240, 240, 240))
+        Model giữ nguyên các dòng cũ nên trạng thái expand, selection và vị trí
+        scroll được giữ nguyên; task chỉ được load khi dòng của nó được hiển thị.
+        """
+        self.tree_model.refresh(self.current_user)
+        self.update_tag_filter_options()
+    
+    def refresh_projects(self, project_identifiers):
+        """Chỉ đồng bộ lại các project được chỉ định, giữ nguyên phần còn lại của cây"""
+        if not self.tree_model.refresh_projects(project_identifiers):
+            # Project đã bị xóa ở client khác
+            self.refresh_tree()
+    
+    def expand_new_projects(self, parent, first, last):
+        """Expand các project vừa được thêm vào model"""
+        if parent.isValid():
+            return
+        for row in range(first, last + 1):
+            index = self.tree_model.index(row, 0)
+            if not self.tree_model.is_placeholder(index):
+                self.tree_view.expand(index)
     
     def closeEvent(self, event):
         """Xử lý khi đóng ứng dụng"""
         if self.refresh_timer:
             self.refresh_timer.stop()
+        # Đóng connection của worker trước khi đóng database
+        self.db_client.stop()
         db_connection.close()
         event.accept()
 
     def edit_task_legacy(self, project, task):
         """Edit task cho dữ liệu legacy không có ID - BỎ COMPLETED LOGIC"""
+        from .edit_task_dialog import EditTaskDialog
         # Hiển thị edit dialog
         dialog = EditTaskDialog(task, self)
         result = dialog.exec_()
@@ -812,41 +857,7 @@ class MainWindow(QMainWindow):
             # Update task
             task_data = dialog.get_task_data()
             
-            # Invalidate cache trước khi update
-            db_connection.invalidate_cache()
-            
-            # Lấy lại user mới nhất từ server
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Tìm lại project và task bằng name
-            current_project = None
-            for p in current_user.projects:
-                if p.name == project.name:
-                    current_project = p
-                    break
-            
-            if current_project:
-                current_task = None
-                for t in current_project.tasks:
-                    if t.title == task.title and t.created_at == task.created_at:
-                        current_task = t
-                        break
-                
-                if current_task:
-                    current_task.title = task_data['title']
-                    current_task.description = task_data['description']
-                    current_task.status = task_data['status']
-                    current_task.deadline = task_data['deadline']
-                    
-                    # BỎ LOGIC MOVE TO COMPLETED
-                    # if old_status != "Done" and task_data['status'] == "Done":
-                    #     self.move_task_to_completed(current_project, current_task, current_user)
-            
-            transaction.commit()
-            self.current_user = current_user
-            self.refresh_tree()
-            QMessageBox.information(self, "Success", "Task updated successfully!")
+            self.save_task(project, task, task_data)
             
         elif result == 2:  # Delete task
             self.delete_task_legacy(project, task)
@@ -894,17 +905,18 @@ class MainWindow(QMainWindow):
     
     def show_context_menu(self, position):
         """Hiển thị context menu cho items"""
-        item = self.tree_widget.itemAt(position)
-        if not item:
+        index = self.tree_view.indexAt(position)
+        if not index.isValid():
             return
+        index = index.sibling(index.row(), 0)
         
         menu = QMenu(self)
         
-        if item.parent() is None:  # Project item
+        if not index.parent().isValid():  # Project item
             # 🔧 CAPTURE DATA IMMEDIATELY TRƯỚC KHI TẠO LAMBDA
-            project_identifier = item.data(0, Qt.UserRole)
+            project_identifier = index.data(Qt.UserRole)
             if not project_identifier:
-                project_text = item.text(0)
+                project_text = index.data()
                 # Remove emoji if present
                 if project_text.startswith('✅ '):
                     project_text = project_text[2:]
@@ -931,18 +943,18 @@ class MainWindow(QMainWindow):
             
         else:  # Task item
             # 🔧 CAPTURE DATA IMMEDIATELY CHO TASK
-            project_item = item.parent()
-            project_identifier = project_item.data(0, Qt.UserRole)
-            task_identifier = item.data(0, Qt.UserRole)
+            project_index = index.parent()
+            project_identifier = project_index.data(Qt.UserRole)
+            task_identifier = index.data(Qt.UserRole)
             
             if not project_identifier:
-                project_text = project_item.text(0)
+                project_text = project_index.data()
                 if project_text.startswith('✅ '):
                     project_text = project_text[2:]
                 project_identifier = project_text.split(' (')[0] if ' (' in project_text else project_text
             
             if not task_identifier:
-                task_text = item.text(0)
+                task_text = index.data()
                 task_identifier = task_text.split(' ', 1)[1] if task_text.startswith(('📋', '⚡', '✅')) else task_text
             
             # Context menu cho task
@@ -958,7 +970,7 @@ class MainWindow(QMainWindow):
             menu.addAction(delete_action)
         
         # Hiển thị menu tại vị trí click
-        menu.exec_(self.tree_widget.mapToGlobal(position))
+        menu.exec_(self.tree_view.viewport().mapToGlobal(position))
 
     def edit_project_by_identifier(self, project_identifier):
         """Edit project bằng identifier"""
@@ -988,6 +1000,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Project not found!")
             return
         
+        from .task_dialog import TaskDialog
         # Sử dụng task dialog với project đã chọn sẵn
         dialog = TaskDialog(self, self.current_user.projects)
         
@@ -1009,38 +1022,20 @@ class MainWindow(QMainWindow):
                 if reply == QMessageBox.No:
                     return
             
-            # Invalidate cache trước khi thêm
-            db_connection.invalidate_cache()
-            
-            # Lấy lại user mới nhất từ server
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Tìm lại project
-            if hasattr(project, 'id'):
-                current_project = current_user.get_project_by_id(project.id)
-            else:
-                current_project = current_user.get_project_by_name(project.name)
+            project_name = project.name
             
-            if current_project:
-                # Tạo task mới với UUID
-                new_task = Task(
-                    task_data['title'],
-                    task_data['description'],
-                    task_data['deadline'],
-                    task_data['status']
-                )
-                new_task.project_id = current_project.id if hasattr(current_project, 'id') else None
-                
-                current_project.tasks.append(new_task)
-                transaction.commit()
-                
-                # Cập nhật current_user
-                self.current_user = current_user
-                
-                self.refresh_tree()
+            def added(task_id):
+                if task_id is None:
+                    QMessageBox.warning(self, "Error", "Project not found in database!")
+                    return
                 QMessageBox.information(self, "Success", 
-                    f"Task '{task_data['title']}' added to project '{current_project.name}'!\nTask ID: {new_task.id[:8]}...")
+                    f"Task '{task_data['title']}' added to project '{project_name}'!\nTask ID: {task_id[:8]}...")
+            
+            from database import operations
+            # Tạo task mới với UUID trên worker thread
+            self.run_operation(operations.create_task, self.current_user.username,
+                               operations.project_ref(project), task_data,
+                               on_success=added, error_message="Failed to create task")
 
     def confirm_and_delete_task(self, project_identifier, task_identifier):
         """Xác nhận và xóa task"""
@@ -1092,52 +1087,21 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            try:
-                # Invalidate cache trước khi delete
-                db_connection.invalidate_cache()
-                
-                # Lấy lại user mới nhất từ server
-                root = db_connection.get_root()
-                current_user = root['users'][self.current_user.username]
-                
-                # Tìm và xóa project
-                project_to_remove = None
-                if hasattr(project, 'id'):
-                    # Tìm bằng ID
-                    for p in current_user.projects:
-                        if hasattr(p, 'id') and p.id == project.id:
-                            project_to_remove = p
-                            break
-                else:
-                    # Tìm bằng name
-                    for p in current_user.projects:
-                        if p.name == project.name:
-                            project_to_remove = p
-                            break
-                
-                if project_to_remove:
-                    project_name = project_to_remove.name  # Store name before deletion
-                    current_user.projects.remove(project_to_remove)
-                    transaction.commit()
-                    
-                    # Cập nhật current_user
-                    self.current_user = current_user
-                    
-                    # 🔄 REFRESH TREE NGAY SAU KHI DELETE
-                    self.refresh_tree()
-                    
-                    QMessageBox.information(
-                        self, 
-                        "Success", 
-                        f"Project '{project_name}' and {task_count} tasks have been deleted successfully!"
-                    )
-                else:
+            def deleted(project_name):
+                if project_name is None:
                     QMessageBox.warning(self, "Error", "Project not found in database!")
-                
-            except Exception as e:
-                transaction.abort()
-                QMessageBox.critical(self, "Error", f"Failed to delete project: {str(e)}")
-                print(f"Delete project error: {e}")  # Debug log
+                    return
+                QMessageBox.information(
+                    self, 
+                    "Success", 
+                    f"Project '{project_name}' and {task_count} tasks have been deleted successfully!"
+                )
+            
+            from database import operations
+            # Xóa project trên worker thread, tree tự refresh khi commit xong
+            self.run_operation(operations.delete_project, self.current_user.username,
+                               operations.project_ref(project),
+                               on_success=deleted, error_message="Failed to delete project")
 
     def delete_task_by_identifiers(self, project_identifier, task_identifier):
         """Xóa task bằng identifiers"""
@@ -1170,38 +1134,14 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Task not found!")
             return
         
-        try:
-            # Invalidate cache
-            db_connection.invalidate_cache()
-            
-            # Get fresh user data
-            root = db_connection.get_root()
-            current_user = root['users'][self.current_user.username]
-            
-            # Find and remove task
-            if hasattr(project, 'id'):
-                current_project = current_user.get_project_by_id(project.id)
-            else:
-                current_project = current_user.get_project_by_name(project.name)
-            
-            if current_project:
-                if hasattr(task, 'id'):
-                    task_to_remove = current_project.get_task_by_id(task.id)
-                else:
-                    task_to_remove = current_project.get_task_by_title(task.title)
-            
-                if task_to_remove:
-                    current_project.tasks.remove(task_to_remove)
-                    transaction.commit()
-                    
-                    self.current_user = current_user
-                    self.refresh_tree()
-                    QMessageBox.information(self, "Success", f"Task '{task.title}' deleted successfully!")
-                else:
-                    QMessageBox.warning(self, "Error", "Task not found in database!")
-            else:
-                QMessageBox.warning(self, "Error", "Project not found!")
-                
-        except Exception as e:
-            transaction.abort()
-            QMessageBox.critical(self, "Error", f"Failed to delete task: {str(e)}")
\ No newline at end of file
+        def deleted(task_title):
+            if task_title is None:
+                QMessageBox.warning(self, "Error", "Task not found in database!")
+                return
+            QMessageBox.information(self, "Success", f"Task '{task_title}' deleted successfully!")
+        
+        from database import operations
+        # Xóa task trên worker thread, tree tự refresh khi commit xong
+        self.run_operation(operations.delete_task, self.current_user.username,
+                           operations.project_ref(project), operations.task_ref(task),
+                           on_success=deleted, error_message="Failed to delete task")
\ No newline at end of file
@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout,
                            QLabel, QLineEdit, QPushButton, QTextEdit, 
                            QComboBox, QDateEdit, QMessageBox)
 from PyQt5.QtCore import QDate
+from utils.helpers import parse_tags
 
 class TaskDialog(QDialog):
     def __init__(self, parent=None, projects=None):
@@ -12,7 +13,7 @@ class TaskDialog(QDialog):
     def init_ui(self):
         self.setWindowTitle("New Task")
         self.setModal(True)
-        self.resize(400, 350)
+        self.resize(400, 400)
         
         layout = QVBoxLayout()
         
@@ -40,6 +41,12 @@ class TaskDialog(QDialog):
         self.deadline_edit.setCalendarPopup(True)
         layout.addWidget(self.deadline_edit)
         
+        # Tags
+        layout.addWidget(QLabel("Tags (comma separated):"))
+        self.tags_edit = QLineEdit()
+        self.tags_edit.setPlaceholderText("e.g. backend, urgent")
+        layout.addWidget(self.tags_edit)
+        
         # Project
         layout.addWidget(QLabel("Project:"))
         self.project_combo = QComboBox()
@@ -86,7 +93,8 @@ class TaskDialog(QDialog):
             'title': self.title_edit.text().strip(),
             'description': self.description_edit.toPlainText().strip(),
             'status': self.status_combo.currentText(),
-            'deadline': self.deadline_edit.date().toString('yyyy-MM-dd')
+            'deadline': self.deadline_edit.date().toString('yyyy-MM-dd'),
+            'tags': parse_tags(self.tags_edit.text())
         }
         
     def get_selected_project_index(self):
@@ -0,0 +1,79 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout,
+                           QTableWidget, QTableWidgetItem, QPushButton,
+                           QLabel, QHeaderView)
+from PyQt5.QtCore import Qt
+from .components.project_tree_model import STATUS_COLORS
+from utils.helpers import date_to_str
+
+class TaskListDialog(QDialog):
+    """Danh sách task dạng bảng (vd. Due Soon); double click để mở task"""
+
+    def __init__(self, title, rows, parent=None, group_header="When"):
+        """rows: list các (nhóm, project, task); group_header là tên cột nhóm"""
+        super().__init__(parent)
+        self.title = title
+        self.rows = rows
+        self.group_header = group_header
+        self.selected_task = None  # (project, task) được double click
+        self.init_ui()
+
+    def init_ui(self):
+        self.setWindowTitle(self.title)
+        self.setModal(True)
+        self.resize(800, 500)
+
+        layout = QVBoxLayout()
+
+        # Title
+        title_label = QLabel(f"{self.title} ({len(self.rows)} tasks)")
+        title_label.setStyleSheet("font-size: 18px; font-weight: bold; margin: 15px;")
+        title_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels([self.group_header, "Task", "Project", "Deadline", "Status"])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.populate_table()
+
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
+
+        # Style table
+        self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.cellDoubleClicked.connect(self.open_task)
+
+        layout.addWidget(self.table)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.reject)
+        close_btn.setStyleSheet("QPushButton { padding: 10px; font-weight: bold; }")
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def populate_table(self):
+        """Populate table with tasks"""
+        self.table.setRowCount(len(self.rows))
+        for row, (group, project, task) in enumerate(self.rows):
+            values = [str(group), task.title, project.name, date_to_str(task.deadline), task.status]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 4:
+                    item.setBackground(STATUS_COLORS.get(task.status, STATUS_COLORS["To Do"]))
+                self.table.setItem(row, column, item)
+
+    def open_task(self, row, column):
+        group, project, task = self.rows[row]
+        self.selected_task = (project, task)
+        self.accept()
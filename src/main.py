@@ -1,12 +1,22 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from gui.main_window import MainWindow
+from utils.startup_timing import startup_timer
 
 def main():
+    # Import PyQt và MainWindow khi chạy, không phải khi import module; các dialog
+    # và ZODB/ZEO được import lần đầu khi cần
+    startup_timer.begin('qt_init')
+    from PyQt5.QtWidgets import QApplication
     app = QApplication(sys.argv)
+    startup_timer.end('qt_init')
     
+    startup_timer.begin('import_main_window')
+    from gui.main_window import MainWindow
+    startup_timer.end('import_main_window')
+    
+    startup_timer.begin('window_init')
     window = MainWindow()
     window.show()
+    startup_timer.end('window_init')
     
     sys.exit(app.exec_())
 
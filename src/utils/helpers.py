@@ -1,10 +1,23 @@
-def format_date(date_str):
-    from datetime import datetime
+from datetime import date, datetime
+
+def format_date(value):
+    """Chuyển deadline (date, datetime hoặc chuỗi 'YYYY-MM-DD') thành date, None nếu trống/sai"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
     try:
-        return datetime.strptime(date_str, "%Y-%m-%d").date()
-    except ValueError:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
         return None
 
+def date_to_str(value):
+    """Hiển thị deadline dạng 'YYYY-MM-DD' (chuỗi rỗng nếu không có)"""
+    parsed = format_date(value)
+    return parsed.isoformat() if parsed else ""
+
 def validate_task_status(status):
     valid_statuses = ["To Do", "Doing", "Done"]
     return status in valid_statuses
@@ -14,4 +27,27 @@ def show_message(title, message):
     msg = QMessageBox()
     msg.setWindowTitle(title)
     msg.setText(message)
-    msg.exec_()
\ No newline at end of file
+    msg.exec_()
+
+def tokenize(text):
+    """Tách text thành các token thường, bỏ dấu (vd. 'Báo cáo' -> ['bao', 'cao'])"""
+    import re
+    import unicodedata
+    if not text:
+        return []
+    text = text.lower().replace('đ', 'd')
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r'\w+', text)
+
+def parse_tags(text):
+    """Tách chuỗi tags phân cách bởi dấu phẩy thành list tag (thường, không trùng)"""
+    tags = []
+    for tag in (text or '').split(','):
+        tag = ' '.join(tag.split()).lower()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+def tags_to_str(tags):
+    return ', '.join(tags or ())
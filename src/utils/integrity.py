@@ -0,0 +1,317 @@
+"""Kiểm tra tính toàn vẹn dữ liệu song song.
+
+Users được chia thành từng nhóm cho một process pool. Mỗi worker mở storage
+riêng ở chế độ read-only (ZEO ClientStorage, hoặc FileStorage read-only của
+một bản Data.fs) và mọi worker đọc cùng một snapshot (connection lịch sử at
+TID lúc bắt đầu), nên kết quả nhất quán kể cả khi client khác đang ghi.
+
+Chạy: python -m utils.integrity [--workers N] [--storage Data.fs] [--output report.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from functools import partial
+import ZODB
+from database.models import TASK_STATUSES
+from database.schema import SCHEMA_VERSION, get_schema_version
+from config.settings import DATABASE_CONFIG, MIGRATION_CONFIG
+from utils.helpers import format_date
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Database của process worker (mở một lần trong initializer của pool)
+_worker_db = None
+
+
+def _issue(severity, check, message, user=None, project=None, task=None):
+    return {'severity': severity, 'check': check, 'user': user,
+            'project': project, 'task': task, 'message': message}
+
+
+def validate_user(username, user):
+    """Kiểm tra một user, trả về (list issue, thống kê)"""
+    issues = []
+    stats = {'users': 1, 'projects': 0, 'tasks': 0, 'project_ids': []}
+
+    def report(severity, check, message, project=None, task=None):
+        issues.append(_issue(severity, check, message, username,
+                             getattr(project, 'id', getattr(project, 'name', None)),
+                             getattr(task, 'id', getattr(task, 'title', None))))
+
+    project_names = Counter()
+    task_ids = Counter()
+    expected_deadlines = {}
+    expected_tags = {}
+
+    for project in user.projects:
+        stats['projects'] += 1
+        project_id = getattr(project, 'id', None)
+        project_names[project.name] += 1
+        if project_id is None:
+            report(ERROR, 'project_id', "Project has no ID", project)
+        else:
+            stats['project_ids'].append(project_id)
+        if getattr(project, 'owner_username', username) != username:
+            report(ERROR, 'project_owner', f"Owner is '{project.owner_username}'", project)
+
+        task_titles = Counter()
+        status_counts = dict.fromkeys(TASK_STATUSES, 0)
+        for task in project.tasks:
+            stats['tasks'] += 1
+            task_titles[task.title] += 1
+            task_id = getattr(task, 'id', None)
+            if task_id is None:
+                report(ERROR, 'task_id', "Task has no ID", project, task)
+                continue
+            task_ids[task_id] += 1
+            if task.project_id != project_id:
+                report(ERROR, 'task_project_id',
+                       f"Task project_id {task.project_id} does not match its project", project, task)
+            if task.status in status_counts:
+                status_counts[task.status] += 1
+            else:
+                report(ERROR, 'task_status', f"Unknown status '{task.status}'", project, task)
+
+            deadline = format_date(task.deadline)
+            if deadline is not None and task.status != "Done":
+                expected_deadlines[(deadline, task_id)] = project_id
+            for tag in getattr(task, 'tags', None) or ():
+                expected_tags.setdefault(tag, {})[task_id] = project_id
+
+        for title, count in task_titles.items():
+            if count > 1:
+                report(WARNING, 'duplicate_task_title', f"Task title '{title}' used {count} times", project)
+
+        if getattr(project, 'status_counts', None) is None:
+            report(ERROR, 'status_counts', "Status counters missing", project)
+        elif project.get_status_counts() != status_counts:
+            report(ERROR, 'status_counts',
+                   f"Status counters {project.get_status_counts()} do not match tasks {status_counts}", project)
+
+        if project.has_indexes():
+            _validate_project_indexes(project, status_counts, report)
+
+    for name, count in project_names.items():
+        if count > 1:
+            report(WARNING, 'duplicate_project_name', f"Project name '{name}' used {count} times")
+    for task_id, count in task_ids.items():
+        if count > 1:
+            report(ERROR, 'duplicate_task_id', f"Task ID {task_id} used {count} times")
+
+    _validate_user_indexes(user, task_ids, expected_deadlines, expected_tags, report)
+    return issues, stats
+
+
+def _validate_project_indexes(project, status_counts, report):
+    tasks = project.tasks
+    if not tasks.check_length():
+        report(ERROR, 'collection_length', f"Task collection length counter {len(tasks)} is out of sync", project)
+    for title, task_id in project.tasks_by_title:
+        task = tasks.get(task_id)
+        if task is None or task.title != title:
+            report(ERROR, 'title_index', f"Title index entry '{title}' -> {task_id} is stale", project)
+    for status, count in status_counts.items():
+        indexed = sum(1 for _ in project.iter_status_order_keys(status))
+        if indexed != count:
+            report(ERROR, 'status_index', f"Status index '{status}' has {indexed} entries, expected {count}",
+                   project)
+    if len(project.tasks_by_deadline) != len(tasks):
+        report(ERROR, 'deadline_listing_index',
+               f"Deadline listing index has {len(project.tasks_by_deadline)} entries, expected {len(tasks)}",
+               project)
+
+
+def _validate_user_indexes(user, task_ids, expected_deadlines, expected_tags, report):
+    if user.has_indexes():
+        for name, project_id in user.projects_by_name:
+            project = user.get_project_by_id(project_id)
+            if project is None or project.name != name:
+                report(ERROR, 'project_name_index', f"Name index entry '{name}' -> {project_id} is stale")
+
+    if user.has_deadline_index() and dict(user.deadline_index.items()) != expected_deadlines:
+        report(ERROR, 'deadline_index',
+               f"Deadline index has {len(user.deadline_index)} entries, expected {len(expected_deadlines)}")
+
+    if user.has_text_index():
+        missing = [task_id for task_id in task_ids if task_id not in user.text_index]
+        if missing or len(user.text_index) != len(task_ids):
+            report(ERROR, 'text_index',
+                   f"Text index covers {len(user.text_index)} tasks, expected {len(task_ids)} "
+                   f"({len(missing)} missing)")
+
+    if user.has_tag_index():
+        indexed_tags = {tag: dict(tasks.items()) for tag, tasks in user.tag_index.items()}
+        if indexed_tags != expected_tags:
+            report(ERROR, 'tag_index', f"Tag index does not match task tags "
+                   f"({len(indexed_tags)} indexed tags, {len(expected_tags)} expected)")
+        for tag, count in user.get_tags():
+            if count != len(indexed_tags.get(tag, ())):
+                report(ERROR, 'tag_count', f"Tag '{tag}' counter is {count}, index has "
+                       f"{len(indexed_tags.get(tag, ()))} tasks")
+
+
+def _open_storage(address, storage_path):
+    if storage_path:
+        from ZODB.FileStorage import FileStorage
+        return FileStorage(storage_path, read_only=True)
+    from ZEO.ClientStorage import ClientStorage
+    return ClientStorage(tuple(address), read_only=True,
+                         cache_size=DATABASE_CONFIG['client_cache_size'])
+
+
+def _init_worker(address, storage_path):
+    global _worker_db
+    _worker_db = ZODB.DB(_open_storage(address, storage_path))
+
+
+def _validate_chunk(usernames, tid):
+    """Kiểm tra một nhóm users trên snapshot TID của database worker"""
+    connection = _worker_db.open(at=tid)
+    try:
+        users = connection.root()['users']
+        issues = []
+        stats = Counter()
+        project_ids = []
+        for username in usernames:
+            user_issues, user_stats = validate_user(username, users[username])
+            issues.extend(user_issues)
+            project_ids.extend((project_id, username) for project_id in user_stats.pop('project_ids'))
+            stats.update(user_stats)
+        return issues, dict(stats), project_ids
+    finally:
+        connection.close()
+        _worker_db.cacheMinimize()
+
+
+class IntegrityValidator:
+    """Chia users cho process pool và gộp kết quả thành một report"""
+
+    def __init__(self, address=None, storage_path=None, workers=None, chunk_size=None):
+        self.address = address or (DATABASE_CONFIG['host'], DATABASE_CONFIG['port'])
+        self.storage_path = storage_path
+        self.workers = workers or MIGRATION_CONFIG['validate_workers'] or os.cpu_count() or 1
+        self.chunk_size = max(chunk_size or MIGRATION_CONFIG['validate_chunk_size'], 1)
+
+    def run(self):
+        """Chạy kiểm tra, trả về report (dict có thể ghi ra JSON)"""
+        global _worker_db
+        started = time.perf_counter()
+        issues = []
+
+        db = ZODB.DB(_open_storage(self.address, self.storage_path))
+        try:
+            tid = db.lastTransaction()
+            connection = db.open(at=tid)
+            root = connection.root()
+            users = root.get('users', {})
+            usernames = list(users.keys())
+            schema_version = get_schema_version(root)
+            if schema_version != SCHEMA_VERSION:
+                issues.append(_issue(WARNING, 'schema_version',
+                                     f"Schema version {schema_version}, application expects {SCHEMA_VERSION}"))
+            if 'user_count' in root and root['user_count']() != len(usernames):
+                issues.append(_issue(ERROR, 'user_count',
+                                     f"User count {root['user_count']()} does not match {len(usernames)} users"))
+            connection.close()
+
+            chunks = [usernames[start:start + self.chunk_size]
+                      for start in range(0, len(usernames), self.chunk_size)]
+            workers = min(self.workers, len(chunks)) or 1
+            validate = partial(_validate_chunk, tid=tid)
+            if workers == 1:
+                # Ít user: kiểm tra ngay trong process hiện tại
+                _worker_db = db
+                try:
+                    results = list(map(validate, chunks))
+                finally:
+                    _worker_db = None
+            else:
+                # spawn: không fork process đang có thread của ZEO client
+                context = multiprocessing.get_context('spawn')
+                with context.Pool(workers, initializer=_init_worker,
+                                  initargs=(self.address, self.storage_path)) as pool:
+                    results = list(pool.imap_unordered(validate, chunks))
+        finally:
+            db.close()
+
+        stats = Counter(users=0, projects=0, tasks=0)
+        owners = {}
+        for chunk_issues, chunk_stats, project_ids in results:
+            issues.extend(chunk_issues)
+            stats.update(chunk_stats)
+            for project_id, username in project_ids:
+                if project_id in owners:
+                    issues.append(_issue(ERROR, 'duplicate_project_id',
+                                         f"Project ID also used by user '{owners[project_id]}'",
+                                         username, project_id))
+                else:
+                    owners[project_id] = username
+
+        issues.sort(key=lambda issue: (issue['user'] or '', issue['check'], issue['project'] or '',
+                                       issue['task'] or ''))
+        errors = sum(1 for issue in issues if issue['severity'] == ERROR)
+        return {
+            'ok': errors == 0,
+            'checked_at': datetime.now().isoformat(),
+            'snapshot_tid': tid.hex(),
+            'schema_version': schema_version,
+            'workers': workers,
+            'duration': round(time.perf_counter() - started, 3),
+            'users': stats['users'],
+            'projects': stats['projects'],
+            'tasks': stats['tasks'],
+            'errors': errors,
+            'warnings': len(issues) - errors,
+            'summary': dict(Counter(issue['check'] for issue in issues)),
+            'issues': issues,
+        }
+
+
+def print_report(report, limit=50):
+    print(f"🔍 Checked {report['users']} users, {report['projects']} projects, {report['tasks']} tasks "
+          f"with {report['workers']} workers in {report['duration']:.1f}s")
+    if not report['issues']:
+        print("✅ Data integrity validation passed!")
+        return
+    icon = "⚠️" if report['ok'] else "❌"
+    print(f"{icon} {report['errors']} errors, {report['warnings']} warnings:")
+    # Lỗi trước, cảnh báo sau
+    issues = sorted(report['issues'], key=lambda issue: issue['severity'] != ERROR)
+    for issue in issues[:limit]:
+        where = "/".join([issue['user'] or ''] + [str(part)[:8] for part in (issue['project'], issue['task']) if part])
+        print(f"  - [{issue['severity']}] {issue['check']} {where}: {issue['message']}")
+    if len(report['issues']) > limit:
+        print(f"  ... {len(report['issues']) - limit} more (see the JSON report)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.integrity",
+                                     description="Validate Task Manager data integrity")
+    parser.add_argument('--workers', type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument('--chunk-size', type=int, help="users per worker task")
+    parser.add_argument('--storage', help="validate a Data.fs file (read-only) instead of the ZEO server")
+    parser.add_argument('--output', help="write the JSON report to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    report = IntegrityValidator(storage_path=args.storage, workers=args.workers,
+                                chunk_size=args.chunk_size).run()
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, indent=2, ensure_ascii=False)
+            print(f"📝 Report written to {args.output}")
+    return 0 if report['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
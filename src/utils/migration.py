@@ -1,288 +1,479 @@
-from logging import DEBUG
+"""Migration dữ liệu cũ lên schema hiện tại (database.schema.SCHEMA_VERSION).
+
+Mỗi thay đổi schema là một generation trong GENERATIONS; database lưu version
+đã đạt được ở root['schema_version'] và chỉ các generation mới hơn được chạy.
+Chạy như một CLI riêng, không bao giờ từ GUI:
+
+    python -m utils.migration [--batch-size N] [--check] [--validate]
+
+MigrationRunner commit theo từng batch nhỏ trên connection riêng và ghi
+checkpoint của từng user vào root['migration_checkpoints'], nên khi bị dừng
+giữa chừng chỉ cần chạy lại lệnh để tiếp tục từ checkpoint cuối.
+"""
+import argparse
+import sys
+import time
 import uuid
-import transaction
-from datetime import datetime
+from itertools import islice
+from persistent.mapping import PersistentMapping
 from database.connection import db_connection
-from database.models import Task
-from PyQt5.QtWidgets import QMessageBox  
+from database.models import OrderedCollection, Task
+from BTrees.OOBTree import OOBTree, OOTreeSet
+from BTrees.Length import Length
+from database.schema import SCHEMA_VERSION, get_schema_version, set_schema_version
+from config.settings import MIGRATION_CONFIG
+
+CHECKPOINT_KEY = 'migration_checkpoints'
+# username -> index đang dựng dở (indexes, project và order key của batch cuối)
+INDEX_BUILD_KEY = 'migration_index_builds'
+# project id -> index task của project đang dựng dở (indexes, tasks mới, order key của batch cuối)
+PROJECT_BUILD_KEY = 'migration_project_builds'
+USER_DONE = 'done'
+
+# (version, mô tả, evolve(runner)), theo thứ tự version
+GENERATIONS = []
+
+
+def generation(version, description):
+    """Đăng ký evolve(runner) nâng database từ version - 1 lên version"""
+    def register(evolve):
+        GENERATIONS.append((version, description, evolve))
+        GENERATIONS.sort(key=lambda entry: entry[0])
+        return evolve
+    return register
+
+
+class MigrationRunner:
+    """Migrate từng user theo batch, mỗi batch một transaction (retry khi conflict).
+
+    Checkpoint của user là project cuối cùng đã migrate xong, hoặc USER_DONE.
+    Mỗi bước đều idempotent (kiểm tra lại trước khi sửa), nên chạy lại một
+    batch đã commit một phần là an toàn.
+    """
+
+    def __init__(self, batch_size=None, connection=None):
+        self.batch_size = max(batch_size or MIGRATION_CONFIG['batch_size'], 1)
+        self.connection = connection
+        self.items = 0
+        self.commits = 0
+        self.started_at = None
+        self._last_report = 0
+
+    def run(self):
+        """Chạy các generation còn thiếu, trả về True nếu database đã ở SCHEMA_VERSION"""
+        own_connection = self.connection is None
+        if own_connection:
+            self.connection = db_connection.open_worker_connection()
+
+        self.started_at = self._last_report = time.perf_counter()
+        try:
+            if not GENERATIONS or GENERATIONS[-1][0] != SCHEMA_VERSION:
+                raise RuntimeError(f"No migration generation registered for schema version {SCHEMA_VERSION}")
+
+            current = get_schema_version(self.connection.root())
+            if current > SCHEMA_VERSION:
+                raise RuntimeError(f"Database schema version {current} is newer than "
+                                   f"this application ({SCHEMA_VERSION})")
+            if current == SCHEMA_VERSION:
+                print(f"✅ Database schema is up to date (version {current})")
+                return True
+
+            print(f"🔄 Migrating schema {current} -> {SCHEMA_VERSION} (batch size {self.batch_size})...")
+            for version, description, evolve in GENERATIONS:
+                if version <= current:
+                    continue
+                print(f"📦 Generation {version}: {description}")
+                evolve(self)
+                self.commit(lambda root, version=version: self._finish_generation(root, version))
+
+            self.report("✅ Migration completed:")
+            return True
+
+        except Exception as e:
+            self.connection.transaction_manager.abort()
+            print(f"❌ Migration failed: {e}")
+            self.report("⏸️ Stopped after")
+            print("   Progress is saved up to the last checkpoint, run the migration again to resume.")
+            return False
+        finally:
+            if own_connection:
+                self.connection.close()
+                self.connection = None
+
+    def migrate_user(self, username):
+        checkpoint = self._get_checkpoint(username)
+        if checkpoint == USER_DONE:
+            return
+        user = self.connection.root()['users'][username]
+        print(f"📝 Migrating user: {username}")
+
+        for project in self._projects_after(user, checkpoint):
+            self.migrate_project(username, project)
+
+        self.restore_completed_tasks(username, user)
+
+        # Index project (theo số project) dựng trong một transaction
+        if not user.has_indexes():
+            self.commit(lambda root: user.rebuild_project_indexes(), 1)
+            print(f"  ✅ Built project indexes for user: {username}")
+
+        self.build_task_indexes(username, user)
+
+        self.commit(lambda root: self._set_checkpoint(root, username, USER_DONE))
+
+    def build_task_indexes(self, username, user):
+        """Dựng các index task còn thiếu của user theo batch.
+
+        Index mới được điền vào bản nháp trong root[INDEX_BUILD_KEY], mỗi batch
+        một transaction kèm vị trí (project, order key) của task cuối, và chỉ
+        được gắn vào user khi đã đủ, nên client không bao giờ thấy index dựng dở.
+        """
+        build = self._get_build(INDEX_BUILD_KEY, username)
+        if build is None:
+            missing = user.get_missing_indexes()
+            if not missing:
+                return
+            self.commit(lambda root: self._start_index_build(root, username, user, missing), 0)
+            build = self._get_build(INDEX_BUILD_KEY, username)
+        elif build['project'] is not None:
+            print(f"  ⏩ Resuming index build after project {build['project'][:8]}")
+
+        projects = list(user.projects)
+        if build['project'] is not None:
+            done_position = next((position for position, project in enumerate(projects)
+                                  if project.id == build['project']), 0)
+            projects = projects[done_position:]
+
+        for project in projects:
+            after = build['order_key'] if project.id == build['project'] else None
+            while True:
+                entries = list(islice(project.tasks.iter_items(after), self.batch_size))
+                if not entries:
+                    break
+                self.commit(lambda root, project=project, entries=entries:
+                            self._index_batch(build, user, project, entries), len(entries))
+                after = entries[-1][0]
+
+        def install(root):
+            user.install_indexes(build['indexes'])
+            del root[INDEX_BUILD_KEY][username]
+
+        self.commit(install, 0)
+        print(f"  ✅ Built {', '.join(build['names'])} for user: {username}")
+
+    def _start_index_build(self, root, username, user, names):
+        if INDEX_BUILD_KEY not in root:
+            root[INDEX_BUILD_KEY] = OOBTree()
+        root[INDEX_BUILD_KEY][username] = PersistentMapping(
+            names=tuple(names), indexes=user.create_indexes(names), project=None, order_key=None)
+
+    def _get_build(self, key, name):
+        builds = self.connection.root().get(key)
+        return builds.get(name) if builds is not None else None
+
+    def _index_batch(self, build, user, project, entries):
+        user.index_tasks(project, [task for _, task in entries], build['indexes'])
+        build['project'] = project.id
+        build['order_key'] = entries[-1][0]
+
+    def _projects_after(self, user, checkpoint):
+        """Các project của user, bỏ qua các project đã xong trước checkpoint"""
+        projects = list(user.projects)
+        if checkpoint is not None:
+            done_position = next((position for position, project in enumerate(projects)
+                                  if getattr(project, 'id', None) == checkpoint), None)
+            if done_position is not None:
+                projects = projects[done_position + 1:]
+                print(f"  ⏩ Resuming after project {checkpoint[:8]}")
+        return projects
+
+    def rewrite_user_records(self, username):
+        """Ghi lại mọi project/task của user (theo batch) để lưu ở định dạng state mới"""
+        checkpoint = self._get_checkpoint(username)
+        if checkpoint == USER_DONE:
+            return
+        user = self.connection.root()['users'][username]
+        print(f"📝 Rewriting records of user: {username}")
+
+        for project in self._projects_after(user, checkpoint):
+            tasks = list(project.tasks)
+            for start in range(0, len(tasks), self.batch_size):
+                batch = tasks[start:start + self.batch_size]
+                self.commit(lambda root, batch=batch: self._mark_changed(batch), len(batch))
+
+            def finish_project(root, project=project):
+                self._mark_changed([project])
+                self._set_checkpoint(root, username, project.id)
+
+            self.commit(finish_project, 1)
+
+        self.commit(lambda root: self._set_checkpoint(root, username, USER_DONE))
+
+    def _mark_changed(self, objects):
+        for obj in objects:
+            obj._p_changed = True
+
+    def migrate_project(self, username, project):
+        """Thêm ID cho project và task theo batch, rồi dựng index/counter của project"""
+        pending = [task for task in project.tasks if not hasattr(task, 'id')]
+
+        def add_project_id(root):
+            if not hasattr(project, 'id'):
+                project.id = str(uuid.uuid4())
+                project.owner_username = username
+                project.is_archived = getattr(project, 'is_archived', False)
+                project.color = getattr(project, 'color', "#3498db")
+                print(f"  ✅ Added ID to project: {project.name}")
+
+        if not hasattr(project, 'id'):
+            self.commit(add_project_id, 1)
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            self.commit(lambda root, batch=batch: self._add_task_ids(project, batch), len(batch))
+        if pending:
+            print(f"    ✅ Added ID to {len(pending)} tasks in project: {project.name}")
+
+        if not self.build_project_indexes(username, project):
+            self.commit(lambda root: self._set_checkpoint(root, username, project.id), 0)
+
+    def build_project_indexes(self, username, project):
+        """Dựng các index/counter task còn thiếu của project theo batch.
+
+        Như build_task_indexes: index mới (và OrderedCollection thay cho
+        PersistentList cũ) được điền vào bản nháp trong root[PROJECT_BUILD_KEY],
+        mỗi batch một transaction kèm order key của task cuối, rồi được gắn vào
+        project cùng commit với checkpoint. Trả về False nếu không thiếu gì.
+        """
+        build = self._get_build(PROJECT_BUILD_KEY, project.id)
+        if build is None:
+            missing = project.get_missing_indexes()
+            if not missing:
+                return False
+            self.commit(lambda root: self._start_project_build(root, project, missing), 0)
+            build = self._get_build(PROJECT_BUILD_KEY, project.id)
+        elif build['order_key'] is not None:
+            print(f"  ⏩ Resuming task index build of project: {project.name}")
+
+        while self.commit(lambda root: self._project_index_batch(build, project)):
+            pass
+
+        def install(root):
+            project.install_task_indexes(build['indexes'], build['tasks'])
+            del root[PROJECT_BUILD_KEY][project.id]
+            self._set_checkpoint(root, username, project.id)
+
+        self.commit(install, 0)
+        print(f"  ✅ Built {', '.join(build['indexes'])} for project: {project.name}")
+        return True
+
+    def _start_project_build(self, root, project, names):
+        if PROJECT_BUILD_KEY not in root:
+            root[PROJECT_BUILD_KEY] = OOBTree()
+        # PersistentList cũ được chép dần sang một OrderedCollection mới
+        tasks = None if isinstance(project.tasks, OrderedCollection) else OrderedCollection()
+        root[PROJECT_BUILD_KEY][project.id] = PersistentMapping(
+            indexes=project.create_task_indexes(names), tasks=tasks, order_key=None)
+
+    def _project_index_batch(self, build, project):
+        """Index batch_size task tiếp theo, trả về số task đã index (0 khi xong)"""
+        tasks = build['tasks']
+        if tasks is None:
+            entries = list(islice(project.tasks.iter_items(build['order_key']), self.batch_size))
+        else:
+            copied = len(tasks)
+            for task in project.tasks[copied:copied + self.batch_size]:
+                tasks.append(task)
+            entries = list(tasks.iter_items(build['order_key']))
+        project.index_tasks(entries, build['indexes'])
+        if entries:
+            build['order_key'] = entries[-1][0]
+        return len(entries)
+
+    def _add_task_ids(self, project, tasks):
+        for task in tasks:
+            if not hasattr(task, 'id'):
+                task.id = str(uuid.uuid4())
+                task.project_id = project.id
+                task.priority = getattr(task, 'priority', "Medium")
+                task.tags = OOTreeSet(getattr(task, 'tags', None) or ())
+
+    def restore_completed_tasks(self, username, user):
+        """Đưa task trong user.completed_tasks (dữ liệu rất cũ) về lại project, theo batch"""
+        if not getattr(user, 'completed_tasks', None):
+            return
+        print(f"  🔄 Migrating {len(user.completed_tasks)} completed tasks back to projects...")
+
+        def restore_batch(root):
+            batch = list(user.completed_tasks[:self.batch_size])
+            for completed_task in batch:
+                target_project = None
+                if hasattr(completed_task, 'project_name'):
+                    target_project = next((p for p in user.projects if p.name == completed_task.project_name), None)
+
+                if target_project:
+                    restored_task = Task(
+                        completed_task.title,
+                        getattr(completed_task, 'description', ''),
+                        getattr(completed_task, 'deadline', ''),
+                        "Done"
+                    )
+                    restored_task.id = str(uuid.uuid4())
+                    if hasattr(completed_task, 'created_at'):
+                        restored_task.created_at = completed_task.created_at
+                    user.add_task(target_project, restored_task)
+            del user.completed_tasks[:len(batch)]
+            return len(batch)
+
+        while user.completed_tasks:
+            self.commit(restore_batch)
+        print(f"  🗑️ Cleared completed_tasks collection for user: {username}")
+
+    def _get_checkpoint(self, username):
+        checkpoints = self.connection.root().get(CHECKPOINT_KEY)
+        return checkpoints.get(username) if checkpoints is not None else None
+
+    def _set_checkpoint(self, root, username, value):
+        if CHECKPOINT_KEY not in root:
+            root[CHECKPOINT_KEY] = OOBTree()
+        root[CHECKPOINT_KEY][username] = value
+
+    def _finish_generation(self, root, version):
+        for key in (CHECKPOINT_KEY, INDEX_BUILD_KEY, PROJECT_BUILD_KEY):
+            if key in root:
+                del root[key]
+        set_schema_version(root, version)
+
+    def commit(self, operation, items=None):
+        """Chạy operation(root) trong một transaction; items=None thì lấy từ kết quả"""
+        result = db_connection.run_in_transaction(operation, connection=self.connection)
+        self.commits += 1
+        self.items += items if items is not None else (result or 0)
+        if time.perf_counter() - self._last_report >= MIGRATION_CONFIG['report_interval']:
+            self.report("⏱️ Progress:")
+        return result
+
+    def get_throughput(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def report(self, message):
+        self._last_report = time.perf_counter()
+        elapsed = self._last_report - self.started_at
+        print(f"{message} {self.items} items in {self.commits} commits, "
+              f"{elapsed:.1f}s ({self.get_throughput():.0f} items/s)")
+
+
+def convert_users_registry(root):
+    """Chuyển root['users'] từ PersistentMapping sang OOBTree + Length counter"""
+    users = root['users']
+    if not isinstance(users, OOBTree):
+        new_users = OOBTree()
+        new_users.update(users)
+        root['users'] = users = new_users
+    root['user_count'] = Length(len(users))
+    return len(users)
+
+
+@generation(1, "users registry as OOBTree with a user counter")
+def evolve_users_registry(runner):
+    if DataMigration.users_registry_migration_needed(runner.connection.root()):
+        runner.commit(convert_users_registry, 1)
+        print("  ✅ Migrated users registry")
+
+
+@generation(2, "IDs, task indexes, status counters and per-user indexes")
+def evolve_user_data(runner):
+    for username in list(runner.connection.root().get('users', {}).keys()):
+        runner.migrate_user(username)
+
+
+@generation(3, "compact task and project records")
+def evolve_compact_records(runner):
+    for username in list(runner.connection.root().get('users', {}).keys()):
+        runner.rewrite_user_records(username)
+
 
 class DataMigration:
-    """Migration script để thêm UUID cho dữ liệu cũ"""
-    
+    """Kiểm tra và chạy migration cho dữ liệu cũ"""
+
+    @staticmethod
+    def migrate_to_uuid(batch_size=None):
+        """Nâng database lên schema hiện tại (qua MigrationRunner)"""
+        return MigrationRunner(batch_size).run()
+
     @staticmethod
-    def migrate_to_uuid():
-        """Thêm UUID cho projects và tasks chưa có"""
-        print("🔄 Starting data migration...")
-        
+    def users_registry_migration_needed(root):
+        """Kiểm tra root['users'] còn là PersistentMapping cũ hoặc thiếu user counter"""
+        return 'users' in root and (not isinstance(root['users'], OOBTree) or 'user_count' not in root)
+
+    @staticmethod
+    def migrate_users_registry():
+        """Chuyển root['users'] từ PersistentMapping sang OOBTree + Length counter"""
+        print("🔄 Migrating users registry...")
+
         try:
-            root = db_connection.get_root()
-            users = root.get('users', {})
-            
-            migration_count = 0
-            
-            for username, user in users.items():
-                print(f"📝 Migrating user: {username}")
-                
-                for project in user.projects:
-                    if not hasattr(project, 'id'):
-                        project.id = str(uuid.uuid4())
-                        project.owner_username = username
-                        project.is_archived = getattr(project, 'is_archived', False)
-                        project.color = getattr(project, 'color', "#3498db")
-                        migration_count += 1
-                        print(f"  ✅ Added ID to project: {project.name}")
-                    
-                    for task in project.tasks:
-                        if not hasattr(task, 'id'):
-                            task.id = str(uuid.uuid4())
-                            task.project_id = project.id
-                            task.priority = getattr(task, 'priority', "Medium")
-                            task.tags = getattr(task, 'tags', [])
-                            migration_count += 1
-                            print(f"    ✅ Added ID to task: {task.title}")
-                
-                if hasattr(user, 'completed_tasks') and user.completed_tasks:
-                    print(f"  🔄 Migrating {len(user.completed_tasks)} completed tasks back to projects...")
-                    
-                    for completed_task in list(user.completed_tasks):
-                        target_project = None
-                        if hasattr(completed_task, 'project_name'):
-                            target_project = next((p for p in user.projects if p.name == completed_task.project_name), None)
-                        
-                        if target_project:
-                            restored_task = Task(
-                                completed_task.title,
-                                getattr(completed_task, 'description', ''),
-                                getattr(completed_task, 'deadline', ''),
-                                "Done" 
-                            )
-                            restored_task.id = str(uuid.uuid4())
-                            restored_task.project_id = target_project.id
-                            if hasattr(completed_task, 'created_at'):
-                                restored_task.created_at = completed_task.created_at
-                            
-                            target_project.tasks.append(restored_task)
-                            migration_count += 1
-                            print(f"    ↩️ Restored completed task: {completed_task.title} to project: {target_project.name}")
-                    
-                    user.completed_tasks.clear()
-                    print(f"  🗑️ Cleared completed_tasks collection for user: {username}")
-            
-            transaction.commit()
-            print(f"✅ Migration completed! {migration_count} items migrated.")
+            count = db_connection.run_in_transaction(convert_users_registry)
+            print(f"✅ Users registry migrated! {count} users.")
             return True
-            
+
         except Exception as e:
-            print(f"❌ Migration failed: {e}")
-            transaction.abort()
+            print(f"❌ Users registry migration failed: {e}")
             return False
-    
+
     @staticmethod
-    def validate_data_integrity():
-        """Kiểm tra tính toàn vẹn dữ liệu"""
+    def validate_data_integrity(workers=None):
+        """Kiểm tra tính toàn vẹn dữ liệu (song song, xem utils.integrity)"""
+        from utils.integrity import IntegrityValidator, print_report
         print("🔍 Validating data integrity...")
-        
+
         try:
-            root = db_connection.get_root()
-            users = root.get('users', {})
-            
-            issues = []
-            
-            for username, user in users.items():
-                project_names = {}
-                for project in user.projects:
-                    if project.name in project_names:
-                        issues.append(f"User {username}: Duplicate project name '{project.name}'")
-                    else:
-                        project_names[project.name] = project
-                    
-                    task_titles = {}
-                    for task in project.tasks:
-                        if task.title in task_titles:
-                            issues.append(f"Project {project.name}: Duplicate task title '{task.title}'")
-                        else:
-                            task_titles[task.title] = task
-            
-            if issues:
-                print("⚠️ Data integrity issues found:")
-                for issue in issues:
-                    print(f"  - {issue}")
-            else:
-                print("✅ Data integrity validation passed!")
-            
-            return len(issues) == 0
-            
+            report = IntegrityValidator(workers=workers).run()
+            print_report(report)
+            return report['ok']
+
         except Exception as e:
             print(f"❌ Validation failed: {e}")
             return False
-    
+
     @staticmethod
     def check_migration_needed():
-        """Kiểm tra xem có cần migration không"""
+        """Kiểm tra xem có cần migration không (chỉ đọc root['schema_version'])"""
         try:
-            root = db_connection.get_root()
-            users = root.get('users', {})
-            
-            for user in users.values():
-                for project in user.projects:
-                    if not hasattr(project, 'id'):
-                        return True
-                    for task in project.tasks:
-                        if not hasattr(task, 'id'):
-                            return True
-                
-                if hasattr(user, 'completed_tasks') and user.completed_tasks:
-                    return True
-                    
-            return False
-            
+            return get_schema_version(db_connection.get_root()) < SCHEMA_VERSION
         except Exception as e:
             print(f"❌ Error checking migration: {e}")
             return False
 
-def run_migration_if_needed(self):
-    """Chạy migration cho dữ liệu cũ"""
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.migration",
+                                     description="Migrate Task Manager data to the current schema")
+    parser.add_argument('--batch-size', type=int, default=MIGRATION_CONFIG['batch_size'],
+                        help="objects migrated per transaction (default: %(default)s)")
+    parser.add_argument('--check', action='store_true', help="only check whether migration is needed")
+    parser.add_argument('--validate', action='store_true', help="validate data integrity after migrating")
+    args = parser.parse_args(argv)
+
+    if not db_connection.connect():
+        print("❌ Cannot connect to ZEO server")
+        return 2
     try:
-        from config.settings import DEBUG
-        if DEBUG:
-            print("🔍 Checking for migration needs...")
-        
-        if DataMigration.check_migration_needed():
-            print("📦 Running data migration...")
-            success = DataMigration.migrate_to_uuid()
-            if success:
-                DataMigration.validate_data_integrity()
-            else:
-                print("⚠️ Migration failed, but continuing...")
-        else:
-            if DEBUG:
-                print("✅ No migration needed")
-        
-    except ImportError as e:
-        print(f"⚠️ Migration import error: {e}")
-        print("Continuing without migration...")
-    except Exception as e:
-        print(f"❌ Migration error: {e}")
-        print("Continuing without migration...")
-
-def edit_task_by_identifiers(self, project_identifier, task_identifier):
-    """Edit task bằng identifiers (ID hoặc name)"""
-    if not self.current_user:
-        return
-    
-    clean_project_name = project_identifier.split(' (')[0] if ' (' in project_identifier else project_identifier
-    clean_task_title = task_identifier.split(' ', 1)[1] if task_identifier.startswith(('📋', '⚡', '✅')) else task_identifier
-    
-    if hasattr(self.current_user, 'get_project_by_id'):
-        project = self.current_user.get_project_by_id(project_identifier)
-        if not project:  
-            project = self.current_user.get_project_by_name(clean_project_name)
-    else:
-        project = self.current_user.get_project_by_name(clean_project_name)
-    
-    if not project:
-        QMessageBox.warning(self, "Error", f"Project '{clean_project_name}' not found!")
-        return
-
-    if hasattr(project, 'get_task_by_id'):
-        task = project.get_task_by_id(task_identifier)
-        if not task:  
-            task = project.get_task_by_title(clean_task_title)
-    else:
-        task = project.get_task_by_title(clean_task_title)
-    
-    if not task:
-        QMessageBox.warning(self, "Error", f"Task '{clean_task_title}' not found!")
-        return
-    
-    if hasattr(project, 'id') and hasattr(task, 'id'):
-        self.edit_task_by_ids(project.id, task.id)
-    else:
-        self.edit_task_legacy(project, task)
-
-def edit_task_legacy(self, project, task):
-    """Edit task cho dữ liệu legacy không có ID"""
-    from gui.edit_task_dialog import EditTaskDialog
-    from persistent.list import PersistentList
-    
-    if not hasattr(self.current_user, 'completed_tasks'):
-        self.current_user.completed_tasks = PersistentList()
-    
-    dialog = EditTaskDialog(task, self)
-    result = dialog.exec_()
-    
-    if result == EditTaskDialog.Accepted:
-        task_data = dialog.get_task_data()
-        old_status = task.status
-        db_connection.invalidate_cache()
-        root = db_connection.get_root()
-        current_user = root['users'][self.current_user.username]
-        
-        current_project = None
-        for p in current_user.projects:
-            if p.name == project.name:
-                current_project = p
-                break
-        
-        if current_project:
-            current_task = None
-            for t in current_project.tasks:
-                if t.title == task.title and t.created_at == task.created_at:
-                    current_task = t
-                    break
-            
-            if current_task:
-                current_task.title = task_data['title']
-                current_task.description = task_data['description']
-                current_task.status = task_data['status']
-                current_task.deadline = task_data['deadline']
-                
-                if old_status != "Done" and task_data['status'] == "Done":
-                    self.move_task_to_completed(current_project, current_task, current_user)
-        
-        transaction.commit()
-        self.current_user = current_user
-        self.refresh_tree()
-        QMessageBox.information(self, "Success", "Task updated successfully!")
-        
-    elif result == 2:
-        self.delete_task_legacy(project, task)
-
-def delete_task_legacy(self, project, task):
-    """Xóa task cho dữ liệu legacy"""
-    db_connection.invalidate_cache()
-    
-    root = db_connection.get_root()
-    current_user = root['users'][self.current_user.username]
-    
-    for p in current_user.projects:
-        if p.name == project.name:
-            for t in list(p.tasks):  
-                if t.title == task.title and t.created_at == task.created_at:
-                    p.tasks.remove(t)
-                    break
-            break
-    
-    transaction.commit()
-    self.current_user = current_user
-    self.refresh_tree()
-    QMessageBox.information(self, "Success", "Task deleted successfully!")
-
-
-def __init__(self):
-    super().__init__()
-    self.current_user = None
-    self.refresh_timer = None
-    
-    if DEBUG:
-        from config.settings import print_config  
-        print_config()
-        
-    self.init_ui()
-    self.connect_to_database()
-    
-    self.run_migration_if_needed()
-    
-    self.start_auto_refresh()
-    
-    self.show_login_at_startup()
\ No newline at end of file
+        if args.check:
+            needed = DataMigration.check_migration_needed()
+            version = get_schema_version(db_connection.get_root())
+            print(f"📦 Migration needed (schema {version} -> {SCHEMA_VERSION})" if needed
+                  else f"✅ No migration needed (schema {version})")
+            return 1 if needed else 0
+
+        if not DataMigration.migrate_to_uuid(args.batch_size):
+            return 1
+        if args.validate:
+            return 0 if DataMigration.validate_data_integrity() else 1
+        return 0
+    finally:
+        db_connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
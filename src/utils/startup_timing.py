@@ -0,0 +1,79 @@
+"""Đo thời gian các phase khởi động client (process start -> tree dùng được).
+
+startup_timer được tạo khi module này được import (dòng đầu của main.py), các
+phase trên critical path gọi begin/end, và finish() ghi một dòng JSON vào
+PROFILING_CONFIG['startup_log'] (nếu được bật) khi tree đã hiển thị sau lần
+đăng nhập đầu. Thời gian chờ người dùng nhập login được ghi riêng
+(waiting_for_user_ms); một phase có thể mở lại nhiều lần và được cộng dồn.
+"""
+import json
+import os
+import time
+from datetime import datetime
+from config.settings import PROFILING_CONFIG, DEBUG
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.started_wall = time.time()
+        self.phases = {}
+        self.finished = False
+        self._open = {}
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def begin(self, name):
+        if not self.finished and name not in self._open:
+            self._open[name] = self.elapsed_ms()
+
+    def end(self, name):
+        start = self._open.pop(name, None)
+        if start is None:
+            return
+        duration = self.elapsed_ms() - start
+        phase = self.phases.setdefault(name, {'start_ms': round(start, 2), 'duration_ms': 0})
+        phase['duration_ms'] = round(phase['duration_ms'] + duration, 2)
+        if DEBUG:
+            print(f"⏱️ Startup phase {name}: {duration:.1f}ms")
+
+    def finish(self, **fields):
+        """Kết thúc đo (client đã dùng được), ghi và trả về record; chỉ lần đầu có tác dụng"""
+        if self.finished:
+            return None
+        self.finished = True
+        interactive_ms = self.elapsed_ms()
+        waiting_ms = self.phases.get('login', {}).get('duration_ms', 0)
+        record = {
+            'event': 'startup',
+            'pid': os.getpid(),
+            'started_at': datetime.fromtimestamp(self.started_wall).isoformat(),
+            'interactive_at': time.time(),
+            'interactive_ms': round(interactive_ms, 2),
+            'waiting_for_user_ms': waiting_ms,
+            'active_ms': round(interactive_ms - waiting_ms, 2),
+            'phases': self.phases,
+        }
+        record.update(fields)
+        if DEBUG:
+            print(f"⏱️ Interactive after {interactive_ms:.0f}ms ({interactive_ms - waiting_ms:.0f}ms without login)")
+        self._write(record)
+        return record
+
+    def _write(self, record):
+        path = PROFILING_CONFIG['startup_log']
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as log_file:
+                log_file.write(json.dumps(record) + '\n')
+        except OSError as e:
+            if DEBUG:
+                print(f"⚠️ Cannot write startup log {path}: {e}")
+
+
+startup_timer = StartupTimer()
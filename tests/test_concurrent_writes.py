@@ -0,0 +1,99 @@
+"""Hai client ghi đồng thời vào cùng user/project phải được merge trên storage."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import pytest
+import transaction
+import ZODB
+from ZODB.FileStorage import FileStorage
+
+from database.models import User, Project, Task
+
+SEED_TASKS = 20
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ZODB.DB(FileStorage(str(tmp_path / 'Data.fs')))
+    connection = db.open()
+    user = connection.root()['user'] = User('alice', 'secret')
+    project = Project('Work', 'Seeded project')
+    user.add_project(project)
+    for number in range(SEED_TASKS):
+        user.add_task(project, Task(f'Seed {number}', 'existing words only', f'2030-01-{number + 1:02d}'))
+    transaction.commit()
+    connection.close()
+    yield db
+    db.close()
+
+
+def run_concurrently(db, *operations):
+    """Mỗi operation(user, project) chạy trên connection riêng, rồi commit lần lượt"""
+    sessions = []
+    for operation in operations:
+        manager = transaction.TransactionManager()
+        connection = db.open(transaction_manager=manager)
+        user = connection.root()['user']
+        operation(user, user.projects[0])
+        sessions.append((manager, connection))
+    for manager, connection in sessions:
+        manager.commit()
+        connection.close()
+    connection = db.open()
+    return connection, connection.root()['user']
+
+
+def test_same_new_task_title(db):
+    connection, user = run_concurrently(
+        db,
+        lambda user, project: user.add_task(project, Task('Only existing words')),
+        lambda user, project: user.add_task(project, Task('Only existing words')))
+    project = user.projects[0]
+    tasks = project.get_all_tasks_by_title('Only existing words')
+    assert len(tasks) == 2
+    assert project.get_task_by_title('Only existing words') is tasks[0]
+    assert not project.validate_task_title('Only existing words')
+    connection.close()
+
+
+def test_same_new_project_name(db):
+    connection, user = run_concurrently(
+        db,
+        lambda user, project: user.add_project(Project('Side project')),
+        lambda user, project: user.add_project(Project('Side project')))
+    assert user.get_project_by_name('Side project') is user.projects[1]
+    assert not user.validate_project_name('Side project')
+    connection.close()
+
+
+def test_status_changes_of_different_tasks(db):
+    def prepare(user, project):
+        user.set_task_status(project, project.tasks[1], 'Doing')
+        user.set_task_status(project, project.tasks[3], 'Done')
+        user.set_task_status(project, project.tasks[7], 'Done')
+    connection, user = run_concurrently(db, prepare)
+    connection.close()
+
+    # Hai client cùng lấy task ra khỏi status Done (làm rỗng status đó) và thêm vào To Do
+    connection, user = run_concurrently(
+        db,
+        lambda user, project: user.set_task_status(project, project.tasks[3], 'To Do'),
+        lambda user, project: user.set_task_status(project, project.tasks[7], 'To Do'))
+    project = user.projects[0]
+    assert list(project.iter_tasks(status='Done')) == []
+    assert [task.title for task in project.iter_tasks(status='Doing', order_by='deadline')] == ['Seed 1']
+    assert len(list(project.iter_tasks(status='To Do'))) == SEED_TASKS - 1
+    assert project.get_status_counts() == {'To Do': SEED_TASKS - 1, 'Doing': 1, 'Done': 0}
+    connection.close()
+
+
+def test_same_new_word_in_descriptions(db):
+    connection, user = run_concurrently(
+        db,
+        lambda user, project: user.add_task(project, Task('First', 'needs a zeppelin')),
+        lambda user, project: user.add_task(project, Task('Second', 'another zeppelin')))
+    assert sorted(task.title for _, _, task in user.search_tasks('zeppelin')) == ['First', 'Second']
+    assert [task.title for _, _, task in user.search_tasks('zep another')] == ['Second']
+    connection.close()
@@ -0,0 +1,104 @@
+"""Phân trang task của project cũ (PersistentList, task chưa có id) chưa migrate."""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import pytest
+import transaction
+import ZODB
+from persistent.list import PersistentList
+
+from database.models import User, Project, Task
+
+TASK_COUNT = 450
+
+
+def make_legacy_user():
+    """User/Project/Task như dữ liệu trước migration: không id, không index"""
+    user = User.__new__(User)
+    user.username = 'legacy'
+    user.password_hash = ''
+    user.projects = PersistentList()
+    user.created_at = datetime(2023, 1, 1)
+
+    project = Project.__new__(Project)
+    project.name = 'Old project'
+    project.description = ''
+    project.tasks = PersistentList()
+    project.created_at = datetime(2023, 1, 1)
+    user.projects.append(project)
+
+    for number in range(TASK_COUNT):
+        task = Task.__new__(Task)
+        task.title = f'Task {number % 10}'  # title trùng nhau
+        task.description = ''
+        task.deadline = '2024-01-%02d' % (number % 28 + 1)
+        task.status = ('To Do', 'Doing', 'Done')[number % 3]
+        # Một số task tạo cùng thời điểm: thứ tự phải dựa vào phần còn lại của key
+        task.created_at = datetime(2023, 1, 1) + timedelta(seconds=number // 3)
+        project.tasks.append(task)
+    return user, project
+
+
+@pytest.fixture
+def legacy_user():
+    db = ZODB.DB(None)
+    connection = db.open()
+    user, project = make_legacy_user()
+    connection.root()['users'] = {'legacy': user}
+    transaction.commit()
+    yield user, project
+    transaction.abort()
+    connection.close()
+    db.close()
+
+
+def test_iter_task_entries_pages_legacy_project(legacy_user):
+    user, project = legacy_user
+    assert not project.has_indexes()
+
+    seen = []
+    cursor = None
+    while True:
+        tasks, cursor = project.get_tasks_page(limit=100, cursor=cursor)
+        seen.extend(tasks)
+        if cursor is None:
+            break
+    assert len(seen) == TASK_COUNT
+    assert len({id(task) for task in seen}) == TASK_COUNT
+
+    by_deadline = list(project.iter_tasks(order_by='deadline'))
+    assert len(by_deadline) == TASK_COUNT
+    tasks, _ = user.get_tasks_page(status='Done', limit=1000)
+    assert len(tasks) == TASK_COUNT // 3
+
+
+def test_tree_model_fetches_legacy_tasks(legacy_user):
+    from PyQt5.QtWidgets import QApplication
+    from gui.components.project_tree_model import ProjectTreeModel, FETCH_BATCH_SIZE
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    user, project = legacy_user
+    model = ProjectTreeModel()
+    model.refresh(user)
+    project_index = model.index(0, 0)
+    assert project_index.isValid()
+
+    while model.canFetchMore(project_index):
+        before = model.rowCount(project_index)
+        model.fetchMore(project_index)
+        assert model.rowCount(project_index) > before
+    assert model.rowCount(project_index) == TASK_COUNT > FETCH_BATCH_SIZE
+    assert model.data(model.index(0, 0, project_index)) is not None
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_page_limit_must_be_positive(legacy_user, limit):
+    user, project = legacy_user
+    with pytest.raises(ValueError):
+        project.get_tasks_page(limit=limit)
+    with pytest.raises(ValueError):
+        user.get_tasks_page(limit=limit)